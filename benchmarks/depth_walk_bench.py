@@ -0,0 +1,130 @@
+"""
+Depth walk benchmark
+Compares the previous per-level loop of calculate_liquidity_metrics with the
+prefix-sum engine in bot/depth_walk.py on synthetic 50-level books, and checks
+that both give the same results.
+
+Usage: python benchmarks/depth_walk_bench.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "bot"))
+
+from depth_walk import DepthBook  # noqa: E402
+
+LEVELS = 50
+BOOKS = 200
+QUANTITIES = [10, 100, 500, 1_000, 5_000, 20_000]
+
+
+def make_book(mid: float) -> dict:
+    tick = mid * 0.0001
+    asks = [
+        [f"{mid + tick * (i + 1):.6f}", f"{random.uniform(1, 800):.1f}"]
+        for i in range(LEVELS)
+    ]
+    bids = [
+        [f"{mid - tick * (i + 1):.6f}", f"{random.uniform(1, 800):.1f}"]
+        for i in range(LEVELS)
+    ]
+    return {"bids": bids, "asks": asks}
+
+
+def legacy_walk(
+    order_book: dict, order_qty: float, side: str, current_price: float
+) -> dict:
+    """Loop used by calculate_liquidity_metrics before the depth-walk engine."""
+    orders = order_book["asks"] if side == "Buy" else order_book["bids"]
+    cumulative_qty = 0.0
+    cumulative_value = 0.0
+    price_levels_used = 0
+    max_slippage = 0.0
+    for price_str, size_str in orders:
+        price = float(price_str)
+        size = float(size_str)
+        if cumulative_qty >= order_qty:
+            break
+        qty_to_take = min(size, order_qty - cumulative_qty)
+        cumulative_qty += qty_to_take
+        cumulative_value += qty_to_take * price
+        price_levels_used += 1
+        if side == "Buy":
+            slippage = ((price - current_price) / current_price) * 100
+        else:
+            slippage = ((current_price - price) / current_price) * 100
+        max_slippage = max(max_slippage, slippage)
+    return {
+        "avg_execution_price": (
+            cumulative_value / cumulative_qty if cumulative_qty > 0 else current_price
+        ),
+        "fill_percentage": (cumulative_qty / order_qty) * 100 if order_qty > 0 else 0,
+        "levels_used": price_levels_used,
+        "max_slippage_percent": max_slippage,
+    }
+
+
+def check(books: list):
+    for book, mid in books:
+        depth = DepthBook(book)
+        for qty in QUANTITIES:
+            for side in ("Buy", "Sell"):
+                old = legacy_walk(book, qty, side, mid)
+                new = depth.walk(side, qty, mid)
+                for key in old:
+                    assert abs(old[key] - new[key]) <= 1e-9 * max(1.0, abs(old[key])), (
+                        key,
+                        old,
+                        new,
+                    )
+
+
+def bench(books: list):
+    start = time.perf_counter()
+    for book, mid in books:
+        for qty in QUANTITIES:
+            for side in ("Buy", "Sell"):
+                legacy_walk(book, qty, side, mid)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for book, mid in books:
+        depth = DepthBook(book)  # parsed once per book, both sides, all sizes
+        for qty in QUANTITIES:
+            depth.walk_both(qty, mid)
+    engine = time.perf_counter() - start
+
+    parsed = [(DepthBook(book), mid) for book, mid in books]
+    start = time.perf_counter()
+    for depth, mid in parsed:
+        for qty in QUANTITIES:
+            depth.walk_both(qty, mid)
+    walks_only = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for book, mid in books:
+        depth = DepthBook(book)
+        depth.asks.max_qty_within_slippage(0.5, mid)
+        depth.bids.max_qty_within_slippage(0.5, mid)
+    max_qty = time.perf_counter() - start
+
+    walks = len(books) * len(QUANTITIES) * 2
+    print(f"{walks} walks over {len(books)} books x {LEVELS} levels")
+    print(f"legacy loop : {legacy * 1000:8.1f} ms")
+    print(f"depth engine: {engine * 1000:8.1f} ms  ({legacy / engine:.1f}x)")
+    print(f"walks only  : {walks_only * 1000:8.1f} ms  (book already parsed)")
+    print(f"max qty @0.5% (both sides, incl. parse): {max_qty * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    random.seed(7)
+    books = []
+    for _ in range(BOOKS):
+        mid = random.uniform(0.01, 60_000)
+        books.append((make_book(mid), mid))
+    check(books)
+    print("results match the legacy loop")
+    bench(books)
@@ -0,0 +1,96 @@
+"""
+Signal corpus
+Synthetic channel traffic for the signal parser benchmark and fuzz check,
+plus a copy of the regex parser that bot/regex_utils.py used before the
+single-pass engine (the reference both scripts compare against).
+"""
+
+import random
+import re
+
+SYMBOLS = ["BTC", "ETH", "SOL", "XRP", "DOGE", "1000PEPE", "WIF", "ARB", "OP", "TIA"]
+QUOTES = ["USDT", "USDT", "USDT", "USDC"]
+EMOJI = ["🟢", "🔴", "🚀", "🔥", "⚡️", "📈", "📉", "✅", ""]
+
+CHATTER = [
+    "✅ #{sym}/USDT Target 1 reached 🎯 Profit: {pct}% ⏰ 12m",
+    "⛔️ #{sym}/USDT Stop Loss hit, closed at {pct}% loss",
+    "Market update: BTC dominance at {pct}%, alts bleeding. Stay safe!",
+    "🎁 Weekly results: {pct}% net, 34 signals, 25 winners.\nJoin VIP for more!",
+    "#{sym}/USDT all targets done ✅✅✅ +{pct}%",
+    "Long-term holders are accumulating {sym}; short squeeze incoming?",
+    "Reminder: always use a stop loss and never risk more than {pct}% per trade.",
+]
+
+
+# ---------------- LEGACY PARSER ---------------- #
+LEGACY_SIGNAL_REGEX = re.compile(
+    r"(Long|Short).*?Lev\s*x\d+.*?Entry:\s*[\d.]+.*?Stop\s*Loss:\s*[\d.]+.*?Targets:\s*(?:[\d.]+\s*-\s*)*[\d.]+",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def legacy_is_signal_message(text: str) -> bool:
+    if not text:
+        return False
+    return bool(LEGACY_SIGNAL_REGEX.search(text))
+
+
+def legacy_parse_signal(text: str):
+    symbol_match = re.search(r"#\s*([A-Z0-9]+)\s*/\s*(USDT|USDC|USD)", text, re.I)
+    side_match = re.search(r"(Long|Short)", text, re.I)
+    entry_match = re.search(r"Entry:\s*([\d.]+)", text)
+    sl_match = re.search(r"Stop\s*Loss:\s*([\d.]+)", text)
+    targets_match = re.findall(r"Targets:\s*([^\n]+)", text)
+
+    if not all([symbol_match, side_match, entry_match, sl_match, targets_match]):
+        return None
+
+    symbol = symbol_match.group(1).upper() + symbol_match.group(2).upper()
+    side = "Buy" if side_match.group(1).lower() == "long" else "Sell"
+    targets = [float(x) for x in targets_match[0].split("-")]
+
+    return {
+        "symbol": symbol,
+        "side": side,
+        "entry": float(entry_match.group(1)),
+        "sl": float(sl_match.group(1)),
+        "targets": targets,
+    }
+
+
+# ---------------- GENERATORS ---------------- #
+def _price(rng: random.Random) -> str:
+    value = rng.choice(
+        [rng.uniform(0.00001, 0.01), rng.uniform(0.1, 10), rng.uniform(10, 70_000)]
+    )
+    return f"{value:.{rng.choice([0, 2, 4, 6])}f}"
+
+
+def make_signal(rng: random.Random) -> str:
+    side = rng.choice(["Long", "Short", "LONG", "short"])
+    sep = rng.choice([" - ", "-", " -  "])
+    targets = sep.join(_price(rng) for _ in range(rng.randint(1, 6)))
+    lines = [
+        f"#{rng.choice(SYMBOLS)}{rng.choice(['/', ' / ', '/'])}{rng.choice(QUOTES)} {rng.choice(EMOJI)}",
+        f"{side} {rng.choice(EMOJI)} Lev{rng.choice([' x', 'x', '  x'])}{rng.randint(1, 100)}",
+        f"Entry: {_price(rng)}{rng.choice([' - ', chr(10)])}Stop{rng.choice([' ', '', '  '])}Loss: {_price(rng)}",
+        f"Targets: {targets}",
+    ]
+    if rng.random() < 0.3:
+        lines.append(
+            rng.choice(["", "⚠️ Use proper risk management", "#crypto #signals"])
+        )
+    return "\n".join(lines)
+
+
+def make_chatter(rng: random.Random) -> str:
+    return rng.choice(CHATTER).format(sym=rng.choice(SYMBOLS), pct=rng.randint(1, 400))
+
+
+def make_corpus(rng: random.Random, size: int, signal_ratio: float = 0.2) -> list:
+    """Channel-like traffic: mostly chatter, some signals."""
+    return [
+        make_signal(rng) if rng.random() < signal_ratio else make_chatter(rng)
+        for _ in range(size)
+    ]
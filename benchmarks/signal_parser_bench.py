@@ -0,0 +1,91 @@
+"""
+Signal parser benchmark
+Times the legacy regex pipeline (is_signal_message, then parse_signal in the
+message handler and again in the signal worker) against one scan_signal call
+per message on a channel-like corpus, then shows how both grow on
+adversarial messages (many field labels, no closing Targets line).
+
+Usage: python benchmarks/signal_parser_bench.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "bot"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from signal_corpus import (  # noqa: E402
+    legacy_is_signal_message,
+    legacy_parse_signal,
+    make_corpus,
+)
+from signal_parser import scan_signal  # noqa: E402
+
+CORPUS_SIZE = 20_000
+REPEATS = 5
+ADVERSARIAL_REPEATS = [5, 10, 20, 40]
+LEGACY_TIME_LIMIT = 5.0  # seconds; larger adversarial inputs are skipped
+
+
+def legacy_pipeline(text: str):
+    if legacy_is_signal_message(text):
+        legacy_parse_signal(text)  # message handler (shard key)
+        return legacy_parse_signal(text)  # signal worker
+    return None
+
+
+def best_of(function, corpus: list) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for text in corpus:
+            function(text)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def time_corpus(corpus: list):
+    signals = [text for text in corpus if scan_signal(text).is_signal]
+    chatter = [text for text in corpus if not scan_signal(text).is_signal]
+    print(f"{len(corpus)} messages ({len(signals)} signals)")
+    for name, messages in (("all", corpus), ("signals", signals), ("chatter", chatter)):
+        legacy = best_of(legacy_pipeline, messages)
+        engine = best_of(scan_signal, messages)
+        print(
+            f"{name:8s} legacy pipeline {legacy * 1000:7.1f} ms  "
+            f"scan_signal {engine * 1000:7.1f} ms  ({legacy / engine:.1f}x)"
+        )
+
+
+def adversarial(repeats: int) -> str:
+    return "Long Lev x10 Entry: 1.5 Stop Loss: 1.2 " * repeats + "Targets: none"
+
+
+def time_adversarial():
+    print("\nadversarial (no valid Targets line):")
+    legacy_skipped = False
+    for repeats in ADVERSARIAL_REPEATS:
+        text = adversarial(repeats)
+        start = time.perf_counter()
+        scan_signal(text)
+        engine = time.perf_counter() - start
+
+        legacy_text = "skipped"
+        if not legacy_skipped:
+            start = time.perf_counter()
+            legacy_is_signal_message(text)
+            legacy = time.perf_counter() - start
+            legacy_text = f"{legacy * 1000:10.1f} ms"
+            legacy_skipped = legacy > LEGACY_TIME_LIMIT
+        print(
+            f"  {len(text):6d} chars: legacy {legacy_text}  "
+            f"engine {engine * 1000:6.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    corpus = make_corpus(random.Random(5), CORPUS_SIZE)
+    time_corpus(corpus)
+    time_adversarial()
@@ -0,0 +1,191 @@
+"""
+Signal parser fuzz check
+Mutates corpus signals (deleted / duplicated / shuffled spans, junk and
+keyword insertions, broken numbers) and compares the single-pass engine in
+bot/signal_parser.py with the legacy regex parser on every input:
+- detection and parsed fields must agree, except on the inputs where the
+  legacy parser raises (malformed numbers such as "1.2.3", "Entry: ." or
+  "Targets: 1 - 2 🚀"; the engine just has to return cleanly there) and
+  where a label appears in another case ("stop Loss:"; the legacy detection
+  matched labels case-insensitively but its parser did not, the engine is
+  case-insensitive for both). Legacy detection also accepted any `[\d.]+`
+  run as a value ("Entry: ." counted as an entry); the engine only accepts
+  valid numbers. Keywords embedded in the symbol tag or in another keyword
+  ("#ARBLONG/USDC", "Shortargets:") were read by the legacy searches but
+  are not tokens for the engine. Those inputs are counted, not compared.
+
+Usage: python benchmarks/signal_parser_fuzz.py [iterations]
+"""
+
+import os
+import random
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "bot"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from signal_corpus import (  # noqa: E402
+    legacy_is_signal_message,
+    legacy_parse_signal,
+    make_chatter,
+    make_signal,
+)
+from signal_parser import scan_signal  # noqa: E402
+
+FRAGMENTS = [
+    "Long",
+    "Short",
+    "Lev x",
+    "Lev x7",
+    "Entry:",
+    "Entry: 1.5",
+    "Stop Loss:",
+    "Stop Loss: 0.9",
+    "Targets:",
+    "Targets: 2 - 3",
+    " - ",
+    "-",
+    ".",
+    "..",
+    "\n",
+    "  ",
+    "🚀",
+    "abc",
+    "12",
+    "#ETH/USDT",
+]
+
+
+def mutate(rng: random.Random, text: str) -> str:
+    for _ in range(rng.randint(1, 4)):
+        op = rng.randrange(6)
+        pos = rng.randint(0, len(text))
+        if op == 0 and text:  # delete a span
+            end = min(len(text), pos + rng.randint(1, 8))
+            text = text[:pos] + text[end:]
+        elif op == 1:  # insert a keyword / junk fragment
+            text = text[:pos] + rng.choice(FRAGMENTS) + text[pos:]
+        elif op == 2:  # shuffle lines
+            lines = text.split("\n")
+            rng.shuffle(lines)
+            text = "\n".join(lines)
+        elif op == 3 and text:  # duplicate a span
+            end = min(len(text), pos + rng.randint(1, 30))
+            text = text[:pos] + text[pos:end] + text[pos:]
+        elif op == 4:  # break a number
+            text = text[:pos] + rng.choice([".", "0.", ".5", "9"]) + text[pos:]
+        else:  # join / split lines
+            text = text.replace("\n", " ", 1) if rng.random() < 0.5 else text
+    return text
+
+
+LABELS = [r"Entry:", r"Stop\s*Loss:", r"Targets:"]
+
+
+def mixed_case_labels(text: str) -> bool:
+    return any(
+        len(re.findall(label, text)) != len(re.findall(label, text, re.I))
+        for label in LABELS
+    )
+
+
+LEGACY_VALUES = re.compile(
+    r"(?:Lev\s*x|Entry:|Stop\s*Loss:|Targets:)\s*((?:[\d.]+\s*-\s*)*[\d.]+)", re.I
+)
+
+
+def malformed_numbers(text: str) -> bool:
+    for values in LEGACY_VALUES.findall(text):
+        for value in values.split("-"):
+            try:
+                float(value)
+            except ValueError:
+                return True
+    return False
+
+
+KEYWORDS = [
+    re.compile(rf"(?=({pattern}))", re.I)
+    for pattern in [
+        r"#\s*[A-Z0-9]+\s*/\s*(?:USDT|USDC|USD)",
+        r"Long|Short",
+        r"Lev\s*x\d+",
+        r"Entry:",
+        r"Stop\s*Loss:",
+        r"Targets:",
+    ]
+]
+
+
+def embedded_keywords(text: str) -> bool:
+    spans = sorted(
+        (match.start(), match.start() + len(match.group(1)))
+        for keyword in KEYWORDS
+        for match in keyword.finditer(text)
+    )
+    return any(
+        start < previous_end for (_, previous_end), (start, _) in zip(spans, spans[1:])
+    )
+
+
+def compare(text: str, stats: dict):
+    scan = scan_signal(text)  # must never raise
+    try:
+        legacy = legacy_parse_signal(text)
+    except (ValueError, IndexError):
+        stats["legacy_raised"] += 1
+        return
+    if malformed_numbers(text):
+        stats["malformed"] += 1
+        return
+    if embedded_keywords(text):
+        stats["embedded"] += 1
+        return
+    if mixed_case_labels(text):
+        stats["label_case"] += 1
+        return
+
+    if scan.is_signal != legacy_is_signal_message(text):
+        stats["detection_mismatch"].append(text)
+    new = scan.signal
+    if legacy is None or new is None:
+        if legacy is not new:
+            stats["parse_mismatch"].append((text, legacy, new))
+        return
+    if any(new[key] != value for key, value in legacy.items()):
+        stats["parse_mismatch"].append((text, legacy, new))
+
+
+def main(iterations: int):
+    rng = random.Random(11)
+    stats = {
+        "legacy_raised": 0,
+        "label_case": 0,
+        "malformed": 0,
+        "embedded": 0,
+        "detection_mismatch": [],
+        "parse_mismatch": [],
+    }
+    for i in range(iterations):
+        base = make_signal(rng) if i % 4 else make_chatter(rng)
+        compare(base, stats)
+        compare(mutate(rng, base), stats)
+
+    print(f"{iterations * 2} inputs")
+    print(f"legacy parser raised on {stats['legacy_raised']}")
+    print(f"malformed numbers   : {stats['malformed']}")
+    print(f"embedded keywords   : {stats['embedded']}")
+    print(f"case-variant labels : {stats['label_case']}")
+    print(f"detection mismatches: {len(stats['detection_mismatch'])}")
+    print(f"parse mismatches    : {len(stats['parse_mismatch'])}")
+    for text in stats["detection_mismatch"][:5]:
+        print("--- detection ---\n" + text)
+    for text, legacy, new in stats["parse_mismatch"][:5]:
+        print(f"--- parse ---\n{text}\nlegacy: {legacy}\nengine: {new}")
+    if stats["detection_mismatch"] or stats["parse_mismatch"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
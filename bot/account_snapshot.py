@@ -0,0 +1,109 @@
+"""
+Account Snapshot Module
+Short-lived snapshots of account data (positions, pending orders, closed PnL,
+wallet balance, account info) shared by the Telegram commands.
+- Each resource is cached for at most SNAPSHOT_MAX_AGE seconds (per call
+  override: max_age), so operators running commands together cost one
+  round of REST calls.
+- Single-flight: callers that miss while a fetch is running await that fetch
+  instead of starting another one.
+- snapshot() fetches several resources in parallel and reports the age of
+  the oldest one, so replies can say how fresh they are.
+- Commands that change the account (/cancel, /close_positions) invalidate
+  the affected resources.
+"""
+
+import asyncio
+import time
+from typing import Dict
+
+from api import (
+    get_account_info,
+    get_closed_pnl,
+    get_pending_orders,
+    get_positions,
+    get_wallet_balance,
+)
+from config import SETTLE_COIN
+
+SNAPSHOT_MAX_AGE = 5.0  # seconds a fetched resource may be served from memory
+
+# Resource name -> coroutine function fetching it
+FETCHERS = {
+    "positions": lambda: get_positions(settleCoin=SETTLE_COIN),
+    "pending_orders": lambda: get_pending_orders(settleCoin=SETTLE_COIN),
+    "closed_pnl": lambda: get_closed_pnl(),
+    "wallet": lambda: get_wallet_balance(),
+    "account": lambda: get_account_info(),
+}
+
+_entries: Dict[str, dict] = {}  # name -> {"value", "fetched_at"} (monotonic)
+_inflight: Dict[str, asyncio.Task] = {}
+_generations: Dict[str, int] = {}  # bumped by invalidate()
+account_snapshot_stats = {"hits": 0, "shared": 0, "fetches": 0, "errors": 0}
+
+
+# ---------------- FETCH ---------------- #
+async def _fetch(name: str):
+    # Age counts from the request, not the reply (the data is at least this old)
+    requested_at = time.monotonic()
+    generation = _generations.get(name, 0)
+    try:
+        value = await FETCHERS[name]()
+    except Exception:
+        account_snapshot_stats["errors"] += 1
+        raise
+    finally:
+        if _inflight.get(name) is asyncio.current_task():
+            del _inflight[name]
+    # Invalidated while in flight: serve this caller, don't cache it
+    if _generations.get(name, 0) == generation:
+        _entries[name] = {"value": value, "fetched_at": requested_at}
+    return value, requested_at
+
+
+async def get(name: str, max_age: float = SNAPSHOT_MAX_AGE) -> tuple:
+    """(value, age in seconds) of one resource, fetched only when stale."""
+    entry = _entries.get(name)
+    if entry is not None:
+        age = time.monotonic() - entry["fetched_at"]
+        if age <= max_age:
+            account_snapshot_stats["hits"] += 1
+            return entry["value"], age
+
+    task = _inflight.get(name)
+    if task is None:
+        account_snapshot_stats["fetches"] += 1
+        task = _inflight[name] = asyncio.create_task(_fetch(name))
+    else:
+        account_snapshot_stats["shared"] += 1
+    # Shielded: one caller giving up must not cancel the others' fetch
+    value, fetched_at = await asyncio.shield(task)
+    return value, time.monotonic() - fetched_at
+
+
+async def snapshot(*names: str, max_age: float = SNAPSHOT_MAX_AGE) -> tuple:
+    """
+    Fetch several resources in parallel. Returns ({name: value}, age) where
+    age is that of the oldest resource.
+    """
+    results = await asyncio.gather(*(get(name, max_age) for name in names))
+    data = {name: value for name, (value, _) in zip(names, results)}
+    age = max((age for _, age in results), default=0.0)
+    return data, age
+
+
+def invalidate(*names: str):
+    """
+    Drop cached resources (all when no name is given) after a change. Fetches
+    already in flight are not reused or cached afterwards.
+    """
+    for name in names or list(FETCHERS):
+        _entries.pop(name, None)
+        _inflight.pop(name, None)
+        _generations[name] = _generations.get(name, 0) + 1
+
+
+# ---------------- FORMATTING ---------------- #
+def format_age(age: float) -> str:
+    return f"🕒 Snapshot age: {age:.1f}s"
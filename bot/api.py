@@ -1,26 +1,31 @@
-from pybit.exceptions import InvalidRequestError
-from clients import bybitClient
+from typing import Optional
+
+from bybit_http import BybitHTTPError
+import clients
 
 
 # ---------------- WALLET & ACCOUNT ---------------- #
-def get_wallet_balance():
+async def get_wallet_balance(accountType: str = "UNIFIED"):
     """Retrieve wallet balance for unified account."""
-    return bybitClient.get_wallet_balance(accountType="UNIFIED")
+    return await clients.bybitClient.get_wallet_balance(accountType=accountType)
 
 
-def get_account_info():
+async def get_account_info():
     """Retrieve account information."""
-    return bybitClient.get_account_info()
+    return await clients.bybitClient.get_account_info()
 
 
 # ---------------- INSTRUMENTS ---------------- #
-def get_all_linear_instruments(limit: int = 200):
-    """Retrieve all linear instruments (futures) from Bybit with pagination support."""
+async def get_all_linear_instruments(limit: int = 1000):
+    """
+    Retrieve all linear instruments (futures) from Bybit with pagination support.
+    limit=1000 is the API maximum, so usually a single round trip.
+    """
     cursor = None
     instruments = []
 
     while True:
-        res = bybitClient.get_instruments_info(
+        res = await clients.bybitClient.get_instruments_info(
             category="linear", limit=limit, cursor=cursor
         )
         instruments.extend(res["result"]["list"])
@@ -31,37 +36,65 @@ def get_all_linear_instruments(limit: int = 200):
     return instruments
 
 
-def get_single_instrument(symbol: str):
+async def get_single_instrument(symbol: str):
     """Retrieve a single instrument by symbol."""
-    res = bybitClient.get_instruments_info(category="linear", symbol=symbol, limit=1)
+    res = await clients.bybitClient.get_instruments_info(
+        category="linear", symbol=symbol, limit=1
+    )
     return res["result"]["list"][0]
 
 
 # ---------------- POSITIONS ---------------- #
-def get_positions(symbol: str | None = None, settleCoin: str | None = None):
+async def get_positions(
+    symbol: str | None = None,
+    settleCoin: str | None = None,
+    limit: int | None = None,
+    cursor: str | None = None,
+):
     """
     Retrieve open positions filtered by symbol or settleCoin.
-    At least one parameter must be provided.
+    At least one of symbol / settleCoin must be provided. One page only
+    (Bybit's default limit is 20); see get_all_positions.
     """
     if not symbol and not settleCoin:
         raise ValueError("Either symbol or settleCoin must be provided")
 
-    params = {"category": "linear"}
+    params = {"category": "linear", "limit": limit, "cursor": cursor}
     if symbol:
         params["symbol"] = symbol
     if settleCoin:
         params["settleCoin"] = settleCoin
 
-    res = bybitClient.get_positions(**params)
+    res = await clients.bybitClient.get_positions(**params)
     return res.get("result", {}).get("list", [])
 
 
-def close_all_positions(settleCoin="USDT"):
+async def get_all_positions(settleCoin: str, limit: int = 200):
+    """
+    Retrieve every open position for settleCoin, following nextPageCursor.
+    limit=200 is the API maximum, so usually a single round trip.
+    """
+    cursor = None
+    positions = []
+
+    while True:
+        res = await clients.bybitClient.get_positions(
+            category="linear", settleCoin=settleCoin, limit=limit, cursor=cursor
+        )
+        positions.extend(res["result"]["list"])
+        cursor = res["result"].get("nextPageCursor")
+        if not cursor:
+            break
+
+    return positions
+
+
+async def close_all_positions(settleCoin="USDT"):
     """
     Close all open positions for the given settleCoin in linear contracts.
     Uses reduce-only market orders to safely close positions.
     """
-    res = bybitClient.get_positions(category="linear", settleCoin=settleCoin)
+    res = await clients.bybitClient.get_positions(category="linear", settleCoin=settleCoin)
     positions_list = res.get("result", {}).get("list", [])
 
     if not positions_list:
@@ -82,7 +115,7 @@ def close_all_positions(settleCoin="USDT"):
         close_side = "Sell" if side == "Buy" else "Buy"
 
         try:
-            order = bybitClient.place_order(
+            order = await clients.bybitClient.place_order(
                 category="linear",
                 symbol=symbol,
                 side=close_side,
@@ -104,9 +137,9 @@ def close_all_positions(settleCoin="USDT"):
 
 
 # ---------------- ORDERS ---------------- #
-def get_pending_orders(settleCoin: str):
+async def get_pending_orders(settleCoin: str):
     """Retrieve all pending/open orders for a given settleCoin."""
-    res = bybitClient.get_open_orders(
+    res = await clients.bybitClient.get_open_orders(
         category="linear", settleCoin=settleCoin, openOnly=0, limit=20
     )
     if isinstance(res, dict):
@@ -114,55 +147,83 @@ def get_pending_orders(settleCoin: str):
     return []
 
 
-def get_closed_pnl(limit: int = 10):
+async def get_open_stop_orders(symbol: str):
+    """Open conditional orders (incl. partial TP/SL legs) for a symbol."""
+    res = await clients.bybitClient.get_open_orders(
+        category="linear", symbol=symbol, orderFilter="StopOrder", limit=50
+    )
+    if isinstance(res, dict):
+        return res.get("result", {}).get("list", [])
+    return []
+
+
+async def get_closed_pnl(limit: int = 10):
     """Retrieve closed PnL for the account."""
-    res = bybitClient.get_closed_pnl(category="linear", limit=limit)
+    res = await clients.bybitClient.get_closed_pnl(category="linear", limit=limit)
     if isinstance(res, dict):
         return res.get("result", {}).get("list", [])
     return []
 
 
-def get_transaction_log(limit: int = 50):
-    """Retrieve transaction log for linear category."""
-    return bybitClient.get_transaction_log(
-        accountType="UNIFIED", category="linear", limit=limit
+async def get_transaction_log(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    startTime: Optional[int] = None,
+    endTime: Optional[int] = None,
+    baseCoin: Optional[str] = None,
+):
+    """
+    Retrieve one page of the transaction log for linear category.
+    startTime..endTime (ms) may span at most 7 days; follow nextPageCursor for
+    the next page.
+    """
+    return await clients.bybitClient.get_transaction_log(
+        accountType="UNIFIED",
+        category="linear",
+        limit=limit,
+        cursor=cursor,
+        startTime=startTime,
+        endTime=endTime,
+        baseCoin=baseCoin,
     )
 
 
-def cancel_all_orders(settleCoin="USDT"):
+async def cancel_all_orders(settleCoin="USDT"):
     """Cancel all open orders for a given settleCoin in linear contracts."""
-    return bybitClient.cancel_all_orders(category="linear", settleCoin=settleCoin)
+    return await clients.bybitClient.cancel_all_orders(
+        category="linear", settleCoin=settleCoin
+    )
 
 
 # ---------------- LEVERAGE & ORDER PLACEMENT ---------------- #
-def set_leverage_safe(symbol: str, leverage: float):
+async def set_leverage_safe(symbol: str, leverage: float):
     """
     Safely set leverage for a symbol.
     If leverage is already set to desired value, returns False.
     """
     try:
-        bybitClient.set_leverage(
+        await clients.bybitClient.set_leverage(
             category="linear",
             symbol=symbol,
             buyLeverage=str(leverage),
             sellLeverage=str(leverage),
         )
         return True
-    except InvalidRequestError as e:
+    except BybitHTTPError as e:
         # Error code 110043 = leverage not modified
-        if "110043" in str(e):
+        if e.ret_code == 110043:
             return False
         raise
 
 
-def place_market_order(
+async def place_market_order(
     symbol: str, side: str, qty: float, sl: float | None = None, tp: float | None = None
 ):
     """
     Place a market order with optional SL/TP.
     Compatible with legacy code.
     """
-    return bybitClient.place_order(
+    return await clients.bybitClient.place_order(
         category="linear",
         symbol=symbol,
         side=side,
@@ -174,7 +235,7 @@ def place_market_order(
 
 
 # ---------------- TRADING STOP (SL/TP) ---------------- #
-def set_trading_stop(
+async def set_trading_stop(
     symbol: str,
     positionIdx: int,
     tpslMode: str,
@@ -215,4 +276,4 @@ def set_trading_stop(
 
     payload = {k: v for k, v in payload.items() if v is not None}
 
-    return bybitClient.set_trading_stop(**payload)
+    return await clients.bybitClient.set_trading_stop(**payload)
@@ -9,6 +9,7 @@ from config import (
 
 from cache import get_symbol_info as get_cached_symbol_info
 from api import get_wallet_balance, get_positions
+import position_book
 import asyncio
 
 
@@ -21,7 +22,7 @@ async def get_symbol_info(symbol: str):
 # ---------------- BALANCE ---------------- #
 async def get_usdt_balance() -> float:
     """Return USDT balance from Bybit."""
-    wallet =await get_wallet_balance(accountType="UNIFIED")
+    wallet = await get_wallet_balance(accountType="UNIFIED")
     coins = wallet["result"]["list"][0]["coin"]
     for c in coins:
         if c["coin"] == "USDT":
@@ -35,10 +36,13 @@ async def get_usdt_balance() -> float:
 
 # ---------------- OPEN POSITION ---------------- #
 async def is_position_open(symbol: str) -> bool:
-    """Check if a symbol has an open position."""
+    """Check if a symbol has an open position (position book first, REST fallback)."""
+    known = position_book.is_open(symbol)
+    if known is not None:
+        return known
+
     try:
-        res = get_positions(symbol=symbol)
-        positions = res["result"]["list"]
+        positions = await get_positions(symbol=symbol)
         if not positions:
             return False
         return float(positions[0]["size"]) != 0
@@ -51,7 +55,8 @@ async def is_position_open(symbol: str) -> bool:
 def normalize_qty(qty, step):
     """Adjust quantity based on step size."""
     precision = len(str(step).split(".")[1]) if "." in str(step) else 0
-    qty = int(qty / step) * step
+    # Epsilon: 0.015 / 0.001 is 14.999... in floating point
+    qty = int(qty / step + 1e-9) * step
     return round(qty, precision)
 
 
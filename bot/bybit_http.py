@@ -0,0 +1,211 @@
+"""
+Bybit Async HTTP Module
+Asyncio-native client for the Bybit v5 REST API (request signing, pooled keep-alive
+connections, per-request timeouts). Replaces the blocking pybit HTTP session so a slow
+Bybit response only delays the coroutine that made the call.
+"""
+
+import hashlib
+import hmac
+import json
+import time
+from urllib.parse import urlencode
+
+import aiohttp
+from yarl import URL
+
+# ---------------- ENDPOINTS ---------------- #
+MAINNET_URL = "https://api.bybit.com"
+DEMO_URL = "https://api-demo.bybit.com"
+TESTNET_URL = "https://api-testnet.bybit.com"
+
+DEFAULT_TIMEOUT = 10  # seconds
+DEFAULT_RECV_WINDOW = 5000  # milliseconds
+
+
+class BybitHTTPError(Exception):
+    """Raised when Bybit answers with a non-zero retCode or an HTTP error."""
+
+    def __init__(self, message: str, ret_code: int | None = None, response=None):
+        self.ret_code = ret_code
+        self.response = response
+        # Keep the pybit-style "(ErrCode: xxx)" suffix so existing checks still match
+        if ret_code is not None:
+            message = f"{message} (ErrCode: {ret_code})"
+        super().__init__(message)
+
+
+class AsyncBybitHTTP:
+    """
+    Minimal async Bybit v5 REST client.
+    The aiohttp session is created lazily on first use, inside the running loop,
+    and reused for every request (keep-alive pool).
+    """
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        api_secret: str | None = None,
+        demo: bool = False,
+        testnet: bool = False,
+        timeout: float = DEFAULT_TIMEOUT,
+        recv_window: int = DEFAULT_RECV_WINDOW,
+        max_connections: int = 20,
+    ):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.timeout = timeout
+        self.recv_window = recv_window
+        self.max_connections = max_connections
+        if testnet:
+            self.base_url = TESTNET_URL
+        elif demo:
+            self.base_url = DEMO_URL
+        else:
+            self.base_url = MAINNET_URL
+        self._session: aiohttp.ClientSession | None = None
+
+    # ---------------- SESSION ---------------- #
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                keepalive_timeout=60,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"Content-Type": "application/json"},
+            )
+        return self._session
+
+    async def close(self):
+        """Close the underlying connection pool."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    # ---------------- SIGNING ---------------- #
+    def _sign(self, timestamp: str, payload: str) -> str:
+        message = f"{timestamp}{self.api_key}{self.recv_window}{payload}"
+        return hmac.new(
+            self.api_secret.encode("utf-8"),
+            message.encode("utf-8"),
+            hashlib.sha256,
+        ).hexdigest()
+
+    def _auth_headers(self, payload: str) -> dict:
+        timestamp = str(int(time.time() * 1000))
+        return {
+            "X-BAPI-API-KEY": self.api_key,
+            "X-BAPI-SIGN": self._sign(timestamp, payload),
+            "X-BAPI-SIGN-TYPE": "2",
+            "X-BAPI-TIMESTAMP": timestamp,
+            "X-BAPI-RECV-WINDOW": str(self.recv_window),
+        }
+
+    # ---------------- CORE REQUEST ---------------- #
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: dict | None = None,
+        signed: bool = True,
+        timeout: float | None = None,
+    ) -> dict:
+        """
+        Send a request and return the decoded JSON response.
+
+        :param method: "GET" or "POST"
+        :param path: Endpoint path (e.g., /v5/position/list)
+        :param params: Query params (GET) or JSON body (POST); None values are dropped
+        :param signed: Whether to add authentication headers
+        :param timeout: Per-request timeout in seconds (defaults to client timeout)
+        """
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        session = self._get_session()
+        request_timeout = aiohttp.ClientTimeout(total=timeout or self.timeout)
+
+        if method == "GET":
+            payload = urlencode(params)
+            url = (
+                f"{self.base_url}{path}?{payload}" if payload else self.base_url + path
+            )
+            body = None
+        else:
+            payload = json.dumps(params, separators=(",", ":"))
+            url = self.base_url + path
+            body = payload
+
+        headers = self._auth_headers(payload) if signed else None
+
+        # encoded=True: the query string must go out exactly as it was signed
+        async with session.request(
+            method,
+            URL(url, encoded=True),
+            data=body,
+            headers=headers,
+            timeout=request_timeout,
+        ) as resp:
+            if resp.status != 200:
+                text = await resp.text()
+                raise BybitHTTPError(f"HTTP {resp.status} on {path}: {text[:200]}")
+            data = await resp.json(content_type=None)
+
+        ret_code = data.get("retCode", 0)
+        if ret_code != 0:
+            raise BybitHTTPError(
+                f"{data.get('retMsg', 'Unknown error')} on {path}",
+                ret_code=ret_code,
+                response=data,
+            )
+        return data
+
+    async def get(self, path: str, signed: bool = True, timeout=None, **params):
+        return await self.request("GET", path, params, signed=signed, timeout=timeout)
+
+    async def post(self, path: str, timeout=None, **params):
+        return await self.request("POST", path, params, signed=True, timeout=timeout)
+
+    # ---------------- MARKET ---------------- #
+    async def get_instruments_info(self, **params):
+        return await self.get("/v5/market/instruments-info", signed=False, **params)
+
+    async def get_orderbook(self, **params):
+        return await self.get("/v5/market/orderbook", signed=False, **params)
+
+    async def get_tickers(self, **params):
+        return await self.get("/v5/market/tickers", signed=False, **params)
+
+    # ---------------- ACCOUNT ---------------- #
+    async def get_wallet_balance(self, **params):
+        return await self.get("/v5/account/wallet-balance", **params)
+
+    async def get_account_info(self, **params):
+        return await self.get("/v5/account/info", **params)
+
+    async def get_transaction_log(self, **params):
+        return await self.get("/v5/account/transaction-log", **params)
+
+    # ---------------- POSITIONS ---------------- #
+    async def get_positions(self, **params):
+        return await self.get("/v5/position/list", **params)
+
+    async def get_closed_pnl(self, **params):
+        return await self.get("/v5/position/closed-pnl", **params)
+
+    async def set_leverage(self, **params):
+        return await self.post("/v5/position/set-leverage", **params)
+
+    async def set_trading_stop(self, **params):
+        return await self.post("/v5/position/trading-stop", **params)
+
+    # ---------------- ORDERS ---------------- #
+    async def place_order(self, **params):
+        return await self.post("/v5/order/create", **params)
+
+    async def get_open_orders(self, **params):
+        return await self.get("/v5/order/realtime", **params)
+
+    async def cancel_all_orders(self, **params):
+        return await self.post("/v5/order/cancel-all", **params)
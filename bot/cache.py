@@ -1,10 +1,12 @@
 import asyncio
 import json
+import os
+import time
+from collections import OrderedDict, deque
 from redis.asyncio import Redis
 
 from api import (
     get_all_linear_instruments,
-    get_transaction_log,
     get_single_instrument,
 )
 
@@ -32,8 +34,45 @@ async def init_redis():
 
 
 # ---------------- KEYS ---------------- #
-SYMBOL_INFO_KEY = "bybit:symbol_info"
-TRANSACTION_LOG_KEY = "bybit:transaction_log"
+# Hash: field = symbol, value = compact JSON spec (read with HGET)
+SYMBOL_SPECS_KEY = "bybit:symbol_specs"
+
+# ---------------- SYMBOL CACHE TIERS ---------------- #
+# L1: in-process TTL/LRU map of compact specs
+SYMBOL_L1_TTL = 600  # seconds
+SYMBOL_L1_MAX_SIZE = 1024
+_symbol_l1: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+
+# L3: on-disk snapshot shaped like responses/*/instruments_info_linear.json,
+# rewritten by every refresh_symbol_info. Served only while its "time" is
+# within SYMBOL_SNAPSHOT_MAX_AGE (a few missed refreshes); older than that
+# the API is asked instead.
+ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
+SYMBOL_SNAPSHOT_FILE = os.path.join(ROOT_DIR, "instruments_snapshot.json")
+SYMBOL_SNAPSHOT_MAX_AGE = 2 * 86400  # seconds
+_symbol_l3: dict | None = None  # {symbol: spec}, parsed lazily, once
+_instrument_raw: dict | None = None  # {symbol: raw instrument}, baseline for diffs
+_l3_source: str | None = None  # "snapshot" | "refresh" (None: no snapshot yet)
+_l3_time = 0.0  # epoch seconds the L3 listing was fetched from the API
+
+# ---------------- INSTRUMENT CHANGE EVENTS ---------------- #
+# Fields that matter for sizing / order validation
+WATCHED_INSTRUMENT_FIELDS = ("lotSizeFilter", "priceFilter", "leverageFilter", "status")
+SYMBOL_CHANGES_CHANNEL = "bybit:symbol_changes"  # Redis pub/sub
+recent_instrument_events: deque = deque(maxlen=500)
+_instrument_subscribers: list = []
+
+# Hit/miss counters per tier
+symbol_cache_stats = {
+    "l1_hit": 0,
+    "l1_miss": 0,
+    "l2_hit": 0,
+    "l2_miss": 0,
+    "l3_hit": 0,
+    "l3_miss": 0,
+    "l3_stale": 0,
+    "api_fetch": 0,
+}
 
 
 # ---------------- CACHE CORE ---------------- #
@@ -46,95 +85,320 @@ async def get_cache(key: str):
     return json.loads(data) if data else None
 
 
+def parse_symbol_spec(item: dict) -> dict:
+    """Compact spec from a raw Bybit instrument record."""
+    return {
+        "min_qty": float(item["lotSizeFilter"]["minOrderQty"]),
+        "max_order_qty": float(item["lotSizeFilter"]["maxOrderQty"]),
+        "qty_step": float(item["lotSizeFilter"]["qtyStep"]),
+        "min_notional": float(item["lotSizeFilter"]["minNotionalValue"]),
+        "tick_size": float(item["priceFilter"]["tickSize"]),
+        "max_leverage": float(item["leverageFilter"]["maxLeverage"]),
+    }
+
+
+# ---------------- L1 (IN-PROCESS) ---------------- #
+def _l1_get(symbol: str):
+    entry = _symbol_l1.get(symbol)
+    if entry is None:
+        return None
+    expires_at, spec = entry
+    if expires_at < time.monotonic():
+        del _symbol_l1[symbol]
+        return None
+    _symbol_l1.move_to_end(symbol)
+    return spec
+
+
+def _l1_set(symbol: str, spec: dict):
+    _symbol_l1[symbol] = (time.monotonic() + SYMBOL_L1_TTL, spec)
+    _symbol_l1.move_to_end(symbol)
+    while len(_symbol_l1) > SYMBOL_L1_MAX_SIZE:
+        _symbol_l1.popitem(last=False)
+
+
+def invalidate_symbol_l1(symbols=None):
+    """Drop given symbols (or everything) from the in-process tier."""
+    if symbols is None:
+        _symbol_l1.clear()
+        return
+    for symbol in symbols:
+        _symbol_l1.pop(symbol, None)
+
+
+# ---------------- L3 (DISK SNAPSHOT) ---------------- #
+def _read_snapshot_instruments():
+    """Return (raw instruments, source, fetch time) from the disk snapshot."""
+    if not os.path.exists(SYMBOL_SNAPSHOT_FILE):
+        return [], None, 0.0
+    try:
+        with open(SYMBOL_SNAPSHOT_FILE, "r", encoding="utf-8") as f:
+            response = json.load(f)
+        instruments = response["result"]["list"]
+        fetched_at = response.get("time", 0) / 1000
+        print(
+            f"[CACHE] Loaded {len(instruments)} symbols from "
+            f"{os.path.basename(SYMBOL_SNAPSHOT_FILE)} "
+            f"({(time.time() - fetched_at) / 3600:.1f}h old)"
+        )
+        return instruments, "snapshot", fetched_at
+    except Exception as e:
+        print(f"[CACHE][WARN] Failed to read snapshot {SYMBOL_SNAPSHOT_FILE}: {e}")
+    return [], None, 0.0
+
+
+def _index_instruments(instruments: list):
+    """Index raw instruments by symbol and build compact specs."""
+    raw_by_symbol = {}
+    specs = {}
+    for item in instruments:
+        try:
+            specs[item["symbol"]] = parse_symbol_spec(item)
+            raw_by_symbol[item["symbol"]] = item
+        except (KeyError, ValueError):
+            continue
+    return raw_by_symbol, specs
+
+
+def _ensure_l3_loaded():
+    global _symbol_l3, _instrument_raw, _l3_source, _l3_time
+    if _symbol_l3 is None:
+        instruments, _l3_source, _l3_time = _read_snapshot_instruments()
+        _instrument_raw, _symbol_l3 = _index_instruments(instruments)
+
+
+def l3_age() -> float | None:
+    """Seconds since the L3 listing was fetched (None: no listing loaded)."""
+    if not _l3_source:
+        return None
+    return time.time() - _l3_time
+
+
+def _l3_get(symbol: str):
+    _ensure_l3_loaded()
+    spec = _symbol_l3.get(symbol)
+    if spec is not None and l3_age() > SYMBOL_SNAPSHOT_MAX_AGE:
+        symbol_cache_stats["l3_stale"] += 1
+        return None
+    return spec
+
+
+def _write_snapshot_file(instruments: list, fetched_at: float):
+    """Write raw instruments in the Bybit response shape (atomic replace)."""
+    tmp_path = SYMBOL_SNAPSHOT_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "retCode": 0,
+                "retMsg": "OK",
+                "result": {"category": "linear", "list": instruments},
+                "time": int(fetched_at * 1000),
+            },
+            f,
+        )
+    os.replace(tmp_path, SYMBOL_SNAPSHOT_FILE)
+
+
+# ---------------- CHANGE DETECTION ---------------- #
+def diff_instruments(old: dict, new: dict) -> list:
+    """
+    Compare two {symbol: raw instrument} maps.
+
+    Returns events: {"type": "listed" | "delisted" | "changed", "symbol", "fields"}
+    where fields lists the WATCHED_INSTRUMENT_FIELDS that differ.
+    """
+    events = []
+    for symbol, item in new.items():
+        previous = old.get(symbol)
+        if previous is None:
+            events.append({"type": "listed", "symbol": symbol, "fields": []})
+            continue
+        fields = [
+            field
+            for field in WATCHED_INSTRUMENT_FIELDS
+            if previous.get(field) != item.get(field)
+        ]
+        if fields:
+            events.append({"type": "changed", "symbol": symbol, "fields": fields})
+
+    for symbol in old.keys() - new.keys():
+        events.append({"type": "delisted", "symbol": symbol, "fields": []})
+    return events
+
+
+def subscribe_instrument_changes(maxsize: int = 1000) -> asyncio.Queue:
+    """Return a queue receiving every instrument change event from now on."""
+    queue = asyncio.Queue(maxsize=maxsize)
+    _instrument_subscribers.append(queue)
+    return queue
+
+
+def _emit_instrument_event(event: dict):
+    recent_instrument_events.append(event)
+    for queue in _instrument_subscribers:
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            print("[CACHE][WARN] Instrument event dropped for a slow subscriber")
+
+
+async def _publish_symbol_specs(specs: dict, events: list, previous_count: int):
+    """Push only changed symbols to the Redis hash (full publish if out of sync)."""
+    hash_size = await redis.hlen(SYMBOL_SPECS_KEY)
+    async with redis.pipeline(transaction=True) as pipe:
+        if hash_size == 0 or hash_size != previous_count:
+            # Hash missing or drifted (Redis restart, single-symbol fallbacks)
+            pipe.delete(SYMBOL_SPECS_KEY)
+            pipe.hset(
+                SYMBOL_SPECS_KEY,
+                mapping={symbol: json.dumps(spec) for symbol, spec in specs.items()},
+            )
+            published = len(specs)
+        else:
+            for event in events:
+                if event["type"] == "delisted":
+                    pipe.hdel(SYMBOL_SPECS_KEY, event["symbol"])
+                else:
+                    pipe.hset(
+                        SYMBOL_SPECS_KEY,
+                        event["symbol"],
+                        json.dumps(specs[event["symbol"]]),
+                    )
+            published = len(events)
+        for event in events:
+            pipe.publish(SYMBOL_CHANGES_CHANNEL, json.dumps(event))
+        await pipe.execute()
+    return published
+
+
 # ---------------- SYMBOL CACHE (ALL) ---------------- #
 async def refresh_symbol_info():
     """
-    Fetch ALL linear symbols from Bybit (with pagination handled internally)
-    and cache them in Redis.
+    Fetch ALL linear symbols from Bybit, diff them against the cached set and
+    publish / invalidate only symbols whose filters changed, or that were
+    listed or delisted. Parsing and diffing run off the event loop.
     """
+    global _symbol_l3, _instrument_raw, _l3_source, _l3_time
     try:
-        instruments = get_all_linear_instruments()
-
-        symbols_data = {}
-        for item in instruments:
-            symbols_data[item["symbol"]] = {
-                "min_qty": float(item["lotSizeFilter"]["minOrderQty"]),
-                "max_order_qty": float(item["lotSizeFilter"]["maxOrderQty"]),
-                "qty_step": float(item["lotSizeFilter"]["qtyStep"]),
-                "min_notional": float(item["lotSizeFilter"]["minNotionalValue"]),
-                "tick_size": float(item["priceFilter"]["tickSize"]),
-                "max_leverage": float(item["leverageFilter"]["maxLeverage"]),
-            }
+        fetched_at = time.time()
+        instruments = await get_all_linear_instruments()
+
+        await asyncio.to_thread(_ensure_l3_loaded)
+        baseline = _instrument_raw or {}
+        # Without a snapshot every symbol would look newly listed
+        emit_events = _l3_source == "snapshot" or _l3_source == "refresh"
+
+        new_raw, new_specs = await asyncio.to_thread(_index_instruments, instruments)
+        events = await asyncio.to_thread(diff_instruments, baseline, new_raw)
+
+        _instrument_raw, _symbol_l3, _l3_source = new_raw, new_specs, "refresh"
+        _l3_time = fetched_at
+        invalidate_symbol_l1(event["symbol"] for event in events)
+
         if REDIS_AVAILABLE:
-            await set_cache(SYMBOL_INFO_KEY, symbols_data, expire=3600)
-            print(f"[CACHE] {len(symbols_data)} symbols cached")
+            published = await _publish_symbol_specs(new_specs, events, len(baseline))
+            print(f"[CACHE] {len(new_specs)} symbols cached ({published} published)")
         else:
             print(f"[CACHE]][WARN] cached is disabled! for get_all_linear_instruments!")
 
-    except Exception as e:
-        print(f"[CACHE][ERROR] refresh_symbol_info failed: {e}")
+        # L3 snapshot for cold starts without Redis or network; rewritten
+        # even when unchanged so its time says when it was last confirmed
+        await asyncio.to_thread(_write_snapshot_file, instruments, fetched_at)
 
+        if emit_events:
+            for event in events:
+                _emit_instrument_event(event)
+        if events:
+            print(f"[CACHE] Instrument changes: {len(events)}")
 
-# ---------------- TRANSACTION LOG CACHE ---------------- #
-async def refresh_transaction_log(limit=50):
-    try:
-        res = get_transaction_log(limit=limit)
-        if REDIS_AVAILABLE:
-            await set_cache(
-                TRANSACTION_LOG_KEY,
-                res.get("result", {}),
-                expire=3600,
-            )
-            print("[CACHE] Transaction log cached")
-        else:
-            print("[CACHE][WARN] cached is disabled!")
     except Exception as e:
-        print(f"[CACHE][ERROR] refresh_transaction_log failed: {e}")
+        print(f"[CACHE][ERROR] refresh_symbol_info failed: {e}")
 
 
 # ---------------- PERIODIC REFRESH ---------------- #
-async def periodic_refresh(interval_seconds=3600 * 10):
+async def load_symbol_snapshot():
+    """Load the disk snapshot (L3) off the event loop; no network, no Redis."""
+    await asyncio.to_thread(_ensure_l3_loaded)
+    return len(_symbol_l3)
+
+
+async def periodic_refresh(interval_seconds=3600 * 10, warmup: bool = True):
     """
-    - Warmup cache on startup
+    - Warmup cache on startup (skipped with warmup=False when the startup
+      orchestrator already did it)
     - Refresh periodically
     """
-    await refresh_symbol_info()
-    await refresh_transaction_log()
+    if warmup:
+        await refresh_symbol_info()
 
-    if REDIS_AVAILABLE:
-        while True:
-            await asyncio.sleep(interval_seconds)
-            await refresh_symbol_info()
-            await refresh_transaction_log()
-    else:
-        print("[CACHE][WARN] cached is disabled in periodic_refresh")
+    # Symbol refresh is useful without Redis too (L1 / disk snapshot)
+    while True:
+        await asyncio.sleep(interval_seconds)
+        await refresh_symbol_info()
 
 
 # ---------------- SYMBOL HELPER ---------------- #
 async def get_symbol_info(symbol: str):
     """
-    Read symbol info from Redis.
-    Fallback to API only if Redis is empty or symbol missing.
+    Read symbol info through the cache tiers:
+    L1 in-process map -> L2 Redis hash (HGET) -> L3 disk snapshot (while
+    younger than SYMBOL_SNAPSHOT_MAX_AGE) -> API
     """
+    spec = _l1_get(symbol)
+    if spec is not None:
+        symbol_cache_stats["l1_hit"] += 1
+        return spec
+    symbol_cache_stats["l1_miss"] += 1
+
     if REDIS_AVAILABLE:
-        symbols = await get_cache(SYMBOL_INFO_KEY)
-        if symbols and symbol in symbols:
-            return symbols[symbol]
+        try:
+            raw = await redis.hget(SYMBOL_SPECS_KEY, symbol)
+        except Exception as e:
+            print(f"[CACHE][WARN] HGET {symbol} failed: {e}")
+            raw = None
+        if raw:
+            symbol_cache_stats["l2_hit"] += 1
+            spec = json.loads(raw)
+            _l1_set(symbol, spec)
+            return spec
+        symbol_cache_stats["l2_miss"] += 1
 
-    # ---- fallback (rare) ----
-    print(f"[CACHE][MISS] {symbol}, fetching from API")
-    item = get_single_instrument(symbol)
+    spec = _l3_get(symbol)
+    if spec is not None:
+        symbol_cache_stats["l3_hit"] += 1
+        _l1_set(symbol, spec)
+        return spec
+    symbol_cache_stats["l3_miss"] += 1
 
-    info = {
-        "min_qty": float(item["lotSizeFilter"]["minOrderQty"]),
-        "max_order_qty": float(item["lotSizeFilter"]["maxOrderQty"]),
-        "qty_step": float(item["lotSizeFilter"]["qtyStep"]),
-        "min_notional": float(item["lotSizeFilter"]["minNotionalValue"]),
-        "tick_size": float(item["priceFilter"]["tickSize"]),
-        "max_leverage": float(item["leverageFilter"]["maxLeverage"]),
-    }
+    # ---- fallback (rare: new listing, or no snapshot yet) ----
+    print(f"[CACHE][MISS] {symbol}, fetching from API")
+    symbol_cache_stats["api_fetch"] += 1
+    item = await get_single_instrument(symbol)
+    spec = parse_symbol_spec(item)
 
-    # Update full cache async (non-blocking)
+    _l1_set(symbol, spec)
+    if _symbol_l3 is not None:
+        _symbol_l3[symbol] = spec
+        _instrument_raw[symbol] = item
     if REDIS_AVAILABLE:
-        asyncio.create_task(refresh_symbol_info())
-    return info
+        try:
+            await redis.hset(SYMBOL_SPECS_KEY, symbol, json.dumps(spec))
+        except Exception as e:
+            print(f"[CACHE][WARN] HSET {symbol} failed: {e}")
+    return spec
+
+
+def format_symbol_cache_stats() -> str:
+    """Per-tier hit/miss counters and the L3 snapshot age, for Telegram."""
+    s = symbol_cache_stats
+    age = l3_age()
+    lines = [
+        f"L1  hit {s['l1_hit']:>6}  miss {s['l1_miss']:>6}",
+        f"L2  hit {s['l2_hit']:>6}  miss {s['l2_miss']:>6}"
+        + ("" if REDIS_AVAILABLE else "  (Redis off)"),
+        f"L3  hit {s['l3_hit']:>6}  miss {s['l3_miss']:>6}  stale {s['l3_stale']}",
+        f"API fetches {s['api_fetch']}",
+        "L3 age " + ("-" if age is None else f"{age / 3600:.1f}h")
+        + f" (max {SYMBOL_SNAPSHOT_MAX_AGE / 3600:.0f}h)",
+    ]
+    return "\n".join(lines)
@@ -5,49 +5,195 @@ Tracks capital usage in open positions and rejected orders due to insufficient b
 
 import json
 import os
-from datetime import datetime, timedelta
-from zoneinfo import ZoneInfo
+from datetime import datetime
 from threading import Lock
-from collections import defaultdict
+from zoneinfo import ZoneInfo
 from config import FIXED_MARGIN_USDT, MAX_LOSS_USDT, TARGET_PROFIT_USDT
+from capital_rollups import (
+    PERIODS,
+    PeriodRollup,
+    period_bounds,
+    period_key,
+    sweep_concurrency,
+)
+import db
 
-# Lock for thread-safe file operations
-_capital_file_lock = Lock()
+# Legacy whole-file store, imported into the database once
 CAPITAL_DATA_FILE = os.path.join(
     os.path.dirname(os.path.dirname(__file__)), "capital_tracking.json"
 )
+_MIGRATION_KEY = "capital_tracking_json_migrated"
+TIMEZONE = ZoneInfo("Asia/Tehran")
+
+# Incremental rollups for the current day/week/month. Built from the database
+# at startup, then updated by the writer thread on every open/close/reject.
+_rollup_lock = Lock()
+_rollups: dict = {}  # period -> PeriodRollup
+_rollup_state = {
+    "current_capital": 0.0,  # capital in open positions right now
+    "open_positions": 0,
+    "total_rejected_orders": 0,
+    "historical_max": 0.0,  # max concurrent capital over all stored weeks/months
+}
 
 # Per trade capital will be imported from config
 
 
-def load_capital_data():
-    """Load capital tracking data from JSON file."""
+# ---------------- STORAGE ---------------- #
+def _init_schema(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS capital_positions (
+            id INTEGER PRIMARY KEY,
+            symbol TEXT NOT NULL,
+            capital_used REAL NOT NULL,
+            opened_at TEXT NOT NULL,
+            opened_ts REAL NOT NULL,
+            closed_at TEXT,
+            closed_ts REAL,
+            duration_seconds REAL
+        )
+        """)
+    # Open positions by symbol (partial index: only rows still open)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_capital_positions_open "
+        "ON capital_positions (symbol, opened_ts) WHERE closed_ts IS NULL"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_capital_positions_opened "
+        "ON capital_positions (opened_ts)"
+    )
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS capital_rejected_orders (
+            id INTEGER PRIMARY KEY,
+            symbol TEXT NOT NULL,
+            reason TEXT,
+            capital_needed REAL,
+            rejected_at TEXT NOT NULL,
+            rejected_ts REAL NOT NULL
+        )
+        """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_capital_rejected_ts "
+        "ON capital_rejected_orders (rejected_ts)"
+    )
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS capital_stats (
+            period TEXT NOT NULL,
+            period_key TEXT NOT NULL,
+            stats TEXT NOT NULL,
+            PRIMARY KEY (period, period_key)
+        )
+        """)
+    _migrate_json_file(conn)
+    _build_rollups(conn)
+
+
+def _migrate_json_file(conn):
+    """One-time import of capital_tracking.json (the file is left untouched)."""
+    if db.get_meta(conn, _MIGRATION_KEY) or not os.path.exists(CAPITAL_DATA_FILE):
+        return
     try:
-        with _capital_file_lock:
-            if os.path.exists(CAPITAL_DATA_FILE):
-                with open(CAPITAL_DATA_FILE, "r", encoding="utf-8") as f:
-                    return json.load(f)
+        with open(CAPITAL_DATA_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
     except Exception as e:
-        print(f"[CAPITAL_TRACKER][ERROR] Failed to load data: {e}")
+        print(f"[CAPITAL_TRACKER][ERROR] Failed to read {CAPITAL_DATA_FILE}: {e}")
+        return
+
+    for pos in data.get("positions", []):
+        opened_at = datetime.fromisoformat(pos["opened_at"])
+        closed_at = (
+            datetime.fromisoformat(pos["closed_at"]) if pos.get("closed_at") else None
+        )
+        conn.execute(
+            "INSERT INTO capital_positions (symbol, capital_used, opened_at, "
+            "opened_ts, closed_at, closed_ts, duration_seconds) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                pos["symbol"],
+                pos["capital_used"],
+                pos["opened_at"],
+                opened_at.timestamp(),
+                pos.get("closed_at"),
+                closed_at.timestamp() if closed_at else None,
+                pos.get("duration_seconds"),
+            ),
+        )
+    for order in data.get("rejected_orders", []):
+        conn.execute(
+            "INSERT INTO capital_rejected_orders (symbol, reason, capital_needed, "
+            "rejected_at, rejected_ts) VALUES (?, ?, ?, ?, ?)",
+            (
+                order["symbol"],
+                order.get("reason"),
+                order.get("capital_needed"),
+                order["rejected_at"],
+                datetime.fromisoformat(order["rejected_at"]).timestamp(),
+            ),
+        )
+    for period in ("daily", "weekly", "monthly"):
+        for key, stats in data.get(f"{period}_stats", {}).items():
+            conn.execute(
+                "INSERT OR REPLACE INTO capital_stats (period, period_key, stats) "
+                "VALUES (?, ?, ?)",
+                (period, key, json.dumps(stats)),
+            )
+    db.set_meta(conn, _MIGRATION_KEY, datetime.now().isoformat())
+    print(
+        f"[CAPITAL_TRACKER] Migrated {len(data.get('positions', []))} position(s) "
+        f"and {len(data.get('rejected_orders', []))} rejected order(s) from JSON"
+    )
+
+
+db.register_schema(_init_schema)
+
 
-    # Return default structure
+def _position_dict(row) -> dict:
     return {
-        "positions": [],  # List of position events
-        "rejected_orders": [],  # List of rejected orders
-        "daily_stats": {},  # Daily aggregated stats
-        "weekly_stats": {},  # Weekly aggregated stats
-        "monthly_stats": {},  # Monthly aggregated stats
+        "symbol": row["symbol"],
+        "capital_used": row["capital_used"],
+        "opened_at": row["opened_at"],
+        "closed_at": row["closed_at"],
+        "duration_seconds": row["duration_seconds"],
     }
 
 
-def save_capital_data(data):
-    """Save capital tracking data to JSON file."""
-    try:
-        with _capital_file_lock:
-            with open(CAPITAL_DATA_FILE, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        print(f"[CAPITAL_TRACKER][ERROR] Failed to save data: {e}")
+def get_open_positions() -> list:
+    """Positions not closed yet (served by the partial open-position index)."""
+    rows = db.query(
+        "SELECT * FROM capital_positions WHERE closed_ts IS NULL ORDER BY opened_ts"
+    )
+    return [_position_dict(row) for row in rows]
+
+
+def get_positions_opened_between(start: datetime, end: datetime) -> list:
+    rows = db.query(
+        "SELECT * FROM capital_positions WHERE opened_ts BETWEEN ? AND ? "
+        "ORDER BY opened_ts",
+        (start.timestamp(), end.timestamp()),
+    )
+    return [_position_dict(row) for row in rows]
+
+
+def count_rejected_orders(
+    start: datetime | None = None, end: datetime | None = None
+) -> int:
+    if start is None or end is None:
+        row = db.query_one("SELECT COUNT(*) AS n FROM capital_rejected_orders")
+    else:
+        row = db.query_one(
+            "SELECT COUNT(*) AS n FROM capital_rejected_orders "
+            "WHERE rejected_ts BETWEEN ? AND ?",
+            (start.timestamp(), end.timestamp()),
+        )
+    return row["n"]
+
+
+def get_period_stats(period: str) -> dict:
+    """Stored aggregated stats for 'daily' / 'weekly' / 'monthly', by key."""
+    rows = db.query(
+        "SELECT period_key, stats FROM capital_stats WHERE period = ?", (period,)
+    )
+    return {row["period_key"]: json.loads(row["stats"]) for row in rows}
 
 
 def get_date_key(dt: datetime) -> str:
@@ -66,6 +212,137 @@ def get_month_key(dt: datetime) -> str:
     return dt.strftime("%Y-%m")
 
 
+# ---------------- ROLLUPS ---------------- #
+def _overlapping_intervals(conn, start_ts: float, end_ts: float) -> list:
+    """(opened_ts, closed_ts, capital) of positions open at any time in [start, end)."""
+    rows = conn.execute(
+        "SELECT opened_ts, closed_ts, capital_used FROM capital_positions "
+        "WHERE opened_ts < ? AND (closed_ts IS NULL OR closed_ts > ?)",
+        (end_ts, start_ts),
+    ).fetchall()
+    return [(row[0], row[1], row[2]) for row in rows]
+
+
+def _new_rollup(conn, period: str, now: datetime) -> PeriodRollup:
+    """Exact rollup for the period containing now, from the stored history."""
+    start, end = period_bounds(period, now)
+    now_ts = now.timestamp()
+    rollup = PeriodRollup(
+        period, period_key(period, now), start.timestamp(), end.timestamp()
+    )
+    swept = sweep_concurrency(
+        _overlapping_intervals(conn, rollup.start_ts, now_ts), rollup.start_ts, now_ts
+    )
+    rollup.max_concurrent_capital = swept["max_concurrent_capital"]
+    rollup.capital_seconds = swept["capital_seconds"]
+    rollup.last_ts = max(now_ts, rollup.start_ts)
+    rollup.total_positions = conn.execute(
+        "SELECT COUNT(*) FROM capital_positions WHERE opened_ts >= ? AND opened_ts < ?",
+        (rollup.start_ts, rollup.end_ts),
+    ).fetchone()[0]
+    rollup.total_rejected_orders = conn.execute(
+        "SELECT COUNT(*) FROM capital_rejected_orders "
+        "WHERE rejected_ts >= ? AND rejected_ts < ?",
+        (rollup.start_ts, rollup.end_ts),
+    ).fetchone()[0]
+    return rollup
+
+
+def _build_rollups(conn):
+    now = datetime.now(TIMEZONE)
+    current_capital, open_count = conn.execute(
+        "SELECT COALESCE(SUM(capital_used), 0), COUNT(*) FROM capital_positions "
+        "WHERE closed_ts IS NULL"
+    ).fetchone()
+    stored_max = conn.execute(
+        "SELECT COALESCE(MAX(json_extract(stats, '$.max_concurrent_capital')), 0) "
+        "FROM capital_stats WHERE period IN ('weekly', 'monthly')"
+    ).fetchone()[0]
+    rejected = conn.execute("SELECT COUNT(*) FROM capital_rejected_orders").fetchone()[
+        0
+    ]
+
+    with _rollup_lock:
+        _rollup_state["current_capital"] = current_capital
+        _rollup_state["open_positions"] = open_count
+        _rollup_state["total_rejected_orders"] = rejected
+        for period in PERIODS:
+            rollup = _new_rollup(conn, period, now)
+            rollup.observe(current_capital)
+            _rollups[period] = rollup
+        _rollup_state["historical_max"] = max(
+            [stored_max] + [r.max_concurrent_capital for r in _rollups.values()]
+        )
+
+
+def _persist_rollup(conn, rollup: PeriodRollup, now_ts: float = None):
+    conn.execute(
+        "INSERT OR REPLACE INTO capital_stats (period, period_key, stats) "
+        "VALUES (?, ?, ?)",
+        (rollup.period, rollup.key, json.dumps(rollup.stats(now_ts))),
+    )
+
+
+def _roll_over(now_ts: float) -> list:
+    """
+    Close rollups whose period ended before now_ts and start the next ones.
+    Caller holds _rollup_lock. Returns the finished rollups (to persist).
+    """
+    finished = []
+    current_capital = _rollup_state["current_capital"]
+    now = datetime.fromtimestamp(now_ts, TIMEZONE)
+    for period, rollup in list(_rollups.items()):
+        if now_ts < rollup.end_ts:
+            continue
+        rollup.advance(rollup.end_ts, current_capital)
+        finished.append(rollup)
+        start, end = period_bounds(period, now)
+        # Nothing opened/closed since the last event: capital carried over as-is
+        fresh = PeriodRollup(
+            period, period_key(period, now), start.timestamp(), end.timestamp()
+        )
+        fresh.observe(current_capital)
+        _rollups[period] = fresh
+    return finished
+
+
+def _apply_event(conn, ts: float, delta: float = 0.0, opened=False, rejected=False):
+    """Advance every rollup to ts, then apply the event (runs on the writer thread)."""
+    with _rollup_lock:
+        if not _rollups:
+            return
+        finished = _roll_over(ts)
+        for rollup in _rollups.values():
+            rollup.advance(ts, _rollup_state["current_capital"])
+
+        _rollup_state["current_capital"] = max(
+            0.0, _rollup_state["current_capital"] + delta
+        )
+        if delta > 0:
+            _rollup_state["open_positions"] += 1
+        elif delta < 0:
+            _rollup_state["open_positions"] = max(
+                0, _rollup_state["open_positions"] - 1
+            )
+        if rejected:
+            _rollup_state["total_rejected_orders"] += 1
+
+        for rollup in _rollups.values():
+            rollup.observe(_rollup_state["current_capital"])
+            if opened:
+                rollup.total_positions += 1
+            if rejected:
+                rollup.total_rejected_orders += 1
+            _rollup_state["historical_max"] = max(
+                _rollup_state["historical_max"], rollup.max_concurrent_capital
+            )
+        rollups = finished + list(_rollups.values())
+
+    for rollup in rollups:
+        _persist_rollup(conn, rollup, ts)
+
+
+# ---------------- TRACKING ---------------- #
 def track_position_opened(symbol: str, capital_used: float, margin: float = None):
     """Track when a position is opened.
 
@@ -74,22 +351,20 @@ def track_position_opened(symbol: str, capital_used: float, margin: float = None
         capital_used: Capital used for this position (USD)
         margin: Actual margin used (optional, for more accurate tracking)
     """
-    data = load_capital_data()
-    now = datetime.now(ZoneInfo("Asia/Tehran"))
+    now = datetime.now(TIMEZONE)
 
     # Use margin if provided, otherwise use capital_used
     actual_capital = margin if margin is not None else capital_used
 
-    position_event = {
-        "symbol": symbol,
-        "capital_used": actual_capital,
-        "opened_at": now.isoformat(),
-        "closed_at": None,
-        "duration_seconds": None,
-    }
+    def _open(conn):
+        conn.execute(
+            "INSERT INTO capital_positions (symbol, capital_used, opened_at, opened_ts) "
+            "VALUES (?, ?, ?, ?)",
+            (symbol, actual_capital, now.isoformat(), now.timestamp()),
+        )
+        _apply_event(conn, now.timestamp(), delta=actual_capital, opened=True)
 
-    data["positions"].append(position_event)
-    save_capital_data(data)
+    db.submit_write(_open)
 
     print(
         f"[CAPITAL_TRACKER] Position opened: {symbol}, Capital: ${actual_capital:.2f}"
@@ -98,26 +373,31 @@ def track_position_opened(symbol: str, capital_used: float, margin: float = None
 
 def track_position_closed(symbol: str):
     """Track when a position is closed."""
-    data = load_capital_data()
-    now = datetime.now(ZoneInfo("Asia/Tehran"))
-
-    # Find the most recent open position for this symbol
-    for pos in reversed(data["positions"]):
-        if pos["symbol"] == symbol and pos["closed_at"] is None:
-            pos["closed_at"] = now.isoformat()
-            opened_at = datetime.fromisoformat(pos["opened_at"])
-            pos["duration_seconds"] = (now - opened_at).total_seconds()
-            save_capital_data(data)
+    now = datetime.now(TIMEZONE)
+
+    def _close(conn):
+        # Most recent open position for this symbol (open-position index)
+        row = conn.execute(
+            "UPDATE capital_positions SET closed_at = ?, closed_ts = ?, "
+            "duration_seconds = ? - opened_ts "
+            "WHERE id = (SELECT id FROM capital_positions "
+            "WHERE symbol = ? AND closed_ts IS NULL "
+            "ORDER BY opened_ts DESC LIMIT 1) "
+            "RETURNING capital_used",
+            (now.isoformat(), now.timestamp(), now.timestamp(), symbol),
+        ).fetchone()
+        if row:
+            _apply_event(conn, now.timestamp(), delta=-row[0])
             print(f"[CAPITAL_TRACKER] Position closed: {symbol}")
-            return
+        else:
+            print(f"[CAPITAL_TRACKER][WARN] No open position found for {symbol}")
 
-    print(f"[CAPITAL_TRACKER][WARN] No open position found for {symbol}")
+    db.submit_write(_close)
 
 
 def track_rejected_order(symbol: str, reason: str, capital_needed: float):
     """Track when an order is rejected due to insufficient balance."""
-    data = load_capital_data()
-    now = datetime.now(ZoneInfo("Asia/Tehran"))
+    now = datetime.now(TIMEZONE)
 
     # Check if rejection is due to insufficient balance
     insufficient_keywords = [
@@ -132,172 +412,92 @@ def track_rejected_order(symbol: str, reason: str, capital_needed: float):
     )
 
     if is_insufficient:
-        rejected_order = {
-            "symbol": symbol,
-            "reason": reason,
-            "capital_needed": capital_needed,
-            "rejected_at": now.isoformat(),
-        }
-
-        data["rejected_orders"].append(rejected_order)
-        save_capital_data(data)
-        print(
-            f"[CAPITAL_TRACKER] Rejected order: {symbol}, Reason: {reason}, Capital needed: ${capital_needed:.2f}"
-        )
 
+        def _reject(conn):
+            conn.execute(
+                "INSERT INTO capital_rejected_orders (symbol, reason, capital_needed, "
+                "rejected_at, rejected_ts) VALUES (?, ?, ?, ?, ?)",
+                (symbol, reason, capital_needed, now.isoformat(), now.timestamp()),
+            )
+            _apply_event(conn, now.timestamp(), rejected=True)
 
-def calculate_concurrent_capital(
-    positions: list, target_time: datetime = None
-) -> float:
-    """Calculate maximum concurrent capital usage at a given time."""
-    if target_time is None:
-        target_time = datetime.now(ZoneInfo("Asia/Tehran"))
-
-    if not positions:
-        return 0.0
-
-    # Filter positions that were open at target_time
-    concurrent_capital = 0.0
-    for pos in positions:
-        opened_at = datetime.fromisoformat(pos["opened_at"])
-        closed_at = (
-            datetime.fromisoformat(pos["closed_at"])
-            if pos["closed_at"]
-            else target_time
+        db.submit_write(_reject)
+        print(
+            f"[CAPITAL_TRACKER] Rejected order: {symbol}, Reason: {reason}, Capital needed: ${capital_needed:.2f}"
         )
 
-        # Check if position was open at target_time
-        if opened_at <= target_time <= closed_at:
-            concurrent_capital += pos["capital_used"]
-
-    return concurrent_capital
-
 
-def calculate_stats_for_period(
-    positions: list, rejected_orders: list, start_date: datetime, end_date: datetime
-) -> dict:
-    """Calculate statistics for a given period."""
-    stats = {
-        "total_positions": 0,
-        "total_rejected_orders": 0,
-        "max_concurrent_capital": 0.0,
-        "avg_concurrent_capital": 0.0,
-        "total_capital_hours": 0.0,  # Sum of capital * hours for all positions
+# ---------------- STATISTICS ---------------- #
+def calculate_stats_for_period(start_date: datetime, end_date: datetime) -> dict:
+    """
+    Exact statistics for an arbitrary period (sweep line over the positions
+    overlapping it). Reads the database: blocking.
+    """
+    start_ts, end_ts = start_date.timestamp(), end_date.timestamp()
+    rows = db.query(
+        "SELECT opened_ts, closed_ts, capital_used FROM capital_positions "
+        "WHERE opened_ts < ? AND (closed_ts IS NULL OR closed_ts > ?)",
+        (end_ts, start_ts),
+    )
+    swept = sweep_concurrency(
+        [(row[0], row[1], row[2]) for row in rows], start_ts, end_ts
+    )
+    return {
+        "total_positions": len(get_positions_opened_between(start_date, end_date)),
+        "total_rejected_orders": count_rejected_orders(start_date, end_date),
+        "max_concurrent_capital": swept["max_concurrent_capital"],
+        "avg_concurrent_capital": swept["avg_concurrent_capital"],
+        "total_capital_hours": swept["capital_seconds"] / 3600,
     }
 
-    # Filter positions in period
-    period_positions = []
-    for pos in positions:
-        opened_at = datetime.fromisoformat(pos["opened_at"])
-        if start_date <= opened_at <= end_date:
-            period_positions.append(pos)
-
-    stats["total_positions"] = len(period_positions)
-
-    # Filter rejected orders in period
-    period_rejected = []
-    for order in rejected_orders:
-        rejected_at = datetime.fromisoformat(order["rejected_at"])
-        if start_date <= rejected_at <= end_date:
-            period_rejected.append(order)
-
-    stats["total_rejected_orders"] = len(period_rejected)
-
-    # Calculate max concurrent capital
-    # Sample every hour in the period
-    max_concurrent = 0.0
-    total_concurrent = 0.0
-    sample_count = 0
-
-    current_time = start_date
-    while current_time <= end_date:
-        concurrent = calculate_concurrent_capital(period_positions, current_time)
-        max_concurrent = max(max_concurrent, concurrent)
-        total_concurrent += concurrent
-        sample_count += 1
-        current_time += timedelta(hours=1)
-
-    stats["max_concurrent_capital"] = max_concurrent
-    if sample_count > 0:
-        stats["avg_concurrent_capital"] = total_concurrent / sample_count
-
-    # Calculate total capital hours (sum of capital * duration for each position)
-    total_capital_hours = 0.0
-    for pos in period_positions:
-        if pos["duration_seconds"]:
-            hours = pos["duration_seconds"] / 3600
-            total_capital_hours += pos["capital_used"] * hours
-
-    stats["total_capital_hours"] = total_capital_hours
-
-    return stats
-
-
-def update_aggregated_stats():
-    """Update daily, weekly, and monthly aggregated statistics."""
-    data = load_capital_data()
-    now = datetime.now(ZoneInfo("Asia/Tehran"))
-
-    # Calculate stats for today
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    today_end = now
-    today_key = get_date_key(now)
-    data["daily_stats"][today_key] = calculate_stats_for_period(
-        data["positions"], data["rejected_orders"], today_start, today_end
-    )
 
-    # Calculate stats for this week
-    week_start = today_start - timedelta(days=now.weekday())
-    week_key = get_week_key(now)
-    data["weekly_stats"][week_key] = calculate_stats_for_period(
-        data["positions"], data["rejected_orders"], week_start, today_end
-    )
+def update_aggregated_stats() -> dict:
+    """
+    Bring the daily, weekly and monthly rollups up to now (O(1), no scans).
+    Returns {"daily": stats, "weekly": stats, "monthly": stats}; the stored
+    copies are written in the background.
+    """
+    db.init_db()
+    now_ts = datetime.now(TIMEZONE).timestamp()
+    with _rollup_lock:
+        finished = _roll_over(now_ts)
+        for rollup in _rollups.values():
+            rollup.advance(now_ts, _rollup_state["current_capital"])
+        results = {period: r.stats(now_ts) for period, r in _rollups.items()}
+        rollups = finished + list(_rollups.values())
 
-    # Calculate stats for this month
-    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    month_key = get_month_key(now)
-    data["monthly_stats"][month_key] = calculate_stats_for_period(
-        data["positions"], data["rejected_orders"], month_start, today_end
-    )
+    def _persist(conn):
+        for rollup in rollups:
+            _persist_rollup(conn, rollup, now_ts)
 
-    save_capital_data(data)
+    db.submit_write(_persist)
+    return results
 
 
 def get_capital_report() -> str:
-    """Generate a comprehensive capital usage report."""
-    data = load_capital_data()
-    now = datetime.now(ZoneInfo("Asia/Tehran"))
+    """
+    Generate a comprehensive capital usage report.
+    Served from the in-memory rollups, independent of history length.
+    """
+    now = datetime.now(TIMEZONE)
 
     # Update stats first
-    update_aggregated_stats()
+    current = update_aggregated_stats()
 
     # Get current stats
     today_key = get_date_key(now)
     week_key = get_week_key(now)
     month_key = get_month_key(now)
 
-    today_stats = data["daily_stats"].get(today_key, {})
-    week_stats = data["weekly_stats"].get(week_key, {})
-    month_stats = data["monthly_stats"].get(month_key, {})
+    today_stats = current["daily"]
+    week_stats = current["weekly"]
+    month_stats = current["monthly"]
 
-    # Calculate current concurrent capital
-    current_concurrent = calculate_concurrent_capital(data["positions"])
-
-    # Calculate recommendation based on historical data
-    all_weekly_max = [
-        stats.get("max_concurrent_capital", 0)
-        for stats in data["weekly_stats"].values()
-    ]
-    all_monthly_max = [
-        stats.get("max_concurrent_capital", 0)
-        for stats in data["monthly_stats"].values()
-    ]
-
-    historical_max = max(
-        all_weekly_max + all_monthly_max + [current_concurrent]
-        if (all_weekly_max or all_monthly_max)
-        else [current_concurrent]
-    )
+    with _rollup_lock:
+        current_concurrent = _rollup_state["current_capital"]
+        open_count = _rollup_state["open_positions"]
+        total_rejected = _rollup_state["total_rejected_orders"]
+        historical_max = max(_rollup_state["historical_max"], current_concurrent)
 
     report = (
         f"💰 **Capital Usage Report**\n\n"
@@ -307,7 +507,7 @@ def get_capital_report() -> str:
         f"🔴 **MAX_LOSS_USDT:** ${MAX_LOSS_USDT:.2f}\n"
         f"🎯 **TARGET_PROFIT_USDT:** ${TARGET_PROFIT_USDT:.2f}\n\n"
         f"📊 **Current Status:**\n"
-        f"   • Active Positions: {len([p for p in data['positions'] if p['closed_at'] is None])}\n"
+        f"   • Active Positions: {open_count}\n"
         f"   • Current Capital in Use: ${current_concurrent:.2f}\n\n"
         f"📅 **Today ({today_key}):**\n"
         f"   • Positions Opened: {today_stats.get('total_positions', 0)}\n"
@@ -327,7 +527,7 @@ def get_capital_report() -> str:
         f"💡 **Recommendation:**\n"
         f"   • Historical Max Capital: ${historical_max:.2f}\n"
         f"   • Recommended Wallet Balance: ${historical_max * 1.2:.2f} (+20% buffer)\n"
-        f"   • Total Rejected Orders (All Time): {len(data['rejected_orders'])}\n"
+        f"   • Total Rejected Orders (All Time): {total_rejected}\n"
         f"```\n"
         f"--------------------------------\n"
     )
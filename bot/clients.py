@@ -1,34 +1,78 @@
-from pybit.unified_trading import HTTP
+"""
+Clients Module
+Shared Bybit / Telegram clients, created lazily on first attribute access
+(module __getattr__) so importing a module that needs a client costs nothing
+until the client is actually used. Use `clients.bybitClient` at call time, or
+`from clients import bybitClient` inside the function that needs it.
+"""
+
 from config import (
     IS_DEMO,
     SELECTED_API_KEY,
     SELECTED_API_SECRET,
     BYBIT_API_KEY,
     BYBIT_API_SECRET,
+    TELEGRAM_API_ID,
+    TELEGRAM_API_HASH,
 )
-import asyncio
-from telethon import TelegramClient
-from config import TELEGRAM_API_ID, TELEGRAM_API_HASH
 
 
 # ---------------- BYBIT CLIENT (DEMO) ---------------- #
 # Used for trading operations (place orders, set leverage, etc.)
-bybitClient = HTTP(
-    demo=IS_DEMO,
-    api_key=SELECTED_API_KEY,
-    api_secret=SELECTED_API_SECRET,
-)
+# Async client: requests never block the event loop
+def _bybit_client():
+    from bybit_http import AsyncBybitHTTP
+
+    return AsyncBybitHTTP(
+        demo=IS_DEMO,
+        api_key=SELECTED_API_KEY,
+        api_secret=SELECTED_API_SECRET,
+    )
+
 
 # ---------------- BYBIT CLIENT (LIVE) ---------------- #
 # Used for liquidity analysis only (order book, ticker, etc.)
 # This uses real market data even when trading in demo mode
-bybitClientLive = HTTP(
-    demo=False,  # Always use live for real market data
-    api_key=BYBIT_API_KEY,
-    api_secret=BYBIT_API_SECRET,
-)
+def _bybit_client_live():
+    from bybit_http import AsyncBybitHTTP
+
+    return AsyncBybitHTTP(
+        demo=False,  # Always use live for real market data
+        api_key=BYBIT_API_KEY,
+        api_secret=BYBIT_API_SECRET,
+    )
 
 
 # ---------------- TELEGRAM CLIENT ---------------- #
-telClient = TelegramClient("session_name", TELEGRAM_API_ID, TELEGRAM_API_HASH)
-telegram_queue = asyncio.Queue()
+def _telegram_client():
+    from telethon import TelegramClient
+
+    return TelegramClient("session_name", TELEGRAM_API_ID, TELEGRAM_API_HASH)
+
+
+_FACTORIES = {
+    "bybitClient": _bybit_client,
+    "bybitClientLive": _bybit_client_live,
+    "telClient": _telegram_client,
+}
+
+
+def __getattr__(name: str):
+    factory = _FACTORIES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    client = factory()
+    # Cache as a real module attribute: later lookups never reach __getattr__
+    globals()[name] = client
+    return client
+
+
+async def close_clients():
+    """Close the Bybit HTTP connection pools (only clients that were created)."""
+    for name in ("bybitClient", "bybitClientLive"):
+        client = globals().get(name)
+        if client is not None:
+            try:
+                await client.close()
+            except Exception as e:
+                print(f"[CLIENTS][WARN] Closing {name} failed: {e}")
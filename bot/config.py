@@ -1,16 +1,8 @@
 import os
-import asyncio
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# ---------------- Event Loop ---------------- #
-try:
-    main_loop = asyncio.get_running_loop()
-except RuntimeError:
-    main_loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(main_loop)
-
 # ---------------- MODE ---------------- #
 IS_DEMO = True
 
@@ -50,11 +42,18 @@ FIXED_MARGIN_USDT = 300
 MAX_LOSS_USDT = 30
 TARGET_PROFIT_USDT = 15
 
+# Symbols whose order books are always streamed (comma separated), on top of
+# open positions and recently signalled symbols
+MARKET_WATCHLIST = [
+    s.strip().upper()
+    for s in os.getenv("MARKET_WATCHLIST", "").split(",")
+    if s.strip()
+]
+
+# Number of sharded queue workers (signals/WS events are sharded by symbol)
+QUEUE_WORKERS = 4
+
 # ---------------- GLOBALS ---------------- #
 symbol_cache = {}
 open_positions = set()
 stats = {"total": 0, "win": 0, "loss": 0, "pnl": 0.0}
-# Track entry time for each position to check 30-minute rule
-position_entry_times = {}
-# Track TP prices for each position to identify which TP was triggered
-position_tp_prices = {}
@@ -0,0 +1,242 @@
+"""
+DB Module
+Shared embedded SQLite store (WAL mode) for the bot's local data.
+- Writes are queued to a single writer thread and committed in batches, so
+  callers (including the asyncio loop) never wait on disk I/O. Each job runs
+  in its own savepoint: a job that raises leaves nothing behind.
+- Reads use a per-thread connection; WAL lets them run alongside the writer.
+- Modules register their schema (and one-time migrations) with
+  register_schema(); it runs once, before the first read or write.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from typing import Callable, List, Optional
+
+# Database file in project root directory
+DB_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "bot_data.db")
+WRITE_QUEUE_MAX_SIZE = 10000
+WRITE_BATCH_MAX_SIZE = 500
+
+_schema_hooks: List[Callable[[sqlite3.Connection], None]] = []
+_init_lock = threading.Lock()
+_initialized = False
+_local = threading.local()
+# Items are (job, ticket): ticket is set once the batch commits; job is None
+# for flush() markers
+_write_queue: "queue.Queue[tuple]" = queue.Queue(maxsize=WRITE_QUEUE_MAX_SIZE)
+_writer_thread: Optional[threading.Thread] = None
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+# ---------------- SCHEMA ---------------- #
+def register_schema(hook: Callable[[sqlite3.Connection], None]):
+    """
+    Register a function that creates tables/indexes (CREATE ... IF NOT EXISTS)
+    and runs one-time migrations. Hooks run inside a transaction on first use;
+    hooks registered after that run immediately.
+    """
+    with _init_lock:
+        _schema_hooks.append(hook)
+        if _initialized:
+            _run_hook(hook)
+
+
+def _run_hook(hook: Callable[[sqlite3.Connection], None]):
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        hook(conn)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def _ensure_initialized():
+    global _initialized, _writer_thread
+    if _initialized:
+        return
+    with _init_lock:
+        if _initialized:
+            return
+        conn = _connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        conn.close()
+        for hook in _schema_hooks:
+            _run_hook(hook)
+        _writer_thread = threading.Thread(
+            target=_writer_loop, name="db-writer", daemon=True
+        )
+        _writer_thread.start()
+        _initialized = True
+
+
+def init_db():
+    """Create the schema and run migrations now (startup) instead of lazily."""
+    _ensure_initialized()
+
+
+def get_meta(conn: sqlite3.Connection, key: str) -> Optional[str]:
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row["value"] if row else None
+
+
+def set_meta(conn: sqlite3.Connection, key: str, value: str):
+    conn.execute(
+        "INSERT INTO meta (key, value) VALUES (?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (key, value),
+    )
+
+
+# ---------------- WRITES ---------------- #
+class WriteTicket:
+    """Outcome of a queued write job (or flush): wait() is True once committed."""
+
+    __slots__ = ("_done", "ok")
+
+    def __init__(self):
+        self._done = threading.Event()
+        self.ok = False
+
+    def _finish(self, ok: bool):
+        self.ok = ok
+        self._done.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the job's batch is committed or rolled back. False on
+        timeout, when the job raised, or when the commit failed.
+        """
+        return self._done.wait(timeout) and self.ok
+
+
+def submit_write(
+    job: Callable[[sqlite3.Connection], None], track: bool = False
+) -> Optional[WriteTicket]:
+    """
+    Queue a write job; it runs on the writer thread as job(conn) inside a
+    batched transaction. Each job is atomic: if it raises, all of its
+    statements are rolled back and the rest of the batch still commits.
+    Jobs run in submission order. Never blocks unless the queue is full
+    (then it waits, which only happens if the disk stalls).
+    With track=True a WriteTicket is returned to learn whether it committed.
+    """
+    _ensure_initialized()
+    ticket = WriteTicket() if track else None
+    _write_queue.put((job, ticket))
+    return ticket
+
+
+def execute_write(sql: str, params: tuple = ()):
+    """Queue a single write statement."""
+    submit_write(lambda conn: conn.execute(sql, params))
+
+
+def flush(timeout: Optional[float] = None) -> bool:
+    """
+    Wait until all queued writes are processed (blocking; use from threads).
+    True only if they all committed: False on timeout, or when a job failed or
+    a commit was rolled back since the previous flush.
+    """
+    _ensure_initialized()
+    ticket = WriteTicket()
+    _write_queue.put((None, ticket))
+    return ticket.wait(timeout)
+
+
+def _run_job(conn: sqlite3.Connection, job) -> bool:
+    """Run one job inside a savepoint so a failure leaves nothing behind."""
+    conn.execute("SAVEPOINT job")
+    try:
+        job(conn)
+    except Exception as e:
+        print(f"[DB][ERROR] Write job failed: {e}")
+        conn.execute("ROLLBACK TO job")
+        conn.execute("RELEASE job")
+        return False
+    conn.execute("RELEASE job")
+    return True
+
+
+def _writer_loop():
+    conn = _connect()
+    failed = False  # a job failed since the last flush marker
+    while True:
+        batch = [_write_queue.get()]
+        while len(batch) < WRITE_BATCH_MAX_SIZE:
+            try:
+                batch.append(_write_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        outcomes = []  # (ticket, ok before commit)
+        broken = False  # a savepoint could not be rolled back: drop the batch
+        unflushed = False  # jobs after the batch's last flush marker
+        conn.execute("BEGIN")
+        for job, ticket in batch:
+            if job is None:
+                # Flush marker: covers every job queued before it
+                outcomes.append((ticket, not failed))
+                failed = unflushed = False
+                continue
+            unflushed = True
+            try:
+                ok = _run_job(conn, job)
+            except Exception as e:
+                print(f"[DB][ERROR] Savepoint failed: {e}")
+                ok = False
+                broken = True
+            failed = failed or not ok
+            if ticket is not None:
+                outcomes.append((ticket, ok))
+        try:
+            if broken:
+                raise sqlite3.OperationalError("batch left in an unknown state")
+            conn.execute("COMMIT")
+            committed = True
+        except Exception as e:
+            print(f"[DB][ERROR] Commit failed: {e}")
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            committed = False
+            # Markers in this batch see the failed commit; later ones must too
+            failed = failed or unflushed
+        for ticket, ok in outcomes:
+            ticket._finish(ok and committed)
+
+
+# ---------------- READS ---------------- #
+def _reader() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _connect()
+        conn.execute("PRAGMA query_only=ON")
+        _local.conn = conn
+    return conn
+
+
+def query(sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+    """Run a read query (blocking; from async code use asyncio.to_thread)."""
+    _ensure_initialized()
+    return _reader().execute(sql, params).fetchall()
+
+
+def query_one(sql: str, params: tuple = ()) -> Optional[sqlite3.Row]:
+    _ensure_initialized()
+    return _reader().execute(sql, params).fetchone()
@@ -0,0 +1,129 @@
+"""
+Depth Walk Module
+Order book depth-walk engine for fill / slippage estimation.
+A book is parsed once into contiguous float arrays with prefix sums of size
+and notional, so walking to any quantity is a binary search instead of a
+per-level Python loop. Both sides and any number of candidate quantities
+are answered from the same parsed book.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Dict, Iterable, List, Sequence
+
+
+class DepthSide:
+    """
+    One side of the book, best level first.
+    For asks prices increase with depth, for bids they decrease.
+    """
+
+    def __init__(self, levels: Sequence, is_ask: bool):
+        self.is_ask = is_ask
+        self.prices = array("d", (float(price) for price, _ in levels))
+        sizes = array("d", (float(size) for _, size in levels))
+        self.cum_qty = array("d", accumulate(sizes))
+        self.cum_notional = array(
+            "d", accumulate(p * s for p, s in zip(self.prices, sizes))
+        )
+        # Monotonically increasing key for price searches on either side
+        self._search_prices = (
+            self.prices if is_ask else array("d", (-p for p in self.prices))
+        )
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    @property
+    def total_qty(self) -> float:
+        return self.cum_qty[-1] if self.cum_qty else 0.0
+
+    def slippage_percent(self, price: float, reference_price: float) -> float:
+        """Adverse price move vs reference (positive = worse than reference)."""
+        if reference_price <= 0:
+            return 0.0
+        move = price - reference_price if self.is_ask else reference_price - price
+        return move / reference_price * 100
+
+    def walk(self, qty: float, reference_price: float) -> Dict:
+        """
+        Take qty from the top of this side.
+
+        Returns fill percentage, VWAP of the filled part, levels consumed
+        (including a partially consumed last level) and the max slippage
+        against reference_price (never below 0).
+        """
+        n = len(self.prices)
+        if qty <= 0 or n == 0:
+            return {
+                "filled_qty": 0.0,
+                "fill_percentage": 0.0,
+                "avg_execution_price": reference_price,
+                "levels_used": 0,
+                "max_slippage_percent": 0.0,
+            }
+
+        # First level whose cumulative size covers qty
+        index = bisect_left(self.cum_qty, qty)
+        if index >= n:
+            filled = self.cum_qty[-1]
+            notional = self.cum_notional[-1]
+            last = n - 1
+        else:
+            filled = qty
+            before_qty = self.cum_qty[index - 1] if index else 0.0
+            before_notional = self.cum_notional[index - 1] if index else 0.0
+            notional = before_notional + (qty - before_qty) * self.prices[index]
+            last = index
+
+        return {
+            "filled_qty": filled,
+            "fill_percentage": filled / qty * 100,
+            "avg_execution_price": notional / filled if filled else reference_price,
+            "levels_used": last + 1,
+            "max_slippage_percent": max(
+                0.0, self.slippage_percent(self.prices[last], reference_price)
+            ),
+        }
+
+    def walk_many(
+        self, quantities: Iterable[float], reference_price: float
+    ) -> List[Dict]:
+        """walk() for several candidate sizes (O(k log n) for k sizes)."""
+        return [self.walk(qty, reference_price) for qty in quantities]
+
+    def max_qty_within_slippage(
+        self, max_slippage_percent: float, reference_price: float
+    ) -> float:
+        """Largest qty whose worst fill stays within max_slippage_percent."""
+        if not self.prices or reference_price <= 0:
+            return 0.0
+        factor = max_slippage_percent / 100
+        if self.is_ask:
+            limit = reference_price * (1 + factor)
+        else:
+            limit = -reference_price * (1 - factor)
+        count = bisect_right(self._search_prices, limit)
+        return self.cum_qty[count - 1] if count else 0.0
+
+
+class DepthBook:
+    """Both sides of an order book ({"bids": [...], "asks": [...]}), parsed once."""
+
+    def __init__(self, order_book: Dict):
+        self.bids = DepthSide(order_book.get("bids", []), is_ask=False)
+        self.asks = DepthSide(order_book.get("asks", []), is_ask=True)
+
+    def side_for(self, order_side: str) -> DepthSide:
+        """Liquidity a market order consumes: asks for Buy, bids for Sell."""
+        return self.asks if order_side == "Buy" else self.bids
+
+    def walk(self, order_side: str, qty: float, reference_price: float) -> Dict:
+        return self.side_for(order_side).walk(qty, reference_price)
+
+    def walk_both(self, qty: float, reference_price: float) -> Dict[str, Dict]:
+        return {
+            "Buy": self.asks.walk(qty, reference_price),
+            "Sell": self.bids.walk(qty, reference_price),
+        }
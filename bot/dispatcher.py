@@ -0,0 +1,168 @@
+"""
+Dispatcher Module
+Sharded worker pool for queue items. Items are routed to a shard by symbol, so
+events for one symbol stay in order while different symbols run in parallel.
+Inside a shard each symbol keeps a strict FIFO; priority only picks between
+symbols: a symbol with a new signal queued runs before symbols with only WS
+notifications, its own earlier events first.
+An optional gate (e.g. startup readiness) parks every item in its shard until
+it opens, without tying up a worker on any one item.
+"""
+
+import asyncio
+import itertools
+import time
+import zlib
+from collections import deque
+from typing import Awaitable, Callable, Dict
+
+# Lane priorities (lower runs first)
+PRIORITY_SIGNAL = 0
+PRIORITY_EVENT = 1
+
+
+class _Shard:
+    def __init__(self, index: int):
+        self.index = index
+        # Per-key FIFO of (priority, seq, enqueued_at, item): items of one key
+        # never overtake each other, whatever their lane
+        self.pending: Dict[str, deque] = {}
+        # One live (priority, seq, key) entry per key with pending items; the
+        # worker takes the best key. A key's priority is the best of its FIFO,
+        # so a queued signal pulls the events ahead of it forward with it.
+        self.ready: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self.ready_entry: Dict[str, tuple] = {}
+        self.processed = 0
+        self.errors = 0
+        self.current = None  # description of the item being handled
+        self.wait_times = deque(maxlen=200)  # seconds spent queued (recent items)
+        self.max_wait = 0.0
+
+    def schedule(self, key: str):
+        """(Re)publish the ready entry of key; superseded entries are skipped."""
+        fifo = self.pending.get(key)
+        if not fifo:
+            self.ready_entry.pop(key, None)
+            return
+        entry = (min(queued[0] for queued in fifo), fifo[0][1], key)
+        if self.ready_entry.get(key) != entry:
+            self.ready_entry[key] = entry
+            self.ready.put_nowait(entry)
+
+    def stats(self) -> dict:
+        waits = list(self.wait_times)
+        lanes = {PRIORITY_SIGNAL: 0, PRIORITY_EVENT: 0}
+        for fifo in list(self.pending.values()):
+            for priority, *_ in fifo:
+                lanes[priority] = lanes.get(priority, 0) + 1
+        return {
+            "shard": self.index,
+            "depth": sum(lanes.values()),
+            "signals_queued": lanes[PRIORITY_SIGNAL],
+            "events_queued": lanes[PRIORITY_EVENT],
+            "processed": self.processed,
+            "errors": self.errors,
+            "current": self.current,
+            "avg_wait_ms": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+        }
+
+
+class ShardedDispatcher:
+    """
+    N workers, one per shard.
+
+    :param handler: coroutine function called with each item
+    :param key_func: returns the shard key (symbol) of an item
+    :param priority_func: returns PRIORITY_SIGNAL or PRIORITY_EVENT for an item
+    :param on_error: coroutine function called with (error, item) when handler fails
+    :param gate: coroutine function awaited once before any item is handled;
+        items submitted earlier stay queued
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[dict], Awaitable],
+        key_func: Callable[[dict], str],
+        priority_func: Callable[[dict], int],
+        shard_count: int = 4,
+        on_error: Callable | None = None,
+        gate: Callable[[], Awaitable] | None = None,
+    ):
+        self.handler = handler
+        self.key_func = key_func
+        self.priority_func = priority_func
+        self.on_error = on_error
+        self.gate = gate
+        self._open = asyncio.Event()
+        self.shards = [_Shard(i) for i in range(shard_count)]
+        self._seq = itertools.count()  # FIFO tie-breaker between keys
+        self._workers: list[asyncio.Task] = []
+
+    def shard_for(self, key: str) -> _Shard:
+        # crc32 is stable across processes (unlike hash())
+        return self.shards[zlib.crc32((key or "").encode()) % len(self.shards)]
+
+    def submit(self, item: dict):
+        """Route an item to its shard (non-blocking)."""
+        key = self.key_func(item) or ""
+        shard = self.shard_for(key)
+        priority = self.priority_func(item)
+        fifo = shard.pending.setdefault(key, deque())
+        fifo.append((priority, next(self._seq), time.monotonic(), item))
+        shard.schedule(key)
+
+    def start(self):
+        self._workers.append(asyncio.create_task(self._open_gate()))
+        for shard in self.shards:
+            self._workers.append(asyncio.create_task(self._worker(shard)))
+
+    async def _open_gate(self):
+        try:
+            if self.gate:
+                await self.gate()
+        finally:
+            self._open.set()
+
+    async def _worker(self, shard: _Shard):
+        await self._open.wait()
+        while True:
+            entry = await shard.ready.get()
+            key = entry[2]
+            if shard.ready_entry.get(key) != entry:
+                continue  # superseded by a re-prioritised entry
+            del shard.ready_entry[key]
+            fifo = shard.pending[key]
+            _, _, enqueued_at, item = fifo.popleft()
+            if not fifo:
+                del shard.pending[key]
+            wait = time.monotonic() - enqueued_at
+            shard.wait_times.append(wait)
+            shard.max_wait = max(shard.max_wait, wait)
+            shard.current = f"{item.get('type')}:{self.key_func(item)}"
+            try:
+                await self.handler(item)
+            except Exception as e:
+                shard.errors += 1
+                if self.on_error:
+                    await self.on_error(e, item)
+            finally:
+                shard.processed += 1
+                shard.current = None
+                # The key's next item becomes eligible once this one is done
+                shard.schedule(key)
+
+    def stats(self) -> list:
+        return [shard.stats() for shard in self.shards]
+
+
+def format_dispatcher_stats(stats: list) -> str:
+    """Compact per-shard table for Telegram."""
+    lines = ["shard depth sig evt done err avg_wait max_wait"]
+    for s in stats:
+        lines.append(
+            f"{s['shard']:>5} {s['depth']:>5} {s['signals_queued']:>3} "
+            f"{s['events_queued']:>3} {s['processed']:>4} {s['errors']:>3} "
+            f"{s['avg_wait_ms']:>6.0f}ms {s['max_wait_ms']:>6.0f}ms"
+        )
+    return "\n".join(lines)
@@ -1,6 +1,5 @@
 import traceback
-from clients import telClient
-from config import TARGET_CHANNEL
+from notifier import notify, PRIORITY_HIGH
 import datetime
 
 async def send_error_to_telegram(error: Exception, context: str = ""):
@@ -16,6 +15,6 @@ async def send_error_to_telegram(error: Exception, context: str = ""):
             f"📌 Traceback:\n"
             f"```{tb[-3500:]}```"
         )
-        await telClient.send_message(TARGET_CHANNEL, msg)
+        notify(msg, priority=PRIORITY_HIGH)
     except Exception as e:
         print("[FATAL] Failed to send error to Telegram:", e)
@@ -0,0 +1,322 @@
+"""
+Ladder State Module
+Explicit TP/SL state machine per open position:
+    ENTRY -> TP1_HIT -> TP2_HIT -> CLOSED
+- Advanced by private `order` WS events.
+- Conditional orders are bound to their level (TP1..TP3, SL, SL2, SL3) by
+  orderId when Bybit reports them as created (Untriggered). The triggerPrice
+  is used when the orderId is not bound yet.
+- A TP1 fill asks for SL2 and a TP2 fill asks for SL3. Everything the stop
+  setters need (fill price, side, remaining size) comes from the machine, so
+  no REST read is needed.
+- Events are applied idempotently (fills deduplicated by orderId, size kept as
+  entry qty minus closed qty), so rebuild_from_journal() can replay the WS
+  journal over whatever the live path has already applied.
+"""
+
+import time
+from threading import Lock
+from typing import Dict, Optional
+
+import position_book
+import position_context
+from ws_journal import iter_messages
+
+ENTRY = "ENTRY"
+TP1_HIT = "TP1_HIT"
+TP2_HIT = "TP2_HIT"
+CLOSED = "CLOSED"
+_STATE_RANK = {ENTRY: 0, TP1_HIT: 1, TP2_HIT: 2, CLOSED: 3}
+
+# TP level filled -> (state it moves the position to, stop to set next)
+TP_TRANSITIONS = {
+    "TP1": (TP1_HIT, "SL2"),
+    "TP2": (TP2_HIT, "SL3"),
+    "TP3": (CLOSED, None),
+}
+SL_OFFSET = 0.0011  # SL2 = entry * (1 ± 0.0011), SL3 = TP2 * (1 ± 0.0011)
+# Relative distance for a triggerPrice to match a level (exchange tick rounding)
+PRICE_TOLERANCE = 0.002
+STOP_ORDER_TYPES = ("TakeProfit", "StopLoss", "PartialTakeProfit", "PartialStopLoss")
+
+_lock = Lock()
+_ladders: Dict[str, "PositionLadder"] = {}
+
+
+def _float(value) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+# ---------------- STATE MACHINE ---------------- #
+class PositionLadder:
+    """TP/SL ladder of one open position."""
+
+    def __init__(self, symbol: str, tp_prices: dict, order_id: Optional[str] = None):
+        self.symbol = symbol
+        self.side = tp_prices["side"]
+        self.entry_order_id = order_id
+        self.signal_entry = tp_prices["entry"]
+        self.state = ENTRY
+        self.entry_price = 0.0  # fill price (0 until the entry fill is seen)
+        self.entry_qty = 0.0
+        self.closed_qty = 0.0
+        self.levels = {"SL": tp_prices["sl"]}
+        for name in ("tp1", "tp2", "tp3"):
+            if tp_prices.get(name):
+                self.levels[name.upper()] = tp_prices[name]
+        self.order_levels: Dict[str, str] = {}  # orderId -> level
+        self.filled_orders: set = set()
+        self.pending_stop: Optional[str] = None  # requested, not yet reported
+        self.history: list = []  # (time, level, from_state, to_state)
+
+    @property
+    def remaining(self) -> float:
+        return max(self.entry_qty - self.closed_qty, 0.0)
+
+    def stop_price(self, level: str, tp2_price: float = 0.0) -> float:
+        """Price of the SL2 / SL3 stop for this position (0 if unknown)."""
+        if level == "SL2":
+            base = self.entry_price or self.signal_entry
+        else:
+            base = tp2_price or self.levels.get("TP2", 0)
+        if not base:
+            return 0.0
+        offset = SL_OFFSET if self.side == "Buy" else -SL_OFFSET
+        return base * (1 + offset)
+
+    def match_level(self, stop_order_type: str, trigger_price: float) -> Optional[str]:
+        """Closest level of the right kind within PRICE_TOLERANCE."""
+        if not trigger_price:
+            return None
+        prefix = "TP" if "TakeProfit" in stop_order_type else "SL"
+        best, best_distance = None, PRICE_TOLERANCE
+        for level, price in self.levels.items():
+            if not level.startswith(prefix) or not price:
+                continue
+            distance = abs(trigger_price - price) / price
+            if distance < best_distance:
+                best, best_distance = level, distance
+        if best is None and prefix == "SL":
+            # Expected SL2 / SL3 even before we placed them
+            for level in ("SL2", "SL3"):
+                price = self.stop_price(level)
+                if price and abs(trigger_price - price) / price < PRICE_TOLERANCE:
+                    return level
+        return best
+
+    def level_of(self, data: dict) -> Optional[str]:
+        order_id = data.get("orderId")
+        if order_id in self.order_levels:
+            return self.order_levels[order_id]
+        return self.match_level(
+            data.get("stopOrderType", ""), _float(data.get("triggerPrice"))
+        )
+
+    def _move_to(self, state: str, level: str) -> Optional[str]:
+        if _STATE_RANK[state] <= _STATE_RANK[self.state]:
+            return None
+        previous = self.state
+        self.state = state
+        self.history.append((time.time(), level, previous, state))
+        return previous
+
+    def apply(self, data: dict) -> Optional[dict]:
+        """
+        Apply one order event. Returns the transition
+        {"symbol", "level", "from", "to", "stop"} when the state changed.
+        """
+        order_id = data.get("orderId")
+        status = data.get("orderStatus", "")
+        stop_order_type = data.get("stopOrderType", "")
+
+        if status == "Untriggered" and stop_order_type:
+            # Conditional order created: remember which level it is
+            if order_id and order_id not in self.order_levels:
+                level = None
+                if self.pending_stop and "StopLoss" in stop_order_type:
+                    level, self.pending_stop = self.pending_stop, None
+                level = level or self.level_of(data)
+                if level:
+                    self.order_levels[order_id] = level
+            return None
+
+        if status != "Filled" or not order_id or order_id in self.filled_orders:
+            return None
+        self.filled_orders.add(order_id)
+        qty = _float(data.get("cumExecQty") or data.get("qty"))
+
+        reduce_only = data.get("reduceOnly") in (True, "True")
+        if not reduce_only and stop_order_type not in STOP_ORDER_TYPES:
+            if self.entry_order_id in (None, order_id):
+                self.entry_price = _float(data.get("avgPrice")) or self.entry_price
+                self.entry_qty = qty or self.entry_qty
+            return None
+
+        self.closed_qty += qty
+        level = self.level_of(data) if stop_order_type else None
+        stop = None
+        if level in TP_TRANSITIONS:
+            state, stop = TP_TRANSITIONS[level]
+        else:
+            state = None
+        if self.entry_qty and self.remaining <= 0:
+            state, stop = CLOSED, None
+        elif stop_order_type == "StopLoss" or (
+            level and level.startswith("SL") and not self.entry_qty
+        ):
+            # Full-position stop (or a stop fill with unknown size)
+            state, stop = CLOSED, None
+        if state is None:
+            return None
+
+        previous = self._move_to(state, level or stop_order_type or "close")
+        if previous is None:
+            return None
+        return {
+            "symbol": self.symbol,
+            "level": level,
+            "from": previous,
+            "to": state,
+            "stop": stop,
+        }
+
+    def snapshot(self) -> dict:
+        return {
+            "symbol": self.symbol,
+            "state": self.state,
+            "side": self.side,
+            "entry_price": self.entry_price or self.signal_entry,
+            "entry_filled": bool(self.entry_price),
+            "remaining": self.remaining,
+            "levels": dict(self.levels),
+            "history": list(self.history),
+        }
+
+
+# ---------------- MODULE API ---------------- #
+def open_ladder(symbol: str, tp_prices: dict, order_id: Optional[str] = None):
+    """Start tracking a freshly opened position (replaces any previous ladder)."""
+    with _lock:
+        _ladders[symbol] = PositionLadder(symbol, tp_prices, order_id)
+
+
+def close_ladder(symbol: str):
+    with _lock:
+        _ladders.pop(symbol, None)
+
+
+def apply_order_event(data: dict) -> Optional[dict]:
+    """Feed one order WS record; returns the transition (if any)."""
+    symbol = data.get("symbol")
+    with _lock:
+        ladder = _ladders.get(symbol)
+        if ladder is None:
+            return None
+        # CLOSED ladders stay until close_ladder() so the closing event can
+        # still be labelled
+        transition = ladder.apply(data)
+    if transition:
+        print(
+            f"[LADDER] {symbol} {transition['level'] or 'close'}: "
+            f"{transition['from']} -> {transition['to']}"
+        )
+    return transition
+
+
+def get_ladder(symbol: str) -> Optional[dict]:
+    """Snapshot of the position's ladder, or None if it isn't tracked."""
+    with _lock:
+        ladder = _ladders.get(symbol)
+        return ladder.snapshot() if ladder else None
+
+
+def level_for(
+    symbol: str, order_id: Optional[str], stop_order_type: str, trigger_price: float
+) -> Optional[str]:
+    """Level (TP1..TP3, SL, SL2, SL3) of a conditional order, if known."""
+    data = {
+        "orderId": order_id,
+        "stopOrderType": stop_order_type,
+        "triggerPrice": trigger_price,
+    }
+    with _lock:
+        ladder = _ladders.get(symbol)
+        return ladder.level_of(data) if ladder else None
+
+
+def stop_price(symbol: str, level: str, tp2_price: float = 0.0) -> float:
+    with _lock:
+        ladder = _ladders.get(symbol)
+        return ladder.stop_price(level, tp2_price) if ladder else 0.0
+
+
+def note_stop(symbol: str, level: str, price: float):
+    """Record a stop we just requested so its order event binds to `level`."""
+    with _lock:
+        ladder = _ladders.get(symbol)
+        if ladder:
+            ladder.levels[level] = price
+            ladder.pending_stop = level
+
+
+def missing_stops() -> Dict[str, str]:
+    """symbol -> stop (SL2 / SL3) a ladder is due but has no order for."""
+    due = {}
+    with _lock:
+        for symbol, ladder in _ladders.items():
+            bound = set(ladder.order_levels.values())
+            if ladder.state == TP1_HIT and not bound & {"SL2", "SL3"}:
+                due[symbol] = "SL2"
+            elif ladder.state == TP2_HIT and "SL3" not in bound:
+                due[symbol] = "SL3"
+    return due
+
+
+# ---------------- REBUILD ---------------- #
+def _journal_events(symbols: set, since: float) -> list:
+    events = []
+    for entry in iter_messages(start=since):
+        message = entry.get("data") or {}
+        for data in message.get("data", []):
+            if data.get("symbol") in symbols:
+                events.append(data)
+    return events
+
+
+def rebuild_from_journal() -> int:
+    """
+    Recreate ladders for the stored position contexts and replay their order
+    events from the WS journal (blocking file I/O: run it in a thread).
+    Returns the number of ladders rebuilt.
+    """
+    contexts = position_context.all_contexts()
+    with _lock:
+        for symbol, context in contexts.items():
+            if symbol not in _ladders:
+                _ladders[symbol] = PositionLadder(
+                    symbol, context["tp_prices"], context["order_id"]
+                )
+    if not contexts:
+        return 0
+
+    since = min(context["entry_time"].timestamp() for context in contexts.values())
+    events = _journal_events(set(contexts), since - 60)
+    for data in events:
+        apply_order_event(data)
+
+    # Entry fill rotated out of the journal: take it from the position book
+    with _lock:
+        for symbol, ladder in _ladders.items():
+            if ladder.entry_qty:
+                continue
+            position = position_book.get_position(symbol)
+            if position and position["size"]:
+                ladder.entry_price = position["avgPrice"]
+                ladder.entry_qty = ladder.closed_qty + position["size"]
+    print(
+        f"[LADDER] Rebuilt {len(contexts)} ladder(s) from {len(events)} journal event(s)"
+    )
+    return len(contexts)
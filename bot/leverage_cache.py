@@ -0,0 +1,196 @@
+"""
+Leverage Cache Module
+Per-symbol leverage as last confirmed on the exchange, so set_leverage is
+skipped when the target is already in place.
+- Fed by the position book (the WS position topic and REST reconciliation both
+  carry leverage, flat symbols included) and by our own set_leverage calls
+  (error 110043 "not modified" also confirms the value).
+- ensure_leverage() is the signal-path entry point: a fresh cache hit costs
+  nothing, a miss falls back to set_leverage_safe.
+- A background loop pre-sets leverage for a watchlist (frequently signalled
+  symbols + MARKET_WATCHLIST) to the value their next signal most likely
+  needs, so the REST call usually disappears from the signal path.
+"""
+
+import asyncio
+import time
+from threading import Lock
+from typing import Dict, Optional
+
+import db
+from api import set_leverage_safe
+from config import MARKET_WATCHLIST, MAX_LEVERAGE, open_positions
+
+LEVERAGE_MAX_AGE = 6 * 3600  # seconds before a cached value must be re-confirmed
+LEVERAGE_PRESET_INTERVAL = 300  # seconds between watchlist passes
+WATCH_WINDOW = 7 * 86400  # seconds of signal history that count for the watchlist
+WATCH_MIN_SIGNALS = 2  # signals within the window to join the watchlist
+WATCH_SIZE = 20  # most frequently signalled symbols kept on the watchlist
+
+# Lock for thread-safe access (position book updates arrive on the WS thread)
+_lock = Lock()
+_leverage: Dict[str, dict] = {}  # symbol -> {"leverage", "updated_at"}
+_signal_times: Dict[str, list] = {}  # symbol -> wall-clock times of recent signals
+_last_target: Dict[str, float] = {}  # symbol -> leverage its last signal needed
+_symbol_locks: Dict[str, asyncio.Lock] = {}
+leverage_cache_stats = {
+    "hits": 0,
+    "sets": 0,
+    "not_modified": 0,
+    "presets": 0,
+    "errors": 0,
+}
+
+
+def _normalize(leverage) -> float:
+    return round(float(leverage), 2)
+
+
+# ---------------- STATE ---------------- #
+def observe(symbol: str, leverage):
+    """Record the leverage the exchange reports (or confirmed) for symbol."""
+    if not symbol or not leverage:
+        return
+    value = _normalize(leverage)
+    if value <= 0:
+        return
+    with _lock:
+        _leverage[symbol] = {"leverage": value, "updated_at": time.monotonic()}
+
+
+def invalidate(symbol: str):
+    with _lock:
+        _leverage.pop(symbol, None)
+
+
+def get_leverage(symbol: str, max_age: float = LEVERAGE_MAX_AGE) -> Optional[float]:
+    """Cached leverage for symbol, or None when unknown or older than max_age."""
+    with _lock:
+        entry = _leverage.get(symbol)
+        if entry is None or time.monotonic() - entry["updated_at"] > max_age:
+            return None
+        return entry["leverage"]
+
+
+# ---------------- SET (SIGNAL PATH) ---------------- #
+async def ensure_leverage(symbol: str, leverage) -> bool:
+    """
+    Make sure symbol runs at `leverage`. Returns True when a REST call was
+    made, False when the cache (or a 110043 reply) showed it already set.
+    """
+    target = _normalize(leverage)
+    _last_target[symbol] = target
+    if get_leverage(symbol) == target:
+        leverage_cache_stats["hits"] += 1
+        return False
+
+    # One call per symbol at a time (signal path vs background pre-set)
+    lock = _symbol_locks.setdefault(symbol, asyncio.Lock())
+    async with lock:
+        if get_leverage(symbol) == target:
+            leverage_cache_stats["hits"] += 1
+            return False
+        try:
+            modified = await set_leverage_safe(symbol=symbol, leverage=target)
+        except Exception:
+            leverage_cache_stats["errors"] += 1
+            invalidate(symbol)
+            raise
+        leverage_cache_stats["sets" if modified else "not_modified"] += 1
+        observe(symbol, target)
+        return modified
+
+
+# ---------------- WATCHLIST ---------------- #
+def note_signal(symbol: str):
+    """Count a signal for symbol (drives the pre-set watchlist)."""
+    now = time.time()
+    with _lock:
+        times = _signal_times.setdefault(symbol, [])
+        times.append(now)
+        _prune(times, now)
+
+
+def _prune(times: list, now: float):
+    cutoff = now - WATCH_WINDOW
+    while times and times[0] < cutoff:
+        times.pop(0)
+
+
+def _seed_signal_history():
+    """Rebuild the signal counts from recent orders (history survives restarts)."""
+    rows = db.query(
+        "SELECT symbol, placed_ts FROM liquidity_orders WHERE placed_ts >= ? "
+        "ORDER BY placed_ts",
+        (time.time() - WATCH_WINDOW,),
+    )
+    with _lock:
+        for row in rows:
+            _signal_times.setdefault(row["symbol"], []).append(row["placed_ts"])
+
+
+def watchlist() -> list:
+    """Symbols whose leverage is worth pre-setting, most signalled first."""
+    now = time.time()
+    with _lock:
+        counts = {}
+        for symbol, times in list(_signal_times.items()):
+            _prune(times, now)
+            if not times:
+                _signal_times.pop(symbol, None)
+            elif len(times) >= WATCH_MIN_SIGNALS:
+                counts[symbol] = len(times)
+    frequent = sorted(counts, key=counts.get, reverse=True)[:WATCH_SIZE]
+    return frequent + [s for s in MARKET_WATCHLIST if s not in counts]
+
+
+async def predicted_leverage(symbol: str) -> Optional[float]:
+    """
+    Leverage the next signal for symbol most likely needs: the one its last
+    signal needed, else the cap (sizing hits the cap for most stop distances).
+    """
+    if symbol in _last_target:
+        return _last_target[symbol]
+    from bybit_client import get_symbol_info
+
+    info = await get_symbol_info(symbol)
+    if not info:
+        return None
+    return _normalize(min(info["max_leverage"], MAX_LEVERAGE))
+
+
+async def preset_watchlist() -> int:
+    """Pre-set leverage for watchlist symbols. Returns the number of REST calls made."""
+    import position_book
+
+    calls = 0
+    for symbol in watchlist():
+        # Never touch the leverage of an open position
+        if symbol in open_positions or position_book.is_open(symbol):
+            continue
+        try:
+            target = await predicted_leverage(symbol)
+            if target is None or get_leverage(symbol) == target:
+                continue
+            await ensure_leverage(symbol, target)
+            leverage_cache_stats["presets"] += 1
+            calls += 1
+        except Exception as e:
+            print(f"[LEVERAGE_CACHE][WARN] Pre-set failed for {symbol}: {e}")
+    return calls
+
+
+async def periodic_leverage_preset(interval_seconds: int = LEVERAGE_PRESET_INTERVAL):
+    """Seed the watchlist from order history, then pre-set leverage periodically."""
+    try:
+        await asyncio.to_thread(_seed_signal_history)
+    except Exception as e:
+        print(f"[LEVERAGE_CACHE][WARN] Could not seed signal history: {e}")
+    while True:
+        try:
+            calls = await preset_watchlist()
+            if calls:
+                print(f"[LEVERAGE_CACHE] Pre-set leverage for {calls} symbol(s)")
+        except Exception as e:
+            print(f"[LEVERAGE_CACHE][ERROR] Pre-set pass failed: {e}")
+        await asyncio.sleep(interval_seconds)
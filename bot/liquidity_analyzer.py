@@ -3,52 +3,374 @@ Liquidity Analyzer Module
 Analyzes order book depth, volume, and execution quality to predict real account behavior.
 """
 
+import asyncio
 import json
 import os
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
-from threading import Lock
 from typing import Dict, List, Optional, Tuple
 from config import IS_DEMO
+import db
+import market_data
+import ticker_cache
+from depth_walk import DepthBook
 
-# Lock for thread-safe file operations
-_liquidity_file_lock = Lock()
+# Legacy whole-file store, imported into the database once
 LIQUIDITY_DATA_FILE = os.path.join(
     os.path.dirname(os.path.dirname(__file__)), "liquidity_tracking.json"
 )
+_MIGRATION_KEY = "liquidity_tracking_json_migrated"
+TIMEZONE = ZoneInfo("Asia/Tehran")
+REPORT_DAYS = 7
+
+
+# ---------------- STORAGE ---------------- #
+def _init_schema(conn):
+    # Orders, indexed by order_id (primary key) and by time
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS liquidity_orders (
+            order_id TEXT PRIMARY KEY,
+            symbol TEXT NOT NULL,
+            side TEXT,
+            qty REAL,
+            order_type TEXT,
+            placed_at TEXT NOT NULL,
+            placed_ts REAL NOT NULL,
+            day TEXT NOT NULL,
+            is_demo INTEGER
+        )
+        """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_liquidity_orders_placed "
+        "ON liquidity_orders (placed_ts)"
+    )
+    # Append-only fill records
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS liquidity_fills (
+            id INTEGER PRIMARY KEY,
+            order_id TEXT NOT NULL,
+            filled_at TEXT NOT NULL,
+            fill_percentage REAL,
+            execution_price REAL,
+            slippage REAL
+        )
+        """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_liquidity_fills_order "
+        "ON liquidity_fills (order_id)"
+    )
+    # Pre-trade metrics (attached after the order, from background diagnostics)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS liquidity_order_metrics (
+            order_id TEXT PRIMARY KEY,
+            metrics TEXT NOT NULL
+        )
+        """)
+    # Per day (of placement) / symbol aggregates for the report
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS liquidity_daily (
+            day TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            filled INTEGER NOT NULL DEFAULT 0,
+            partial INTEGER NOT NULL DEFAULT 0,
+            slippage_sum REAL NOT NULL DEFAULT 0,
+            slippage_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, symbol)
+        )
+        """)
+    # Raw executions from the private `execution` topic (exec_id dedupes replays)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS liquidity_executions (
+            exec_id TEXT PRIMARY KEY,
+            order_id TEXT NOT NULL,
+            exec_price REAL NOT NULL,
+            exec_qty REAL NOT NULL,
+            exec_fee REAL,
+            exec_time_ms INTEGER NOT NULL,
+            is_maker INTEGER
+        )
+        """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_liquidity_executions_order "
+        "ON liquidity_executions (order_id)"
+    )
+    # Running per-order aggregate of the executions + realized vs predicted cost
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS liquidity_realized (
+            order_id TEXT PRIMARY KEY,
+            symbol TEXT NOT NULL,
+            side TEXT NOT NULL,
+            exec_count INTEGER NOT NULL,
+            filled_qty REAL NOT NULL,
+            notional REAL NOT NULL,
+            fees REAL NOT NULL,
+            first_exec_ms INTEGER NOT NULL,
+            last_exec_ms INTEGER NOT NULL,
+            first_mark_price REAL,
+            reference_price REAL,
+            realized_slippage REAL,
+            predicted_slippage REAL,
+            counted_slippage REAL
+        )
+        """)
+    _migrate_json_file(conn)
 
 
-def load_liquidity_data():
-    """Load liquidity tracking data from JSON file."""
+def _migrate_json_file(conn):
+    """One-time import of liquidity_tracking.json (the file is left untouched)."""
+    if db.get_meta(conn, _MIGRATION_KEY) or not os.path.exists(LIQUIDITY_DATA_FILE):
+        return
     try:
-        with _liquidity_file_lock:
-            if os.path.exists(LIQUIDITY_DATA_FILE):
-                with open(LIQUIDITY_DATA_FILE, "r", encoding="utf-8") as f:
-                    return json.load(f)
+        with open(LIQUIDITY_DATA_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
     except Exception as e:
-        print(f"[LIQUIDITY_ANALYZER][ERROR] Failed to load data: {e}")
+        print(f"[LIQUIDITY_ANALYZER][ERROR] Failed to read {LIQUIDITY_DATA_FILE}: {e}")
+        return
+
+    executions = data.get("order_executions", [])
+    for ex in executions:
+        placed_at = datetime.fromisoformat(ex["placed_at"])
+        _insert_order(
+            conn,
+            ex["order_id"],
+            ex["symbol"],
+            ex.get("side"),
+            ex.get("qty"),
+            ex.get("order_type"),
+            placed_at,
+            ex.get("is_demo", IS_DEMO),
+        )
+        if ex.get("liquidity_metrics"):
+            _insert_metrics(conn, ex["order_id"], ex["liquidity_metrics"])
+        if ex.get("filled_at"):
+            _insert_fill(
+                conn,
+                ex["order_id"],
+                ex["filled_at"],
+                ex.get("fill_percentage"),
+                ex.get("execution_price"),
+                ex.get("slippage"),
+            )
+    db.set_meta(conn, _MIGRATION_KEY, datetime.now().isoformat())
+    print(f"[LIQUIDITY_ANALYZER] Migrated {len(executions)} execution(s) from JSON")
+
+
+db.register_schema(_init_schema)
+
+
+def _insert_order(conn, order_id, symbol, side, qty, order_type, placed_at, is_demo):
+    day = placed_at.astimezone(TIMEZONE).strftime("%Y-%m-%d")
+    cursor = conn.execute(
+        "INSERT OR IGNORE INTO liquidity_orders (order_id, symbol, side, qty, "
+        "order_type, placed_at, placed_ts, day, is_demo) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            order_id,
+            symbol,
+            side,
+            qty,
+            order_type,
+            placed_at.isoformat(),
+            placed_at.timestamp(),
+            day,
+            int(bool(is_demo)),
+        ),
+    )
+    if cursor.rowcount:
+        conn.execute(
+            "INSERT INTO liquidity_daily (day, symbol, total) VALUES (?, ?, 1) "
+            "ON CONFLICT(day, symbol) DO UPDATE SET total = total + 1",
+            (day, symbol),
+        )
+        # Executions may have arrived before the order was tracked
+        _refresh_realized(conn, order_id)
+
+
+def _insert_fill(
+    conn, order_id, filled_at, fill_percentage, execution_price, slippage
+) -> bool:
+    """Append a fill; the first fill of an order updates the daily aggregate."""
+    order = conn.execute(
+        "SELECT symbol, day FROM liquidity_orders WHERE order_id = ?", (order_id,)
+    ).fetchone()
+    if order is None:
+        return False
+    first_fill = (
+        conn.execute(
+            "SELECT 1 FROM liquidity_fills WHERE order_id = ? LIMIT 1", (order_id,)
+        ).fetchone()
+        is None
+    )
+    conn.execute(
+        "INSERT INTO liquidity_fills (order_id, filled_at, fill_percentage, "
+        "execution_price, slippage) VALUES (?, ?, ?, ?, ?)",
+        (order_id, filled_at, fill_percentage, execution_price, slippage),
+    )
+    if first_fill:
+        partial = (
+            1 if (fill_percentage if fill_percentage is not None else 100) < 100 else 0
+        )
+        has_slippage = 1 if slippage else 0
+        conn.execute(
+            "UPDATE liquidity_daily SET filled = filled + 1, partial = partial + ?, "
+            "slippage_sum = slippage_sum + ?, slippage_count = slippage_count + ? "
+            "WHERE day = ? AND symbol = ?",
+            (partial, slippage or 0.0, has_slippage, order[1], order[0]),
+        )
+    return True
 
-    # Return default structure
-    return {
-        "order_executions": [],  # Track order execution details
-        "symbol_liquidity": {},  # Cache liquidity metrics per symbol
-        "daily_stats": {},  # Daily aggregated stats
-    }
 
+def _insert_metrics(conn, order_id: str, liquidity_metrics: Dict):
+    conn.execute(
+        "INSERT OR REPLACE INTO liquidity_order_metrics (order_id, metrics) "
+        "VALUES (?, ?)",
+        (order_id, json.dumps(liquidity_metrics, ensure_ascii=False)),
+    )
+    _refresh_realized(conn, order_id)
+
+
+def _adverse_percent(side: str, price: float, reference_price: float) -> float:
+    """Price move against the order vs reference (positive = worse)."""
+    move = price - reference_price if side == "Buy" else reference_price - price
+    return move / reference_price * 100
+
+
+def _insert_execution(conn, data: Dict) -> bool:
+    """Append one execution and fold it into the order's running aggregate."""
+    order_id = data["orderId"]
+    price = float(data["execPrice"])
+    qty = float(data["execQty"])
+    fee = float(data.get("execFee") or 0)
+    exec_ms = int(data["execTime"])
+    cursor = conn.execute(
+        "INSERT OR IGNORE INTO liquidity_executions (exec_id, order_id, exec_price, "
+        "exec_qty, exec_fee, exec_time_ms, is_maker) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+            data["execId"],
+            order_id,
+            price,
+            qty,
+            fee,
+            exec_ms,
+            int(bool(data.get("isMaker"))),
+        ),
+    )
+    if not cursor.rowcount:
+        return False
+    conn.execute(
+        "INSERT INTO liquidity_realized (order_id, symbol, side, exec_count, "
+        "filled_qty, notional, fees, first_exec_ms, last_exec_ms, first_mark_price) "
+        "VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT(order_id) DO UPDATE SET exec_count = exec_count + 1, "
+        "filled_qty = filled_qty + excluded.filled_qty, "
+        "notional = notional + excluded.notional, fees = fees + excluded.fees, "
+        "first_exec_ms = MIN(first_exec_ms, excluded.first_exec_ms), "
+        "last_exec_ms = MAX(last_exec_ms, excluded.last_exec_ms)",
+        (
+            order_id,
+            data.get("symbol", ""),
+            data.get("side", ""),
+            qty,
+            qty * price,
+            fee,
+            exec_ms,
+            exec_ms,
+            float(data.get("markPrice") or 0) or None,
+        ),
+    )
+    _refresh_realized(conn, order_id)
+    return True
 
-def save_liquidity_data(data):
-    """Save liquidity tracking data to JSON file."""
-    try:
-        with _liquidity_file_lock:
-            with open(LIQUIDITY_DATA_FILE, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        print(f"[LIQUIDITY_ANALYZER][ERROR] Failed to save data: {e}")
 
+def _refresh_realized(conn, order_id: str):
+    """
+    Recompute realized / predicted slippage for one order and move its
+    contribution in liquidity_daily. Order, executions and metrics arrive in
+    any order, so this runs after each of them (primary key lookups only).
+    """
+    realized = conn.execute(
+        "SELECT side, filled_qty, notional, first_mark_price, counted_slippage "
+        "FROM liquidity_realized WHERE order_id = ?",
+        (order_id,),
+    ).fetchone()
+    if realized is None or not realized[1]:
+        return
+    side, filled_qty, notional, first_mark_price, counted = realized
+    metrics_row = conn.execute(
+        "SELECT metrics FROM liquidity_order_metrics WHERE order_id = ?", (order_id,)
+    ).fetchone()
+    metrics = json.loads(metrics_row[0]) if metrics_row else {}
+
+    # Pre-trade price the depth walk was run against; the mark price at the
+    # first execution when there are no (usable) metrics
+    predicted = None
+    reference_price = metrics.get("current_price") or first_mark_price
+    if metrics.get("current_price") and metrics.get("avg_execution_price"):
+        predicted = _adverse_percent(
+            side, metrics["avg_execution_price"], reference_price
+        )
+    realized_slippage = (
+        _adverse_percent(side, notional / filled_qty, reference_price)
+        if reference_price
+        else None
+    )
+
+    order = conn.execute(
+        "SELECT symbol, day FROM liquidity_orders WHERE order_id = ?", (order_id,)
+    ).fetchone()
+    # Only orders tracked at placement count towards the daily aggregate
+    new_counted = realized_slippage if order else None
+    conn.execute(
+        "UPDATE liquidity_realized SET reference_price = ?, realized_slippage = ?, "
+        "predicted_slippage = ?, counted_slippage = ? WHERE order_id = ?",
+        (reference_price, realized_slippage, predicted, new_counted, order_id),
+    )
+    if order and (counted is not None or new_counted is not None):
+        conn.execute(
+            "UPDATE liquidity_daily SET slippage_sum = slippage_sum + ?, "
+            "slippage_count = slippage_count + ? WHERE day = ? AND symbol = ?",
+            (
+                (new_counted or 0.0) - (counted or 0.0),
+                (new_counted is not None) - (counted is not None),
+                order[1],
+                order[0],
+            ),
+        )
 
-def get_order_book_depth(symbol: str, limit: int = 25) -> Optional[Dict]:
+
+def get_order_execution(order_id: str) -> Optional[Dict]:
+    """
+    Order + first fill + metrics + realized execution (VWAP, latency,
+    realized vs predicted slippage) for one order_id (primary key lookups).
+    """
+    row = db.query_one(
+        "SELECT o.*, f.filled_at, f.fill_percentage, f.execution_price, f.slippage, "
+        "m.metrics, r.exec_count, r.filled_qty, r.fees, "
+        "r.notional / r.filled_qty AS vwap, "
+        "r.first_exec_ms - o.placed_ts * 1000 AS first_fill_latency_ms, "
+        "r.last_exec_ms - o.placed_ts * 1000 AS fill_latency_ms, "
+        "r.reference_price, r.realized_slippage, r.predicted_slippage "
+        "FROM liquidity_orders o "
+        "LEFT JOIN liquidity_fills f ON f.id = ("
+        "SELECT id FROM liquidity_fills WHERE order_id = o.order_id ORDER BY id LIMIT 1) "
+        "LEFT JOIN liquidity_order_metrics m ON m.order_id = o.order_id "
+        "LEFT JOIN liquidity_realized r ON r.order_id = o.order_id "
+        "WHERE o.order_id = ?",
+        (order_id,),
+    )
+    if row is None:
+        return None
+    execution = dict(row)
+    execution["liquidity_metrics"] = (
+        json.loads(execution.pop("metrics")) if execution.get("metrics") else None
+    )
+    return execution
+
+
+async def get_order_book_depth(symbol: str, limit: int = 25) -> Optional[Dict]:
     """
-    Get order book depth from Bybit API.
+    Get order book depth: local WS book when warm, Bybit API otherwise.
 
     Args:
         symbol: Trading symbol (e.g., "BTCUSDT")
@@ -57,10 +379,14 @@ def get_order_book_depth(symbol: str, limit: int = 25) -> Optional[Dict]:
     Returns:
         Dict with 'bids' and 'asks' lists, or None if error
     """
+    local_book = market_data.get_order_book(symbol, limit)
+    if local_book:
+        return local_book
+
     try:
         from clients import bybitClientLive
 
-        response = bybitClientLive.get_orderbook(
+        response = await bybitClientLive.get_orderbook(
             category="linear", symbol=symbol, limit=limit
         )
 
@@ -77,9 +403,21 @@ def get_order_book_depth(symbol: str, limit: int = 25) -> Optional[Dict]:
     return None
 
 
-def get_24h_ticker(symbol: str) -> Optional[Dict]:
+def _parse_ticker(ticker: Dict) -> Dict:
+    return {
+        "volume24h": float(ticker.get("volume24h") or 0),
+        "turnover24h": float(ticker.get("turnover24h") or 0),
+        "lastPrice": float(ticker.get("lastPrice") or 0),
+        "markPrice": float(ticker.get("markPrice") or 0),
+        "highPrice24h": float(ticker.get("highPrice24h") or 0),
+        "lowPrice24h": float(ticker.get("lowPrice24h") or 0),
+    }
+
+
+async def get_24h_ticker(symbol: str) -> Optional[Dict]:
     """
-    Get 24h ticker statistics including volume.
+    Get 24h ticker statistics including volume: shared ticker cache when
+    fresh, Bybit API otherwise.
 
     Args:
         symbol: Trading symbol
@@ -87,97 +425,48 @@ def get_24h_ticker(symbol: str) -> Optional[Dict]:
     Returns:
         Dict with volume and price data, or None if error
     """
+    cached = ticker_cache.get_ticker(symbol)
+    if cached:
+        return cached
+
     try:
         from clients import bybitClientLive
 
-        response = bybitClientLive.get_tickers(category="linear", symbol=symbol)
+        response = await bybitClientLive.get_tickers(category="linear", symbol=symbol)
 
         if response.get("retCode") == 0:
             result = response.get("result", {}).get("list", [])
             if result:
-                ticker = result[0]
-                return {
-                    "volume24h": float(ticker.get("volume24h", 0)),
-                    "turnover24h": float(ticker.get("turnover24h", 0)),
-                    "lastPrice": float(ticker.get("lastPrice", 0)),
-                    "highPrice24h": float(ticker.get("highPrice24h", 0)),
-                    "lowPrice24h": float(ticker.get("lowPrice24h", 0)),
-                }
+                ticker_cache.apply_ticker(symbol, result[0])
+                return _parse_ticker(result[0])
     except Exception as e:
         print(f"[LIQUIDITY_ANALYZER][ERROR] Failed to get ticker for {symbol}: {e}")
 
     return None
 
 
-def calculate_liquidity_metrics(symbol: str, order_qty: float, side: str) -> Dict:
-    """
-    Calculate liquidity metrics for a given order.
-
-    Args:
-        symbol: Trading symbol
-        order_qty: Order quantity
-        side: "Buy" or "Sell"
-
-    Returns:
-        Dict with liquidity metrics
-    """
-    order_book = get_order_book_depth(symbol, limit=50)
-    ticker = get_24h_ticker(symbol)
-
+async def fetch_depth(symbol: str) -> Optional[Tuple[DepthBook, Dict]]:
+    """Fetch book + ticker once and parse the book for depth walks (None on failure)."""
+    order_book, ticker = await asyncio.gather(
+        get_order_book_depth(symbol, limit=50),
+        get_24h_ticker(symbol),
+    )
     if not order_book or not ticker:
-        return {
-            "available": False,
-            "reason": "Failed to fetch market data",
-        }
+        return None
+    return DepthBook(order_book), ticker
 
+
+def build_liquidity_metrics(
+    symbol: str, order_qty: float, side: str, depth: DepthBook, ticker: Dict
+) -> Dict:
+    """Liquidity metrics for one side of an already parsed book."""
     current_price = ticker["lastPrice"]
     volume_24h = ticker["volume24h"]
 
-    # Calculate available liquidity on the order book side
-    if side == "Buy":
-        # For buy orders, we look at asks (sell side)
-        orders = order_book["asks"]
-        order_side = "asks"
-    else:
-        # For sell orders, we look at bids (buy side)
-        orders = order_book["bids"]
-        order_side = "bids"
-
-    # Calculate cumulative liquidity up to order_qty
-    cumulative_qty = 0.0
-    cumulative_value = 0.0
-    price_levels_used = 0
-    max_slippage = 0.0
-
-    for price_str, size_str in orders:
-        price = float(price_str)
-        size = float(size_str)
-
-        if cumulative_qty >= order_qty:
-            break
-
-        remaining_qty = order_qty - cumulative_qty
-        qty_to_take = min(size, remaining_qty)
-
-        cumulative_qty += qty_to_take
-        cumulative_value += qty_to_take * price
-        price_levels_used += 1
-
-        # Calculate slippage (difference from current price)
-        if side == "Buy":
-            slippage = ((price - current_price) / current_price) * 100
-        else:
-            slippage = ((current_price - price) / current_price) * 100
-
-        max_slippage = max(max_slippage, slippage)
-
-    # Average execution price
-    avg_execution_price = (
-        cumulative_value / cumulative_qty if cumulative_qty > 0 else current_price
-    )
-
-    # Calculate fill percentage
-    fill_percentage = (cumulative_qty / order_qty) * 100 if order_qty > 0 else 0
+    # Buy orders take the asks, sell orders take the bids
+    walk = depth.walk(side, order_qty, current_price)
+    fill_percentage = walk["fill_percentage"]
+    price_levels_used = walk["levels_used"]
 
     # Liquidity score (0-100)
     # Based on: fill percentage, price levels needed, volume ratio
@@ -190,10 +479,10 @@ def calculate_liquidity_metrics(symbol: str, order_qty: float, side: str) -> Dic
         "side": side,
         "order_qty": order_qty,
         "current_price": current_price,
-        "avg_execution_price": avg_execution_price,
+        "avg_execution_price": walk["avg_execution_price"],
         "fill_percentage": fill_percentage,
         "price_levels_needed": price_levels_used,
-        "max_slippage_percent": max_slippage,
+        "max_slippage_percent": walk["max_slippage_percent"],
         "volume_24h": volume_24h,
         "order_to_volume_ratio": volume_ratio,
         "liquidity_score": liquidity_score,
@@ -202,6 +491,41 @@ def calculate_liquidity_metrics(symbol: str, order_qty: float, side: str) -> Dic
     }
 
 
+async def calculate_liquidity_metrics(symbol: str, order_qty: float, side: str) -> Dict:
+    """
+    Calculate liquidity metrics for a given order.
+
+    Args:
+        symbol: Trading symbol
+        order_qty: Order quantity
+        side: "Buy" or "Sell"
+
+    Returns:
+        Dict with liquidity metrics
+    """
+    fetched = await fetch_depth(symbol)
+    if not fetched:
+        return {
+            "available": False,
+            "reason": "Failed to fetch market data",
+        }
+    depth, ticker = fetched
+    return build_liquidity_metrics(symbol, order_qty, side, depth, ticker)
+
+
+async def max_qty_within_slippage(
+    symbol: str, side: str, max_slippage_percent: float
+) -> Optional[float]:
+    """Largest market order on `side` whose worst fill stays within the slippage bound."""
+    fetched = await fetch_depth(symbol)
+    if not fetched:
+        return None
+    depth, ticker = fetched
+    return depth.side_for(side).max_qty_within_slippage(
+        max_slippage_percent, ticker["lastPrice"]
+    )
+
+
 def track_order_execution(
     symbol: str,
     side: str,
@@ -209,6 +533,7 @@ def track_order_execution(
     order_id: str,
     order_type: str = "Market",
     liquidity_metrics: Optional[Dict] = None,
+    placed_at: Optional[datetime] = None,
 ):
     """
     Track order execution details for analysis.
@@ -220,27 +545,17 @@ def track_order_execution(
         order_id: Order ID from exchange
         order_type: Order type (Market, Limit, etc.)
         liquidity_metrics: Pre-calculated liquidity metrics
+        placed_at: When the order request was sent (fill latency is measured
+            from here; defaults to now)
     """
-    data = load_liquidity_data()
-    now = datetime.now(ZoneInfo("Asia/Tehran"))
+    now = placed_at or datetime.now(TIMEZONE)
 
-    execution_record = {
-        "symbol": symbol,
-        "side": side,
-        "qty": qty,
-        "order_id": order_id,
-        "order_type": order_type,
-        "placed_at": now.isoformat(),
-        "filled_at": None,
-        "fill_percentage": None,
-        "execution_price": None,
-        "slippage": None,
-        "liquidity_metrics": liquidity_metrics,
-        "is_demo": IS_DEMO,
-    }
+    def _track(conn):
+        _insert_order(conn, order_id, symbol, side, qty, order_type, now, IS_DEMO)
+        if liquidity_metrics:
+            _insert_metrics(conn, order_id, liquidity_metrics)
 
-    data["order_executions"].append(execution_record)
-    save_liquidity_data(data)
+    db.submit_write(_track)
 
     print(f"[LIQUIDITY_ANALYZER] Order tracked: {symbol} {side} {qty} (ID: {order_id})")
 
@@ -260,26 +575,58 @@ def update_order_fill(
         execution_price: Average execution price
         slippage: Slippage percentage (optional)
     """
-    data = load_liquidity_data()
-    now = datetime.now(ZoneInfo("Asia/Tehran"))
-
-    # Find the most recent order with this ID
-    for execution in reversed(data["order_executions"]):
-        if execution["order_id"] == order_id and execution["filled_at"] is None:
-            execution["filled_at"] = now.isoformat()
-            execution["fill_percentage"] = fill_percentage
-            execution["execution_price"] = execution_price
-            execution["slippage"] = slippage
-            save_liquidity_data(data)
+    now = datetime.now(TIMEZONE)
+
+    def _fill(conn):
+        if _insert_fill(
+            conn, order_id, now.isoformat(), fill_percentage, execution_price, slippage
+        ):
             print(
                 f"[LIQUIDITY_ANALYZER] Order filled: {order_id} ({fill_percentage:.1f}% @ ${execution_price:.2f})"
             )
-            return
+        else:
+            print(
+                f"[LIQUIDITY_ANALYZER][WARN] Order ID {order_id} not found for update"
+            )
 
-    print(f"[LIQUIDITY_ANALYZER][WARN] Order ID {order_id} not found for update")
+    db.submit_write(_fill)
 
 
-def analyze_symbol_liquidity(symbol: str, typical_order_qty: float) -> Dict:
+def attach_liquidity_metrics(order_id: str, liquidity_metrics: Dict):
+    """
+    Attach pre-trade liquidity metrics to an already tracked order
+    (diagnostics run in the background after the order is placed).
+
+    Args:
+        order_id: Order ID
+        liquidity_metrics: Metrics from calculate_liquidity_metrics
+    """
+    db.submit_write(lambda conn: _insert_metrics(conn, order_id, liquidity_metrics))
+
+
+# ---------------- EXECUTION STREAM ---------------- #
+def record_execution(data: Dict):
+    """Queue one `execution` topic record (trade fills only) for the store."""
+    if data.get("execType", "Trade") != "Trade" or not data.get("orderId"):
+        return
+    db.submit_write(lambda conn: _insert_execution(conn, data))
+
+
+def execution_callback_ws():
+    """Callback for pybit `ws.execution_stream` (runs on the WS thread)."""
+
+    def _callback(msg):
+        try:
+            for data in msg.get("data", []):
+                if data.get("category", "linear") == "linear":
+                    record_execution(data)
+        except Exception as e:
+            print(f"[LIQUIDITY_ANALYZER][ERROR] Failed to record execution: {e}")
+
+    return _callback
+
+
+async def analyze_symbol_liquidity(symbol: str, typical_order_qty: float) -> Dict:
     """
     Analyze liquidity for a symbol and provide recommendations.
 
@@ -290,16 +637,21 @@ def analyze_symbol_liquidity(symbol: str, typical_order_qty: float) -> Dict:
     Returns:
         Dict with analysis and recommendations
     """
-    # Calculate metrics for both buy and sell
-    buy_metrics = calculate_liquidity_metrics(symbol, typical_order_qty, "Buy")
-    sell_metrics = calculate_liquidity_metrics(symbol, typical_order_qty, "Sell")
-
-    if not buy_metrics.get("available") or not sell_metrics.get("available"):
+    # One fetch + parse, walked on both sides
+    fetched = await fetch_depth(symbol)
+    if not fetched:
         return {
             "symbol": symbol,
             "status": "error",
             "message": "Failed to analyze liquidity",
         }
+    depth, ticker = fetched
+    buy_metrics = build_liquidity_metrics(
+        symbol, typical_order_qty, "Buy", depth, ticker
+    )
+    sell_metrics = build_liquidity_metrics(
+        symbol, typical_order_qty, "Sell", depth, ticker
+    )
 
     # Determine worst case (higher slippage)
     worst_slippage = max(
@@ -359,51 +711,45 @@ def analyze_symbol_liquidity(symbol: str, typical_order_qty: float) -> Dict:
 
 
 def get_liquidity_report() -> str:
-    """Generate a comprehensive liquidity analysis report."""
-    data = load_liquidity_data()
-    now = datetime.now(ZoneInfo("Asia/Tehran"))
-
-    # Get recent orders
-    recent_orders = [
-        ex
-        for ex in data["order_executions"]
-        if datetime.fromisoformat(ex["placed_at"]) > now - timedelta(days=7)
-    ]
+    """
+    Generate a comprehensive liquidity analysis report.
+    Reads the per-day/per-symbol aggregates only (at most 7 days x symbols rows).
+    """
+    now = datetime.now(TIMEZONE)
+    first_day = (now - timedelta(days=REPORT_DAYS - 1)).strftime("%Y-%m-%d")
+    rows = db.query(
+        "SELECT symbol, SUM(total) AS total, SUM(filled) AS filled, "
+        "SUM(partial) AS partial, SUM(slippage_sum) AS slippage_sum, "
+        "SUM(slippage_count) AS slippage_count "
+        "FROM liquidity_daily WHERE day >= ? GROUP BY symbol ORDER BY symbol",
+        (first_day,),
+    )
 
     # Analyze execution quality
-    total_orders = len(recent_orders)
-    filled_orders = [o for o in recent_orders if o.get("filled_at")]
-    partial_fills = [o for o in filled_orders if o.get("fill_percentage", 100) < 100]
-
-    avg_slippage = 0.0
-    if filled_orders:
-        slippages = [o.get("slippage", 0) for o in filled_orders if o.get("slippage")]
-        avg_slippage = sum(slippages) / len(slippages) if slippages else 0.0
-
-    # Group by symbol
-    symbol_stats = {}
-    for order in recent_orders:
-        symbol = order["symbol"]
-        if symbol not in symbol_stats:
-            symbol_stats[symbol] = {
-                "total": 0,
-                "filled": 0,
-                "partial": 0,
-                "avg_slippage": 0.0,
-            }
-
-        symbol_stats[symbol]["total"] += 1
-        if order.get("filled_at"):
-            symbol_stats[symbol]["filled"] += 1
-            if order.get("fill_percentage", 100) < 100:
-                symbol_stats[symbol]["partial"] += 1
+    symbol_stats = {
+        row["symbol"]: {
+            "total": row["total"],
+            "filled": row["filled"],
+            "partial": row["partial"],
+        }
+        for row in rows
+    }
+    total_orders = sum(row["total"] for row in rows)
+    filled_orders = sum(row["filled"] for row in rows)
+    partial_fills = sum(row["partial"] for row in rows)
+    slippage_count = sum(row["slippage_count"] for row in rows)
+    avg_slippage = (
+        sum(row["slippage_sum"] for row in rows) / slippage_count
+        if slippage_count
+        else 0.0
+    )
 
     report = (
         f"📊 **Liquidity Analysis Report**\n\n"
         f"📅 **Last 7 Days:**\n"
         f"   • Total Orders: {total_orders}\n"
-        f"   • Filled Orders: {len(filled_orders)}\n"
-        f"   • Partial Fills: {len(partial_fills)}\n"
+        f"   • Filled Orders: {filled_orders}\n"
+        f"   • Partial Fills: {partial_fills}\n"
         f"   • Avg Slippage: {avg_slippage:.3f}%\n\n"
     )
 
@@ -419,6 +765,32 @@ def get_liquidity_report() -> str:
                 f"{stats['partial']} partial ({partial_rate:.1f}%)\n"
             )
 
+    # Realized execution (private execution stream) vs the depth-walk model
+    model = db.query_one(
+        "SELECT COUNT(r.realized_slippage) AS realized, "
+        "AVG(r.realized_slippage) AS avg_realized, "
+        "COUNT(r.predicted_slippage) AS predicted, "
+        "AVG(r.predicted_slippage) AS avg_predicted, "
+        "AVG(ABS(r.realized_slippage - r.predicted_slippage)) AS mean_abs_error, "
+        "AVG(r.first_exec_ms - o.placed_ts * 1000) AS avg_latency_ms "
+        "FROM liquidity_orders o JOIN liquidity_realized r ON r.order_id = o.order_id "
+        "WHERE o.placed_ts >= ?",
+        ((now - timedelta(days=REPORT_DAYS)).timestamp(),),
+    )
+    if model and model["realized"]:
+        report += (
+            f"\n🎯 **Realized vs Model:**\n"
+            f"   • Orders with executions: {model['realized']}\n"
+            f"   • Avg Realized Slippage: {model['avg_realized']:.3f}%\n"
+            f"   • Avg First-Fill Latency: {model['avg_latency_ms']:.0f} ms\n"
+        )
+        if model["predicted"]:
+            report += (
+                f"   • Avg Predicted Slippage: {model['avg_predicted']:.3f}% "
+                f"({model['predicted']} orders)\n"
+                f"   • Mean Abs Error: {model['mean_abs_error']:.3f}%\n"
+            )
+
     report += (
         f"\n💡 **Note:** This analysis is based on {'DEMO' if IS_DEMO else 'LIVE'} account data.\n"
         f"In live trading, liquidity may vary significantly.\n"
@@ -1,13 +1,10 @@
 import asyncio
-from clients import telClient
+import clients
 from telegram_queue_processor import (
     process_telegram_queue,
     register_telegram_handlers,
     telegram_queue,
 )
-from ws_handlers import (
-    order_callback_ws,
-)
 from config import (
     IS_DEMO,
     SELECTED_API_KEY,
@@ -17,10 +14,10 @@ from config import (
     MAX_LOSS_USDT,
     TARGET_PROFIT_USDT,
 )
-from pybit.unified_trading import WebSocket
 from errors import send_error_to_telegram
-from cache import periodic_refresh, init_redis
 from telegram_commands import register_command_handlers
+from ws_journal import stop_journal
+from startup import run_startup
 
 
 async def main():
@@ -35,24 +32,6 @@ async def main():
         f"TARGET_PROFIT_USDT:{TARGET_PROFIT_USDT}\n",
         f"=================================",
     )
-    loop = asyncio.get_running_loop()
-
-    # Initialization Redis and Start periodic refresh (every 1 hour)
-    await init_redis()
-    asyncio.create_task(periodic_refresh(interval_seconds=3600))
-
-    # Start Telegram Client
-    await telClient.start()
-    print("[INFO] Telegram client started")
-
-    # Register Telegram message handler
-    register_telegram_handlers(source_channel=SELECTED_SOURCE_CHANNEL)
-
-    # Register Telegram commands bot
-    register_command_handlers()
-
-    # Start Telegram processing queue
-    asyncio.create_task(process_telegram_queue())
 
     # Handle global exceptions
     def handle_global_exception(loop, context):
@@ -60,24 +39,26 @@ async def main():
         if error:
             asyncio.create_task(send_error_to_telegram(error, context="GLOBAL"))
 
-    loop = asyncio.get_event_loop()
-    loop.set_exception_handler(handle_global_exception)
+    asyncio.get_running_loop().set_exception_handler(handle_global_exception)
 
-    # Start Bybit WebSocket
-    ws = WebSocket(
-        api_key=SELECTED_API_KEY,
-        api_secret=SELECTED_API_SECRET,
-        demo=IS_DEMO,
-        testnet=False,
-        channel_type="private",
-    )
+    # Handlers can be registered before login; messages only flow after it
+    register_telegram_handlers(source_channel=SELECTED_SOURCE_CHANNEL)
+    register_command_handlers()
 
-    callback = order_callback_ws(loop, telegram_queue)
+    # Queue workers start now; items received during startup wait in the
+    # dispatcher for the readiness gate opened by the startup orchestrator
+    asyncio.create_task(process_telegram_queue())
 
-    ws.order_stream(callback)
+    try:
+        # db, Redis, Telegram login, private WS and cache warm-up, concurrently
+        await run_startup(telegram_queue)
 
-    # Run until Telegram client disconnected
-    await telClient.run_until_disconnected()
+        # Run until Telegram client disconnected
+        await clients.telClient.run_until_disconnected()
+    finally:
+        stop_journal()
+        # aiohttp sessions must be closed on the loop that opened them
+        await clients.close_clients()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,308 @@
+"""
+Market Data Module
+Local L2 order books from the public linear WebSocket (tickers from the same
+connection feed ticker_cache).
+- One multiplexed public connection, subscribed to orderbook.50 and tickers
+  for an interest set: open positions + recently signalled symbols + the
+  configured watchlist. The set is re-synced periodically.
+- Books are maintained from snapshot + delta messages (pybit's own book
+  handling deep-copies the whole book on every push, so raw messages are
+  routed to us instead). Deltas must continue the update id (u) of the
+  book; a gap, or a delta before the first snapshot, marks the book cold and
+  the orderbook topic is resubscribed right away for a fresh snapshot
+  (retried by the interest sync until one arrives).
+- Readers get the in-memory book or None (cold miss / stale) and fall back to REST.
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from threading import Lock
+from typing import Dict, Optional
+
+from pybit.unified_trading import WebSocket
+from config import MARKET_WATCHLIST, open_positions
+import position_book
+import ticker_cache
+
+ORDERBOOK_DEPTH = 50
+BOOK_MAX_AGE = 30  # seconds without any message before a book counts as stale
+RECENT_SIGNAL_TTL = 3600  # seconds a signalled symbol stays in the interest set
+INTEREST_SYNC_INTERVAL = 10  # seconds
+RESYNC_RETRY = 10  # seconds a resync may take before it is requested again
+
+_lock = Lock()
+_books: Dict[str, "L2Book"] = {}
+_recent_signals: Dict[str, float] = {}  # symbol -> monotonic time of last signal
+_subscribed: set = set()
+# Cold books waiting for a fresh snapshot: symbol -> monotonic time requested
+_resync_pending: Dict[str, float] = {}
+_ws: Optional[WebSocket] = None
+market_data_stats = {"book_hits": 0, "misses": 0, "resyncs": 0, "gaps": 0}
+
+
+# ---------------- L2 BOOK ---------------- #
+class L2Book:
+    """Price -> size maps per side, rebuilt on snapshot, patched on delta."""
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids: Dict[float, float] = {}
+        self.asks: Dict[float, float] = {}
+        self.update_id = 0
+        self.cold = True  # no usable snapshot (none yet, or a delta was missed)
+        self.seq = 0
+        self.ts = 0  # exchange timestamp (ms)
+        self.updated_at = 0.0  # local monotonic time of last message
+
+    def apply_snapshot(self, data: dict, ts: int):
+        self.bids = {float(p): float(s) for p, s in data.get("b", [])}
+        self.asks = {float(p): float(s) for p, s in data.get("a", [])}
+        self.cold = False
+        self._stamp(data, ts)
+
+    def apply_delta(self, data: dict, ts: int) -> bool:
+        """Patch the book; False (book left cold) if the delta doesn't follow on."""
+        if self.cold:
+            return False
+        update_id = data.get("u")
+        if update_id is not None and update_id != self.update_id + 1:
+            self.cold = True
+            return False
+        for side, levels in (
+            (self.bids, data.get("b", [])),
+            (self.asks, data.get("a", [])),
+        ):
+            for price, size in levels:
+                price, size = float(price), float(size)
+                if size == 0:
+                    side.pop(price, None)
+                else:
+                    side[price] = size
+        self._stamp(data, ts)
+        return True
+
+    def _stamp(self, data: dict, ts: int):
+        self.update_id = data.get("u", self.update_id)
+        self.seq = data.get("seq", self.seq)
+        self.ts = ts
+        self.updated_at = time.monotonic()
+
+    def top(self, limit: int) -> dict:
+        """Best `limit` levels per side as [[price, size], ...] (best first)."""
+        return {
+            "bids": [
+                [p, self.bids[p]] for p in sorted(self.bids, reverse=True)[:limit]
+            ],
+            "asks": [[p, self.asks[p]] for p in sorted(self.asks)[:limit]],
+            "timestamp": self.ts,
+        }
+
+
+def _on_orderbook(msg: dict):
+    symbol = msg.get("data", {}).get("s")
+    if not symbol:
+        return
+    with _lock:
+        book = _books.get(symbol)
+        if book is None:
+            book = _books[symbol] = L2Book(symbol)
+        data = msg["data"]
+        # u == 1 means the service restarted and the message is a fresh snapshot
+        if msg.get("type") == "snapshot" or data.get("u") == 1:
+            book.apply_snapshot(data, msg.get("ts", 0))
+            _resync_pending.pop(symbol, None)
+            return
+        if book.apply_delta(data, msg.get("ts", 0)) or symbol in _resync_pending:
+            return
+        _resync_pending[symbol] = time.monotonic()
+        market_data_stats["gaps"] += 1
+        print(
+            f"[MARKET_DATA][WARN] {symbol} book out of sequence at "
+            f"u={data.get('u')} (had {book.update_id}), resyncing"
+        )
+    _request_snapshot(symbol)
+
+
+def _request_snapshot(symbol: str):
+    """Resubscribe the orderbook topic (a new subscription starts with a snapshot)."""
+    try:
+        _ws.resync(f"orderbook.{ORDERBOOK_DEPTH}.{symbol}")
+    except Exception as e:
+        # Requested again by the interest sync
+        print(f"[MARKET_DATA][ERROR] Resync {symbol} failed: {e}")
+
+
+def _on_ticker(msg: dict):
+    data = msg.get("data", {})
+    symbol = data.get("symbol")
+    if symbol:
+        # Deltas only carry changed fields
+        ticker_cache.apply_ticker(symbol, data, snapshot=msg.get("type") == "snapshot")
+
+
+class _RawPublicWebSocket(WebSocket):
+    """
+    Hand raw snapshot/delta messages to the callback (no pybit-side book copy).
+    Subscriptions are one topic each and are dropped as soon as the unsubscribe
+    is sent (pybit keeps the callback until the server acks, so subscribing
+    the topic again in between fails). resync() cycles a topic on the server
+    while keeping its callback.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._resyncs: Dict[str, str] = {}  # req_id -> topic of resync requests
+        super().__init__(*args, **kwargs)
+
+    def unsubscribe(self, topic: str):
+        for req_id, subscription in list(self.subscriptions.items()):
+            message = json.loads(subscription)
+            if topic in message["args"]:
+                del self.subscriptions[req_id]
+                message["op"] = "unsubscribe"
+                self.ws.send(json.dumps(message))
+        self.callback_directory.pop(topic, None)
+
+    def resync(self, topic: str):
+        """Unsubscribe the topic on the server, then subscribe it again once acked."""
+        self._send_op("unsubscribe", topic)
+
+    def _send_op(self, op: str, topic: str):
+        req_id = str(uuid.uuid4())
+        self._resyncs[req_id] = topic
+        self.ws.send(json.dumps({"op": op, "req_id": req_id, "args": [topic]}))
+
+    def _process_subscription_message(self, message):
+        topic = self._resyncs.pop(message.get("req_id"), None)
+        if message.get("success") is False:
+            print(
+                f"[MARKET_DATA][ERROR] Subscribe {topic or message.get('req_id')} "
+                f"failed: {message.get('ret_msg')}"
+            )
+
+    def _process_unsubscription_message(self, message):
+        topic = self._resyncs.pop(message.get("req_id"), None)
+        if topic is not None:
+            # Acked (or already gone on the server): subscribe again
+            self._send_op("subscribe", topic)
+        elif message.get("success") is False:
+            print(
+                f"[MARKET_DATA][WARN] Unsubscribe {message.get('req_id')} "
+                f"failed: {message.get('ret_msg')}"
+            )
+
+    def _process_normal_message(self, message):
+        callback_function = self.callback_directory.get(message["topic"])
+        if callback_function is not None:  # None: late message of a dropped topic
+            callback_function(message)
+
+
+# ---------------- READ API ---------------- #
+def get_order_book(symbol: str, limit: int = ORDERBOOK_DEPTH) -> Optional[dict]:
+    """Local book in the REST get_order_book_depth format, None if cold/stale."""
+    with _lock:
+        book = _books.get(symbol)
+        if (
+            book
+            and not book.cold
+            and time.monotonic() - book.updated_at <= BOOK_MAX_AGE
+        ):
+            market_data_stats["book_hits"] += 1
+            return book.top(limit)
+    market_data_stats["misses"] += 1
+    return None
+
+
+# ---------------- INTEREST SET ---------------- #
+def note_signal(symbol: str):
+    """Mark a symbol as recently signalled and subscribe to it right away."""
+    _recent_signals[symbol] = time.monotonic()
+    if _ws is not None and symbol not in _subscribed:
+        asyncio.create_task(sync_interest_set())
+
+
+def interest_set() -> set:
+    now = time.monotonic()
+    for symbol, seen in list(_recent_signals.items()):
+        if now - seen > RECENT_SIGNAL_TTL:
+            _recent_signals.pop(symbol, None)
+    return (
+        position_book.open_symbols()
+        | set(open_positions)
+        | set(_recent_signals)
+        | set(MARKET_WATCHLIST)
+    )
+
+
+def _subscribe(symbol: str):
+    _ws.orderbook_stream(depth=ORDERBOOK_DEPTH, symbol=symbol, callback=_on_orderbook)
+    _ws.ticker_stream(symbol=symbol, callback=_on_ticker)
+
+
+def _unsubscribe(symbol: str):
+    _ws.unsubscribe(f"orderbook.{ORDERBOOK_DEPTH}.{symbol}")
+    _ws.unsubscribe(f"tickers.{symbol}")
+    with _lock:
+        _books.pop(symbol, None)
+        _resync_pending.pop(symbol, None)
+
+
+async def sync_interest_set():
+    """Subscribe to new interesting symbols and drop the ones no longer needed."""
+    if _ws is None:
+        return
+    wanted = interest_set()
+    added = wanted - _subscribed
+    removed = _subscribed - wanted
+    # Mark first so concurrent syncs don't subscribe twice
+    _subscribed.update(added)
+    _subscribed.difference_update(removed)
+
+    for symbol in added:
+        try:
+            # pybit blocks until the socket is connected
+            await asyncio.to_thread(_subscribe, symbol)
+        except Exception as e:
+            _subscribed.discard(symbol)
+            print(f"[MARKET_DATA][ERROR] Subscribe {symbol} failed: {e}")
+    for symbol in removed:
+        try:
+            await asyncio.to_thread(_unsubscribe, symbol)
+        except Exception as e:
+            print(f"[MARKET_DATA][ERROR] Unsubscribe {symbol} failed: {e}")
+
+    # Resyncs that got no snapshot in time (request or reply lost) go again
+    now = time.monotonic()
+    with _lock:
+        overdue = [
+            symbol
+            for symbol, requested in _resync_pending.items()
+            if symbol in _subscribed and now - requested > RESYNC_RETRY
+        ]
+        for symbol in overdue:
+            _resync_pending[symbol] = now
+    for symbol in overdue:
+        _request_snapshot(symbol)
+
+    if added or removed:
+        market_data_stats["resyncs"] += 1
+        print(
+            f"[MARKET_DATA] Interest set: {len(_subscribed)} symbol(s) "
+            f"(+{len(added)} / -{len(removed)})"
+        )
+
+
+async def start_market_data(interval_seconds: int = INTEREST_SYNC_INTERVAL):
+    """Open the public stream and keep the subscriptions in line with the interest set."""
+    global _ws
+    _ws = await asyncio.to_thread(
+        _RawPublicWebSocket, testnet=False, channel_type="linear"
+    )
+    print("[MARKET_DATA] Public linear stream connected")
+    while True:
+        try:
+            await sync_interest_set()
+        except Exception as e:
+            print(f"[MARKET_DATA][ERROR] Interest sync failed: {e}")
+        await asyncio.sleep(interval_seconds)
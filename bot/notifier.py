@@ -0,0 +1,233 @@
+"""
+Notifier Module
+Outbound Telegram message scheduler. Producers call notify() and return
+immediately; a single sender task schedules deliveries with:
+- a token-bucket rate limit per destination chat
+- one send in flight per chat, run as its own task: a slow chat never holds
+  up the others
+- FloodWaitError and send failures pause only that chat (not-before time);
+  the message is put back and retried, nobody sleeps
+- per-symbol coalescing: events within a short window go out as one message
+- bounded memory: low-priority notices are dropped first and summarized
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+from telethon.errors import FloodWaitError
+import clients
+from config import TARGET_CHANNEL
+
+# ---------------- PRIORITIES ---------------- #
+PRIORITY_HIGH = 0  # errors, fills that change risk (SL/TP triggered, closes)
+PRIORITY_NORMAL = 1  # order placed / filled, warnings
+PRIORITY_LOW = 2  # informational (SL/TP created, cancellations)
+
+# ---------------- SETTINGS ---------------- #
+RATE_PER_SECOND = 1.0  # sustained messages per chat
+BURST = 3  # token bucket size
+COALESCE_WINDOW = 1.5  # seconds a per-symbol message waits for siblings
+MAX_PENDING_PER_CHAT = 200
+MAX_MESSAGE_LENGTH = 4000  # Telegram hard limit is 4096
+SEND_RETRIES = 3
+RETRY_BACKOFF = 1.0  # seconds, times the attempt number
+
+
+class _ChatState:
+    def __init__(self):
+        self.tokens = float(BURST)
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0.0  # not-before time (FloodWait / retry backoff)
+        self.sending: Optional[asyncio.Task] = None
+        self.pending: List[Dict] = []
+        self.dropped = 0
+
+    def refill(self, now: float):
+        self.tokens = min(
+            BURST, self.tokens + (now - self.last_refill) * RATE_PER_SECOND
+        )
+        self.last_refill = now
+
+
+_chats: Dict[int, _ChatState] = {}
+_wakeup: Optional[asyncio.Event] = None
+_sender_task: Optional[asyncio.Task] = None
+notifier_stats = {
+    "queued": 0,
+    "sent": 0,
+    "coalesced": 0,
+    "dropped": 0,
+    "flood_waits": 0,
+}
+
+
+def _get_wakeup() -> asyncio.Event:
+    global _wakeup
+    if _wakeup is None:
+        _wakeup = asyncio.Event()
+    return _wakeup
+
+
+# ---------------- PRODUCER API ---------------- #
+def notify(
+    text: str,
+    symbol: Optional[str] = None,
+    priority: int = PRIORITY_NORMAL,
+    chat: int = TARGET_CHANNEL,
+):
+    """
+    Queue a message for delivery (never blocks).
+    Messages with a symbol are coalesced with other messages for the same
+    symbol and chat that are still waiting in the coalescing window.
+    """
+    if not text:
+        return
+    now = time.monotonic()
+    state = _chats.setdefault(chat, _ChatState())
+    notifier_stats["queued"] += 1
+
+    if symbol:
+        for message in state.pending:
+            if (
+                message["symbol"] == symbol
+                and message["ready_at"] > now
+                and len(message["text"]) + len(text) + 2 <= MAX_MESSAGE_LENGTH
+            ):
+                message["text"] += "\n\n" + text
+                message["priority"] = min(message["priority"], priority)
+                message["count"] += 1
+                notifier_stats["coalesced"] += 1
+                return
+
+    if len(state.pending) >= MAX_PENDING_PER_CHAT and not _make_room(state, priority):
+        state.dropped += 1
+        notifier_stats["dropped"] += 1
+        return
+
+    state.pending.append(
+        {
+            "text": text[:MAX_MESSAGE_LENGTH],
+            "symbol": symbol,
+            "priority": priority,
+            "created": now,
+            "ready_at": now + COALESCE_WINDOW if symbol else now,
+            "count": 1,
+            "attempts": 0,
+        }
+    )
+    _get_wakeup().set()
+
+
+def _make_room(state: _ChatState, incoming_priority: int) -> bool:
+    """Drop the oldest lowest-priority message if it ranks below the incoming one."""
+    victim = max(state.pending, key=lambda m: (m["priority"], -m["created"]))
+    if victim["priority"] <= incoming_priority:
+        return False
+    state.pending.remove(victim)
+    state.dropped += victim["count"]
+    notifier_stats["dropped"] += victim["count"]
+    return True
+
+
+async def send_now(text: str, chat: int = TARGET_CHANNEL):
+    """Bypass the scheduler (startup/shutdown messages, tests)."""
+    await clients.telClient.send_message(chat, text)
+
+
+# ---------------- SENDER ---------------- #
+def _next_message(state: _ChatState, now: float) -> Optional[Dict]:
+    ready = [m for m in state.pending if m["ready_at"] <= now]
+    if not ready:
+        return None
+    return min(ready, key=lambda m: (m["priority"], m["created"]))
+
+
+async def _deliver(chat: int, state: _ChatState, message: Dict):
+    """
+    One send attempt (runs as the chat's in-flight task). On failure the
+    message goes back to the chat's queue and the chat gets a not-before time.
+    """
+    try:
+        await clients.telClient.send_message(chat, message["text"])
+        notifier_stats["sent"] += 1
+    except FloodWaitError as e:
+        # Pause only this chat; the message is not counted as a failed attempt
+        notifier_stats["flood_waits"] += 1
+        state.blocked_until = time.monotonic() + e.seconds + 1
+        state.pending.append(message)
+        print(f"[NOTIFIER][WARN] FloodWait {e.seconds}s for chat {chat}")
+    except Exception as e:
+        message["attempts"] = message.get("attempts", 0) + 1
+        attempt = message["attempts"]
+        print(f"[NOTIFIER][ERROR] Send failed (attempt {attempt}): {e}")
+        if attempt < SEND_RETRIES:
+            state.blocked_until = time.monotonic() + RETRY_BACKOFF * attempt
+            state.pending.append(message)
+        else:
+            print(f"[NOTIFIER][ERROR] Dropping message after {SEND_RETRIES} attempts")
+    finally:
+        state.sending = None
+        _get_wakeup().set()
+
+
+async def _sender_loop():
+    wakeup = _get_wakeup()
+    while True:
+        now = time.monotonic()
+        next_wake = None
+
+        for chat, state in list(_chats.items()):
+            if state.dropped and not state.pending:
+                state.pending.append(
+                    {
+                        "text": f"⚠️ {state.dropped} low-priority notice(s) dropped (backlog)",
+                        "symbol": None,
+                        "priority": PRIORITY_NORMAL,
+                        "created": now,
+                        "ready_at": now,
+                        "count": 1,
+                        "attempts": 0,
+                    }
+                )
+                state.dropped = 0
+
+            if not state.pending or state.sending is not None:
+                # Nothing to send, or the chat's send finishes and wakes us
+                continue
+            if state.blocked_until > now:
+                wake = state.blocked_until
+            else:
+                state.refill(now)
+                message = _next_message(state, now)
+                if message is None:
+                    wake = min(m["ready_at"] for m in state.pending)
+                elif state.tokens < 1:
+                    wake = now + (1 - state.tokens) / RATE_PER_SECOND
+                else:
+                    state.tokens -= 1
+                    state.pending.remove(message)
+                    state.sending = asyncio.create_task(
+                        _deliver(chat, state, message)
+                    )
+                    continue
+            next_wake = wake if next_wake is None else min(next_wake, wake)
+
+        wakeup.clear()
+        timeout = None if next_wake is None else max(0.0, next_wake - time.monotonic())
+        try:
+            await asyncio.wait_for(wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+def start_notifier():
+    """Start the sender task (idempotent)."""
+    global _sender_task
+    if _sender_task is None or _sender_task.done():
+        _sender_task = asyncio.create_task(_sender_loop())
+    return _sender_task
+
+
+def pending_count() -> int:
+    return sum(len(state.pending) for state in _chats.values())
@@ -0,0 +1,176 @@
+"""
+Position Book Module
+In-memory position book fed by the private `position` WebSocket topic.
+Open-position checks and TP classification read from here in O(1); a periodic
+REST reconciliation corrects any drift (missed messages, reconnects).
+"""
+
+import asyncio
+from threading import Lock
+from typing import Dict, Optional
+
+from api import get_all_positions
+from config import SETTLE_COIN
+import leverage_cache
+
+# Lock for thread-safe access (pybit WS callbacks run on their own thread)
+_book_lock = Lock()
+_book: Dict[str, dict] = {}
+# Bumped by every WS update; entries remember the version that wrote them so a
+# REST snapshot can tell which entries changed while it was in flight
+_version = 0
+# Becomes True after the first REST snapshot; before that the book can't
+# answer "not open" with confidence and callers should fall back to REST
+_synced = False
+
+
+# ---------------- BOOK UPDATES ---------------- #
+def _to_entry(data: dict) -> dict:
+    """Extract the fields we keep from a REST or WS position record."""
+    return {
+        "symbol": data.get("symbol"),
+        "side": data.get("side", ""),
+        "size": float(data.get("size") or 0),
+        # REST uses avgPrice, the WS position topic uses entryPrice
+        "avgPrice": float(data.get("avgPrice") or data.get("entryPrice") or 0),
+        "stopLoss": float(data.get("stopLoss") or 0),
+        "takeProfit": float(data.get("takeProfit") or 0),
+        "leverage": float(data.get("leverage") or 0),
+        "seq": int(data.get("seq") or 0),
+        "version": 0,
+    }
+
+
+def apply_position_update(data: dict):
+    """Apply one position record. Stale updates (lower seq) are ignored."""
+    entry = _to_entry(data)
+    symbol = entry["symbol"]
+    if not symbol:
+        return
+
+    global _version
+    with _book_lock:
+        current = _book.get(symbol)
+        if current and entry["seq"] and entry["seq"] < current["seq"]:
+            return
+        if entry["size"] == 0:
+            # Keep the record (leverage, seq) but mark it flat
+            entry["side"] = ""
+        _version += 1
+        entry["version"] = _version
+        _book[symbol] = entry
+    leverage_cache.observe(symbol, entry["leverage"])
+
+
+def book_version() -> int:
+    """Current WS version; take it before a REST request and pass it to replace_book."""
+    with _book_lock:
+        return _version
+
+
+def replace_book(positions: list, since: Optional[int] = None) -> int:
+    """
+    Replace the book with a REST snapshot. Returns number of drifts fixed.
+    since: book_version() taken when the REST request started. Entries the WS
+    wrote after that are newer than the snapshot and are kept as they are.
+    """
+    global _synced
+    snapshot = {}
+    for data in positions:
+        entry = _to_entry(data)
+        if entry["symbol"]:
+            snapshot[entry["symbol"]] = entry
+
+    with _book_lock:
+        drift = 0
+        for symbol in set(_book) | set(snapshot):
+            old = _book.get(symbol)
+            new = snapshot.get(symbol)
+            if old and since is not None and old["version"] > since:
+                # Updated over WS while the REST call was in flight (e.g. a
+                # position opened after REST read it as absent)
+                continue
+            if new is None:
+                # REST omits flat positions: keep the record (leverage) as flat
+                new = {**old, "size": 0.0, "side": ""}
+            elif old and old["seq"] > new["seq"]:
+                # A newer WS update landed while the REST call was in flight
+                continue
+            if (old["size"] if old else 0) != new["size"]:
+                drift += 1
+            _book[symbol] = new
+        _synced = True
+    # Records REST returned (and that weren't superseded) confirm leverage
+    for symbol, entry in snapshot.items():
+        if _book.get(symbol) is entry:
+            leverage_cache.observe(symbol, entry["leverage"])
+    return drift
+
+
+# ---------------- READ API ---------------- #
+def is_synced() -> bool:
+    return _synced
+
+
+def get_position(symbol: str) -> Optional[dict]:
+    """Return a copy of the position entry for symbol (None if unknown)."""
+    with _book_lock:
+        entry = _book.get(symbol)
+        return dict(entry) if entry else None
+
+
+def is_open(symbol: str) -> Optional[bool]:
+    """
+    True/False when the book is synced, None when it can't tell yet
+    (caller should fall back to REST).
+    """
+    with _book_lock:
+        entry = _book.get(symbol)
+        if entry and entry["size"] != 0:
+            return True
+    return False if _synced else None
+
+
+def open_symbols() -> set:
+    with _book_lock:
+        return {symbol for symbol, entry in _book.items() if entry["size"] != 0}
+
+
+# ---------------- WS CALLBACK ---------------- #
+def position_callback_ws():
+    """Callback for pybit `ws.position_stream` (runs on the WS thread)."""
+
+    def _callback(msg):
+        try:
+            for data in msg.get("data", []):
+                if data.get("category", "linear") == "linear":
+                    apply_position_update(data)
+        except Exception as e:
+            print(f"[POSITION_BOOK][ERROR] Failed to apply WS update: {e}")
+
+    return _callback
+
+
+# ---------------- REST RECONCILIATION ---------------- #
+async def reconcile_positions():
+    """Rebuild the book from a REST snapshot and log any drift."""
+    try:
+        since = book_version()
+        # Every page first: a symbol missing from the snapshot counts as flat
+        positions = await get_all_positions(SETTLE_COIN)
+        drift = replace_book(positions, since)
+        if drift:
+            print(f"[POSITION_BOOK][WARN] Reconciled {drift} drifted position(s)")
+        else:
+            print(f"[POSITION_BOOK] Synced ({len(open_symbols())} open)")
+    except Exception as e:
+        print(f"[POSITION_BOOK][ERROR] Reconciliation failed: {e}")
+
+
+async def periodic_position_reconcile(interval_seconds: int = 60, warmup: bool = True):
+    """Initial snapshot (unless startup already took it), then periodic reconciliation."""
+    if not warmup:
+        await asyncio.sleep(interval_seconds)
+    while True:
+        await reconcile_positions()
+        await asyncio.sleep(interval_seconds)
@@ -0,0 +1,201 @@
+"""
+Position Context Module
+Per-position context the TP/SL handlers need after entry: entry time (for the
+30-minute rule) and the signal's entry / TP / SL prices (to tell which level
+triggered). One context per symbol (one-way mode), tagged with its entry order.
+- Reads come from memory.
+- Writes are write-behind: memory is updated at once and the row is queued
+  to the db writer thread, so the signal path never waits on disk.
+- At startup restore_contexts() bulk-loads the table, drops contexts whose
+  position is no longer open, and gives up after RESTORE_TIMEOUT so a slow
+  disk can't hold startup.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from threading import Lock
+from typing import Dict, Optional
+
+import db
+import position_book
+
+RESTORE_TIMEOUT = 5  # seconds
+
+_lock = Lock()
+_contexts: Dict[str, dict] = {}
+# Symbols written or cleared since start: newer than anything in the table
+_touched: set = set()
+# Set once the stored contexts are loaded (or the restore gave up)
+_restored = asyncio.Event()
+
+
+# ---------------- STORAGE ---------------- #
+def _init_schema(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS position_context (
+            symbol TEXT PRIMARY KEY,
+            order_id TEXT,
+            side TEXT,
+            entry REAL,
+            sl REAL,
+            tp1 REAL,
+            tp2 REAL,
+            tp3 REAL,
+            entry_ts REAL NOT NULL,
+            updated_ts REAL NOT NULL
+        )
+        """)
+
+
+db.register_schema(_init_schema)
+
+
+def _row_to_context(row) -> dict:
+    tp_prices = {
+        "entry": row["entry"],
+        "tp1": row["tp1"],
+        "tp2": row["tp2"],
+        "sl": row["sl"],
+        "side": row["side"],
+    }
+    if row["tp3"] is not None:
+        tp_prices["tp3"] = row["tp3"]
+    return {
+        "order_id": row["order_id"],
+        "entry_time": datetime.fromtimestamp(row["entry_ts"]),
+        "tp_prices": tp_prices,
+    }
+
+
+# ---------------- WRITES ---------------- #
+def record_entry(
+    symbol: str,
+    signal: dict,
+    order_id: Optional[str] = None,
+    entry_time: Optional[datetime] = None,
+):
+    """Store the context of a freshly opened position (replaces any previous one)."""
+    entry_time = entry_time or datetime.now()
+    targets = signal["targets"]
+    tp_prices = {
+        "entry": signal["entry"],
+        "tp1": targets[0],
+        "tp2": targets[1],
+        "sl": signal["sl"],
+        "side": signal["side"],
+    }
+    if len(targets) >= 3:
+        tp_prices["tp3"] = targets[2]
+
+    with _lock:
+        _contexts[symbol] = {
+            "order_id": order_id,
+            "entry_time": entry_time,
+            "tp_prices": tp_prices,
+        }
+        _touched.add(symbol)
+
+    db.execute_write(
+        "INSERT OR REPLACE INTO position_context (symbol, order_id, side, entry, "
+        "sl, tp1, tp2, tp3, entry_ts, updated_ts) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            symbol,
+            order_id,
+            tp_prices["side"],
+            tp_prices["entry"],
+            tp_prices["sl"],
+            tp_prices["tp1"],
+            tp_prices["tp2"],
+            tp_prices.get("tp3"),
+            entry_time.timestamp(),
+            time.time(),
+        ),
+    )
+
+
+def clear(symbol: str):
+    """Forget the context of a closed position."""
+    with _lock:
+        known = _contexts.pop(symbol, None) is not None
+        _touched.add(symbol)
+    if known or not _restored.is_set():
+        db.execute_write("DELETE FROM position_context WHERE symbol = ?", (symbol,))
+
+
+# ---------------- READ API ---------------- #
+def get_entry_time(symbol: str) -> Optional[datetime]:
+    with _lock:
+        context = _contexts.get(symbol)
+        return context["entry_time"] if context else None
+
+
+def get_tp_prices(symbol: str) -> Optional[dict]:
+    """Signal entry / TP / SL prices for symbol (a copy), or None if unknown."""
+    with _lock:
+        context = _contexts.get(symbol)
+        return dict(context["tp_prices"]) if context else None
+
+
+def get_order_id(symbol: str) -> Optional[str]:
+    with _lock:
+        context = _contexts.get(symbol)
+        return context["order_id"] if context else None
+
+
+def all_contexts() -> Dict[str, dict]:
+    """Copies of every context, by symbol."""
+    with _lock:
+        return {
+            symbol: {**context, "tp_prices": dict(context["tp_prices"])}
+            for symbol, context in _contexts.items()
+        }
+
+
+# ---------------- RESTORE ---------------- #
+def _load_rows():
+    return db.query("SELECT * FROM position_context")
+
+
+async def restore_contexts(timeout: float = RESTORE_TIMEOUT) -> int:
+    """
+    Load stored contexts into memory and reconcile them against the position
+    book (call after the first position snapshot). Returns the number restored.
+    """
+    try:
+        rows = await asyncio.wait_for(asyncio.to_thread(_load_rows), timeout)
+    except asyncio.TimeoutError:
+        print(f"[POSITION_CONTEXT][WARN] Restore timed out after {timeout}s")
+        _restored.set()
+        return 0
+
+    synced = position_book.is_synced()
+    open_now = position_book.open_symbols() if synced else set()
+    restored = 0
+    stale = []
+    with _lock:
+        for row in rows:
+            symbol = row["symbol"]
+            if symbol in _touched:
+                continue  # opened or closed again since start
+            if synced and symbol not in open_now:
+                stale.append(symbol)
+                continue
+            _contexts[symbol] = _row_to_context(row)
+            restored += 1
+        missing = open_now - set(_contexts) if synced else set()
+    _restored.set()
+
+    for symbol in stale:
+        db.execute_write("DELETE FROM position_context WHERE symbol = ?", (symbol,))
+    print(
+        f"[POSITION_CONTEXT] Restored {restored} context(s), "
+        f"dropped {len(stale)} closed"
+    )
+    if missing:
+        print(
+            f"[POSITION_CONTEXT][WARN] No stored context for open position(s): "
+            f"{', '.join(sorted(missing))}"
+        )
+    return restored
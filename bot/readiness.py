@@ -0,0 +1,35 @@
+"""
+Readiness Module
+Gate that holds queue processing until startup has warmed the caches the
+signal path reads (symbol specs, position book, tickers, position contexts).
+Signals and WS events that arrive earlier stay parked in the dispatcher
+instead of taking the slow REST fallbacks.
+"""
+
+import asyncio
+
+# Upper bound on how long queued items wait for the gate (a failed warm-up step
+# must not block trading forever)
+READY_TIMEOUT = 30  # seconds
+
+_ready = asyncio.Event()
+
+
+def mark_ready():
+    _ready.set()
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+async def wait_ready(timeout: float = READY_TIMEOUT) -> bool:
+    """Wait for the gate. Returns False if it timed out (caller proceeds anyway)."""
+    if _ready.is_set():
+        return True
+    try:
+        await asyncio.wait_for(_ready.wait(), timeout)
+        return True
+    except asyncio.TimeoutError:
+        print(f"[READINESS][WARN] Not ready after {timeout}s, processing anyway")
+        return False
@@ -0,0 +1,233 @@
+"""
+Signal Parser Module
+Single-pass signal parsing engine driven by declarative channel templates.
+- Every template field (symbol, side, leverage, entry, stop loss, targets) is
+  one token: label + value with named groups. All tokens of all templates are
+  compiled into ONE alternation, so a message is scanned once, left to right,
+  whatever the number of templates.
+- Each template then runs a tiny state machine over the token stream:
+  detection = its `order` fields appear in that order, values = the first
+  occurrence of each field.
+- Tokens do not overlap: a keyword inside the #SYMBOL/QUOTE tag or inside
+  another keyword ("#ARBLONG/USDC", "Shortargets:") is not read as a field
+  (the old per-field searches did read those).
+- Messages without the label of a field every template needs (e.g. Targets)
+  are rejected by one cheap search before tokenizing.
+- No token can span an unbounded ambiguous region (no `.*?` between fields),
+  so the scan is linear in the message length; messages are also capped at
+  MAX_SCAN_LENGTH characters.
+"""
+
+import re
+from typing import Dict, List, Optional, Sequence
+
+# Telegram caps messages at 4096 characters; anything past this is not a signal
+MAX_SCAN_LENGTH = 8192
+
+# Valid float literals only ("1", "1.", "1.5", ".5"), one unambiguous way to match
+NUMBER = r"\d+(?:\.\d*)?|\.\d+"
+
+FIELDS = ("symbol", "side", "leverage", "entry", "stop_loss", "targets")
+
+
+class SignalTemplate:
+    """
+    Declarative description of one channel's signal format.
+
+    Label arguments are regex fragments matched case-insensitively; the value
+    after each label is fixed per field (numbers, an integer leverage, a
+    `separator`-joined number list for targets). `symbol` must define the
+    named groups `base` and `quote`. `order` lists the fields that must
+    appear, in that order, for a message to count as a signal; `required`
+    lists the fields a parsed signal must have.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        symbol: str = r"#\s*(?P<base>[A-Z0-9]+)\s*/\s*(?P<quote>USDT|USDC|USD)",
+        sides: Optional[Dict[str, str]] = None,
+        leverage: str = r"Lev\s*x",
+        entry: str = r"Entry:",
+        stop_loss: str = r"Stop\s*Loss:",
+        targets: str = r"Targets:",
+        separator: str = "-",
+        order: Sequence[str] = ("side", "leverage", "entry", "stop_loss", "targets"),
+        required: Sequence[str] = ("symbol", "side", "entry", "stop_loss", "targets"),
+    ):
+        self.name = name
+        self.sides = {
+            k.lower(): v for k, v in (sides or {"Long": "Buy", "Short": "Sell"}).items()
+        }
+        self.separator = separator
+        self.order = tuple(order)
+        self.required = tuple(required)
+        # field -> token regex (label + value), value groups named `value`
+        self.patterns = {
+            "symbol": symbol,
+            "side": "(?P<value>" + "|".join(re.escape(s) for s in self.sides) + ")",
+            "leverage": leverage + r"(?P<value>\d+)",
+            "entry": entry + rf"\s*(?P<value>{NUMBER})",
+            "stop_loss": stop_loss + rf"\s*(?P<value>{NUMBER})",
+            # The list ends at the line break
+            "targets": targets
+            + rf"\s*(?P<value>(?:{NUMBER})(?:[ \t]*{re.escape(separator)}[ \t]*(?:{NUMBER}))*)",
+        }
+        for field in set(self.order) | set(self.required):
+            if field not in FIELDS:
+                raise ValueError(f"Unknown signal field in template {name}: {field}")
+        # A field that both detection and parsing need: messages without its
+        # label can be rejected before tokenizing
+        labels = {
+            "symbol": symbol,
+            "side": self.patterns["side"],
+            "leverage": leverage,
+            "entry": entry,
+            "stop_loss": stop_loss,
+            "targets": targets,
+        }
+        needed = [field for field in self.order if field in self.required]
+        self.anchor = (
+            re.sub(r"\(\?P<\w+>", "(?:", labels[needed[-1]]) if needed else None
+        )
+
+    def convert(self, field: str, match: re.Match, token: str):
+        """Typed value of one token match (group names prefixed with `token`)."""
+        if field == "symbol":
+            return (
+                match.group(token + "_base") + match.group(token + "_quote")
+            ).upper()
+        value = match.group(token + "_value")
+        if field == "side":
+            return self.sides[value.lower()]
+        if field == "leverage":
+            return int(value)
+        if field == "targets":
+            return [float(x) for x in value.split(self.separator)]
+        return float(value)
+
+
+class SignalScan:
+    """Outcome of one scan: detection flag, parsed signal and matching template."""
+
+    __slots__ = ("is_signal", "signal", "template")
+
+    def __init__(
+        self, is_signal: bool, signal: Optional[Dict], template: Optional[str]
+    ):
+        self.is_signal = is_signal
+        self.signal = signal
+        self.template = template
+
+
+class SignalParser:
+    """All templates compiled into one tokenizer."""
+
+    def __init__(self, templates: Sequence[SignalTemplate]):
+        self.templates = list(templates)
+        # Identical token patterns are shared between templates: the regex
+        # alternation would otherwise only ever report the first of them
+        self._tokens: Dict[str, tuple] = {}  # token name -> (field, [template index])
+        by_pattern: Dict[tuple, str] = {}
+        alternatives = []
+        for index, template in enumerate(self.templates):
+            for field in FIELDS:
+                key = (field, template.patterns[field])
+                token = by_pattern.get(key)
+                if token is None:
+                    token = by_pattern[key] = f"t{len(by_pattern)}"
+                    self._tokens[token] = (field, [])
+                    alternatives.append(
+                        f"(?P<{token}>"
+                        + re.sub(
+                            r"\(\?P<(\w+)>",
+                            rf"(?P<{token}_\1>",
+                            template.patterns[field],
+                        )
+                        + ")"
+                    )
+                self._tokens[token][1].append(index)
+        self._regex = re.compile("|".join(alternatives), re.IGNORECASE)
+        # Cheap first check (most channel traffic is not a signal)
+        anchors = [template.anchor for template in self.templates]
+        self._prefilter = (
+            re.compile("|".join(f"(?:{a})" for a in anchors), re.IGNORECASE)
+            if anchors and all(anchors)
+            else None
+        )
+
+    def scan(self, text: str) -> SignalScan:
+        if not text:
+            return SignalScan(False, None, None)
+        text = text[:MAX_SCAN_LENGTH]
+        if self._prefilter and not self._prefilter.search(text):
+            return SignalScan(False, None, None)
+
+        templates = self.templates
+        stage = [0] * len(templates)  # position in template.order
+        values: List[Dict] = [{} for _ in templates]
+        done = [False] * len(templates)
+        pending = len(templates)  # templates still collecting
+
+        for match in self._regex.finditer(text):
+            token = match.lastgroup
+            field, users = self._tokens[token]
+            for index in users:
+                if done[index]:
+                    continue
+                template = templates[index]
+                found = values[index]
+                if field not in found:  # values: first occurrence
+                    found[field] = template.convert(field, match, token)
+                order = template.order
+                if stage[index] < len(order) and order[stage[index]] == field:
+                    stage[index] += 1
+                if stage[index] == len(order) and len(found) == len(FIELDS):
+                    done[index] = True
+                    pending -= 1
+            if not pending:
+                break  # nothing left to learn from the rest of the message
+
+        fallback = None
+        for index, template in enumerate(templates):
+            found = values[index]
+            signal = None
+            if all(f in found for f in template.required):
+                signal = {
+                    "symbol": found.get("symbol"),
+                    "side": found.get("side"),
+                    "entry": found.get("entry"),
+                    "sl": found.get("stop_loss"),
+                    "targets": found.get("targets"),
+                    "leverage": found.get("leverage"),
+                }
+            if stage[index] == len(template.order):
+                return SignalScan(True, signal, template.name)
+            if fallback is None and signal is not None:
+                fallback = SignalScan(False, signal, template.name)
+        return fallback or SignalScan(False, None, None)
+
+
+# ---------------- TEMPLATES ---------------- #
+# Channel format, e.g.
+#   #BTC/USDT
+#   Long Lev x10
+#   Entry: 65000 - Stop Loss: 63000
+#   Targets: 66000 - 67000 - 68000
+DEFAULT_TEMPLATE = SignalTemplate("default")
+
+TEMPLATES: List[SignalTemplate] = [DEFAULT_TEMPLATE]
+
+_parser = SignalParser(TEMPLATES)
+
+
+def register_template(template: SignalTemplate):
+    """Add a channel format (checked after the existing ones) and recompile."""
+    global _parser
+    TEMPLATES.append(template)
+    _parser = SignalParser(TEMPLATES)
+
+
+def scan_signal(text: str) -> SignalScan:
+    """Detect and parse a message in one pass."""
+    return _parser.scan(text)
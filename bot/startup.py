@@ -0,0 +1,177 @@
+"""
+Startup Module
+Startup orchestrator: independent steps run concurrently and each one is
+timed (StageTimer "startup").
+- db, redis, Telegram login and the private WebSocket connect in parallel.
+- Warm-up steps fill the caches the signal path reads: instruments (disk
+  snapshot), positions, tickers and the stored position contexts and their
+  TP/SL ladders (after the first position snapshot).
+  When they finish the readiness gate opens; queue items received before that
+  stay parked in the dispatcher.
+- The full instrument refresh (once Redis is known) finishes in the
+  background; the gate only waits for it when there is no usable snapshot.
+- Periodic refresh loops start afterwards without repeating the warm-up.
+"""
+
+import asyncio
+
+from pybit.unified_trading import WebSocket
+
+import clients
+import readiness
+from cache import (
+    SYMBOL_SNAPSHOT_MAX_AGE,
+    init_redis,
+    l3_age,
+    load_symbol_snapshot,
+    periodic_refresh,
+    refresh_symbol_info,
+)
+from config import IS_DEMO, SELECTED_API_KEY, SELECTED_API_SECRET
+from db import init_db
+from ladder_state import rebuild_from_journal
+from leverage_cache import periodic_leverage_preset
+from liquidity_analyzer import execution_callback_ws
+from market_data import start_market_data
+from notifier import start_notifier
+from position_context import restore_contexts
+from position_book import (
+    periodic_position_reconcile,
+    position_callback_ws,
+    reconcile_positions,
+)
+from ticker_cache import periodic_ticker_refresh, refresh_tickers
+from timing import StageTimer
+from transaction_history import periodic_transaction_sync
+from ws_handlers import order_callback_ws
+from ws_message_formatter import resume_stop_moves
+
+# Steps the bot cannot run without (startup fails if they do)
+CRITICAL_STEPS = ("telegram", "private_ws")
+# Steps that warm the signal-path caches (the readiness gate waits for these)
+WARMUP_STEPS = ("instruments", "positions", "tickers", "contexts")
+
+# Private WebSocket (kept referenced for the lifetime of the bot)
+private_ws: WebSocket | None = None
+# Last startup breakdown (StageTimer.as_dict())
+startup_timing: dict | None = None
+
+
+# ---------------- STEPS ---------------- #
+async def _start_telegram():
+    await clients.telClient.start()
+    # Outbound messages go through the paced sender
+    start_notifier()
+    print("[INFO] Telegram client started")
+
+
+def _connect_private_ws(loop, telegram_queue):
+    """Connect and subscribe (pybit blocks until connected, so this runs in a thread)."""
+    global private_ws
+    ws = WebSocket(
+        api_key=SELECTED_API_KEY,
+        api_secret=SELECTED_API_SECRET,
+        demo=IS_DEMO,
+        testnet=False,
+        channel_type="private",
+    )
+    ws.order_stream(order_callback_ws(loop, telegram_queue))
+    # Local position book: WS updates + periodic REST reconciliation
+    ws.position_stream(position_callback_ws())
+    # Realized fills (VWAP, latency, slippage) for the execution-quality store
+    ws.execution_stream(execution_callback_ws())
+    private_ws = ws
+
+
+async def _refresh_instruments(snapshot_step: asyncio.Task, redis_step: asyncio.Task):
+    # Diffed against the disk snapshot; publishes to Redis when it is available
+    await asyncio.wait([snapshot_step, redis_step])
+    await refresh_symbol_info()
+
+
+def _snapshot_usable() -> bool:
+    age = l3_age()
+    return age is not None and age <= SYMBOL_SNAPSHOT_MAX_AGE
+
+
+async def _restore_contexts(db_step: asyncio.Task, positions_step: asyncio.Task):
+    # Reconciled against the first position snapshot
+    await asyncio.wait([db_step, positions_step])
+    await restore_contexts()
+    # TP/SL ladder state of the open positions, replayed from the WS journal
+    await asyncio.to_thread(rebuild_from_journal)
+    # Stop moves that were due (or deferred) when the bot went down
+    await resume_stop_moves()
+
+
+# ---------------- ORCHESTRATOR ---------------- #
+async def run_startup(telegram_queue: asyncio.Queue) -> StageTimer:
+    """
+    Run all startup steps concurrently, open the readiness gate once the
+    caches are warm and start the background loops. Raises if a critical
+    step fails.
+    """
+    global startup_timing
+    timer = StageTimer("startup")
+    loop = asyncio.get_running_loop()
+
+    def step(name: str, coro) -> asyncio.Task:
+        return asyncio.create_task(timer.run(name, coro), name=f"startup:{name}")
+
+    redis_step = step("redis", init_redis())
+    db_step = step("db", asyncio.to_thread(init_db))
+    positions_step = step("positions", reconcile_positions())
+    # Disk snapshot: sizing works while the full refresh is still running
+    instruments_step = step("instruments", load_symbol_snapshot())
+    steps = {
+        "db": db_step,
+        "redis": redis_step,
+        "telegram": step("telegram", _start_telegram()),
+        "private_ws": step(
+            "private_ws",
+            asyncio.to_thread(_connect_private_ws, loop, telegram_queue),
+        ),
+        "instruments": instruments_step,
+        "instruments_refresh": step(
+            "instruments_refresh", _refresh_instruments(instruments_step, redis_step)
+        ),
+        "positions": positions_step,
+        "tickers": step("tickers", refresh_tickers()),
+        "contexts": step("contexts", _restore_contexts(db_step, positions_step)),
+    }
+
+    await asyncio.wait([steps[name] for name in WARMUP_STEPS])
+    if not _snapshot_usable():
+        # Missing or outdated snapshot: the refresh is the instrument warm-up
+        await asyncio.wait([steps["instruments_refresh"]])
+    readiness.mark_ready()
+    timer.record("ready", timer.total_ms())
+    print(
+        f"[STARTUP] Caches warm, signal processing enabled ({timer.total_ms():.0f}ms)"
+    )
+
+    results = await asyncio.gather(*steps.values(), return_exceptions=True)
+    failed = {}
+    for name, result in zip(steps, results):
+        if isinstance(result, BaseException):
+            failed[name] = result
+            print(f"[STARTUP][ERROR] {name} failed: {result}")
+
+    startup_timing = timer.as_dict()
+    print(f"[STARTUP] {timer.format()}")
+
+    for name in CRITICAL_STEPS:
+        if name in failed:
+            raise failed[name]
+
+    # Background refresh loops (their first run is the warm-up above)
+    asyncio.create_task(periodic_refresh(interval_seconds=3600, warmup=False))
+    # Local transaction log (first pass backfills)
+    asyncio.create_task(periodic_transaction_sync())
+    asyncio.create_task(periodic_position_reconcile(interval_seconds=60, warmup=False))
+    asyncio.create_task(periodic_ticker_refresh(warmup=False))
+    # Leverage for frequently signalled symbols, set before their next signal
+    asyncio.create_task(periodic_leverage_preset())
+    # Public order book / ticker stream for the interest set
+    asyncio.create_task(start_market_data())
+    return timer
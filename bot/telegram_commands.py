@@ -1,27 +1,24 @@
 import asyncio
+import io
 from telethon import events
-from telethon.errors import FloodWaitError
-from clients import telClient
-from api import (
-    get_wallet_balance,
-    cancel_all_orders,
-    get_positions,
-    get_pending_orders,
-    get_closed_pnl,
-    close_all_positions,
-    get_account_info,
-    get_transaction_log,
-)
+import account_snapshot
+import clients
+from api import cancel_all_orders, close_all_positions
 from config import open_positions
-from cache import refresh_transaction_log
 from capital_tracker import get_capital_report
+import ticker_cache
+import transaction_history
 from liquidity_analyzer import get_liquidity_report, analyze_symbol_liquidity
+from telegram_queue_processor import get_queue_stats
+from dispatcher import format_dispatcher_stats
+from cache import format_symbol_cache_stats
 
 # Global flag to cancel transaction sending
 cancel_transaction_sending = False
 
 
 def register_command_handlers():
+    telClient = clients.telClient
 
     # ---------- /start ----------
     @telClient.on(events.NewMessage(pattern=r"^/start$"))
@@ -34,9 +31,12 @@ def register_command_handlers():
             "🛑 Cancel Orders: /cancel\n"
             "❌ Close Positions: /close_positions\n"
             "📄 Capital Report: /capital_report\n"
-            "📄 Transactions: /transactions\n"
+            "📄 Transactions: /transactions [SYMBOL] [7d | 2025-01-01..2025-01-31]\n"
             "🛑 Cancel Waiting: /cancel_waiting\n"
             "📊 Liquidity Report: /liquidity_report\n"
+            "🧵 Queue Stats: /queue_stats\n"
+            "🗂 Symbol Cache Stats: /cache_stats\n"
+            "💹 Ticker: /ticker SYMBOL\n"
         )
         await event.respond(message)
 
@@ -44,9 +44,13 @@ def register_command_handlers():
     @telClient.on(events.NewMessage(pattern=r"^/positions$"))
     async def positions_handler(event):
         try:
+            # Positions, orders and PnL in parallel (shared short-lived snapshot)
+            data, age = await account_snapshot.snapshot(
+                "positions", "pending_orders", "closed_pnl"
+            )
             msg = "📊 **Open Positions:**\n\n"
 
-            positions = get_positions(settleCoin="USDT")
+            positions = data["positions"]
             if not positions:
                 msg += "No open positions.\n"
             else:
@@ -61,7 +65,7 @@ def register_command_handlers():
                         "----------------------\n"
                     )
 
-            pending = get_pending_orders(settleCoin="USDT")
+            pending = data["pending_orders"]
             msg += "\n⏳ **Pending Orders:**\n\n"
             if not pending:
                 msg += "No pending orders.\n"
@@ -73,7 +77,7 @@ def register_command_handlers():
                         "----------------------\n"
                     )
 
-            pnl = get_closed_pnl()
+            pnl = data["closed_pnl"]
             msg += "\n✅ **Closed PnL:**\n\n"
             if not pnl:
                 msg += "No closed PnL.\n"
@@ -82,6 +86,7 @@ def register_command_handlers():
                     emoji = "🟢" if p.get("closed_pnl", 0) > 0 else "🔴"
                     msg += f"{emoji} {p.get('symbol','-')} | {p.get('closed_pnl',0)}\n"
 
+            msg += f"\n{account_snapshot.format_age(age)}"
             await event.respond(msg)
 
         except Exception as e:
@@ -91,13 +96,14 @@ def register_command_handlers():
     @telClient.on(events.NewMessage(pattern=r"^/account$"))
     async def account_handler(event):
         try:
-            info = get_account_info()
+            info, age = await account_snapshot.get("account")
 
             msg = (
                 "👤 **Account Info**\n\n"
                 f"UID: {info.get('uid','-')}\n"
                 f"Account Type: {info.get('accountType','-')}\n"
                 f"Status: {info.get('status','-')}\n"
+                f"\n{account_snapshot.format_age(age)}"
             )
 
             await event.respond(msg)
@@ -109,7 +115,7 @@ def register_command_handlers():
     @telClient.on(events.NewMessage(pattern=r"^/wallet$"))
     async def wallet_handler(event):
         try:
-            data = get_wallet_balance()
+            data, age = await account_snapshot.get("wallet")
 
             coins = data.get("result", {}).get("list", [])
             if not coins:
@@ -147,6 +153,7 @@ def register_command_handlers():
 
                 msg += "\n"
 
+            msg += account_snapshot.format_age(age)
             await event.respond(msg)
 
         except Exception as e:
@@ -156,7 +163,8 @@ def register_command_handlers():
     @telClient.on(events.NewMessage(pattern=r"^/cancel$"))
     async def cancel_handler(event):
         try:
-            cancel_all_orders(settleCoin="USDT")
+            await cancel_all_orders(settleCoin="USDT")
+            account_snapshot.invalidate("pending_orders")
             await event.respond("🛑 All USDT orders cancelled")
         except Exception as e:
             await event.respond(f"❌ Error cancelling orders: {e}")
@@ -165,7 +173,8 @@ def register_command_handlers():
     @telClient.on(events.NewMessage(pattern=r"^/close_positions$"))
     async def close_positions_handler(event):
         try:
-            results = close_all_positions(settleCoin="USDT")
+            results = await close_all_positions(settleCoin="USDT")
+            account_snapshot.invalidate()
             if not results:
                 await event.respond("📌 No open positions to close.")
                 return
@@ -175,11 +184,11 @@ def register_command_handlers():
             for symbol in closed_symbols:
                 open_positions.discard(symbol)
 
-            # Update transaction log cache
+            # Pull the closing trades into the local transaction log
             try:
-                await refresh_transaction_log()
-            except Exception as cache_error:
-                print(f"[WARN] Failed to refresh transaction log cache: {cache_error}")
+                await transaction_history.sync_transaction_log()
+            except Exception as sync_error:
+                print(f"[WARN] Failed to sync transaction log: {sync_error}")
 
             msg = "✅ Closed positions:\n\n"
             for r in results:
@@ -192,124 +201,48 @@ def register_command_handlers():
         except Exception as e:
             await event.respond(f"❌ Error closing positions: {e}")
 
-    @telClient.on(events.NewMessage(pattern=r"^/transactions$"))
+    @telClient.on(events.NewMessage(pattern=r"^/transactions(?:\s+(.*))?$"))
     async def transactions_handler(event):
         global cancel_transaction_sending
         cancel_transaction_sending = False  # Reset cancel flag
 
         try:
-            # Send initial message
+            symbol, start_ms, end_ms = transaction_history.parse_filter(
+                event.pattern_match.group(1) or ""
+            )
+        except ValueError as e:
+            await event.respond(f"❌ {e}")
+            return
+
+        try:
             await event.respond("📄 Fetching transactions...")
 
-            res = get_transaction_log(limit=50)
-            if isinstance(res, dict):
-                results = res.get("result", {}).get("list", [])
-            else:
-                results = []
-            if not results:
-                await event.respond("📌 No transactions found.")
+            # Local table when it covers the range, else the API page walk
+            # (/cancel_waiting stops it)
+            history = await transaction_history.load_transactions(
+                symbol,
+                start_ms,
+                end_ms,
+                should_stop=lambda: cancel_transaction_sending,
+            )
+            summary = transaction_history.format_summary(
+                history, symbol, start_ms, end_ms
+            )
+            if not history["rows"]:
+                await event.respond(f"{summary}\n📌 No transactions found.")
                 return
 
-            total_count = len(results)
-            await event.respond(f"📊 Found {total_count} transactions. Sending...")
-
-            # Sort by transaction time (newest first)
-            results.sort(key=lambda x: int(x.get("transactionTime", 0)), reverse=True)
-
-            # Send transactions one by one with proper error handling
-            sent_count = 0
-            for idx, tx in enumerate(results, start=1):
-                # Check if cancellation was requested
-                if cancel_transaction_sending:
-                    await event.respond(
-                        f"🛑 Sending cancelled by user.\n"
-                        f"📊 Sent {sent_count}/{total_count} transactions before cancellation."
-                    )
-                    cancel_transaction_sending = False  # Reset flag
-                    return
-
-                # Prepare message content first
-                cash_flow = float(tx.get("cashFlow", 0))
-                funding = float(tx.get("funding", 0))
-                fee = float(tx.get("fee", 0))
-                change = float(tx.get("change", 0))
-
-                # Determine emoji based on positive or negative value
-                cash_flow_emoji = (
-                    "🟢" if cash_flow > 0 else "🔴" if cash_flow < 0 else "⚪"
-                )
-                change_emoji = "🟢" if change > 0 else "🔴" if change < 0 else "⚪"
-
-                tx_msg = (
-                    f"📄 **Transaction #{idx}/{total_count}**\n\n"
-                    "```\n"
-                    f"Symbol: {tx.get('symbol')}\n"
-                    f"Type: {tx.get('type')}\n"
-                    f"Side: {tx.get('side')}\n"
-                    f"Qty: {tx.get('qty')}\n"
-                    f"Price: {tx.get('tradePrice')}\n"
-                    f"{cash_flow_emoji} Cash Flow (PNL): {cash_flow}\n"
-                    f"Funding: {funding}\n"
-                    f"Fee: {fee}\n"
-                    f"{change_emoji} Change: {change}\n"
-                    f"Balance After: {tx.get('cashBalance')}\n"
-                    f"Order ID: {tx.get('orderId')}\n"
-                    f"Trade ID: {tx.get('tradeId')}\n"
-                    f"Time: {tx.get('transactionTime')}\n"
-                    "```"
-                )
-
-                # Try to send with retry logic
-                max_retries = 3
-                retry_count = 0
-                sent = False
-
-                while retry_count < max_retries and not sent:
-                    try:
-                        await event.respond(tx_msg)
-                        sent_count += 1
-                        sent = True
-
-                        # Increased delay to avoid flood limits (2.5 seconds between messages)
-                        await asyncio.sleep(2.5)
-
-                    except FloodWaitError as e:
-                        # If we hit a flood wait, wait for the required time + buffer
-                        wait_time = e.seconds + 2
-                        print(
-                            f"[WARN] Flood wait detected for transaction {idx}. Waiting {wait_time} seconds..."
-                        )
-                        if retry_count == 0:
-                            await event.respond(
-                                f"⏳ Rate limit reached. Waiting {wait_time} seconds before continuing..."
-                            )
-                        await asyncio.sleep(wait_time)
-                        retry_count += 1
-
-                    except Exception as tx_error:
-                        print(
-                            f"[ERROR] Error sending transaction {idx} (attempt {retry_count + 1}): {tx_error}"
-                        )
-                        retry_count += 1
-                        if retry_count < max_retries:
-                            await asyncio.sleep(2.5)
-                        else:
-                            await event.respond(
-                                f"⚠️ Failed to send transaction #{idx} after {max_retries} attempts. Skipping..."
-                            )
-                            await asyncio.sleep(2.5)
-                            break
-
-            # Send completion message
-            if not cancel_transaction_sending:
-                await event.respond(
-                    f"✅ Completed! Sent {sent_count}/{total_count} transactions."
-                )
-            cancel_transaction_sending = False  # Reset flag
+            # One CSV document instead of one message per transaction
+            document = io.BytesIO(transaction_history.render_csv(history["rows"]))
+            document.name = transaction_history.document_name(
+                symbol, start_ms, end_ms
+            )
+            await event.respond(summary, file=document)
 
         except Exception as e:
             await event.respond(f"❌ Error getting transactions: {e}")
-            cancel_transaction_sending = False  # Reset flag on error
+        finally:
+            cancel_transaction_sending = False  # Reset flag
 
     # ---------- /cancel_waiting ----------
     @telClient.on(events.NewMessage(pattern=r"^/cancel_waiting$"))
@@ -317,14 +250,14 @@ def register_command_handlers():
         global cancel_transaction_sending
         cancel_transaction_sending = True
         await event.respond(
-            "🛑 Cancellation requested. Transaction sending will stop after current message."
+            "🛑 Cancellation requested. The transaction export will stop after the current page."
         )
 
     # ---------- /capital_report ----------
     @telClient.on(events.NewMessage(pattern=r"^/capital_report$"))
     async def capital_report_handler(event):
         try:
-            report = get_capital_report()
+            report = await asyncio.to_thread(get_capital_report)
             await event.respond(report)
         except Exception as e:
             await event.respond(f"❌ Error generating capital report: {e}")
@@ -333,7 +266,54 @@ def register_command_handlers():
     @telClient.on(events.NewMessage(pattern=r"^/liquidity_report$"))
     async def liquidity_report_handler(event):
         try:
-            report = get_liquidity_report()
+            report = await asyncio.to_thread(get_liquidity_report)
             await event.respond(report)
         except Exception as e:
             await event.respond(f"❌ Error generating liquidity report: {e}")
+
+    # ---------- /queue_stats ----------
+    @telClient.on(events.NewMessage(pattern=r"^/queue_stats$"))
+    async def queue_stats_handler(event):
+        try:
+            stats = get_queue_stats()
+            if not stats:
+                await event.respond("🧵 Queue workers are not running.")
+                return
+            await event.respond(
+                f"🧵 **Queue Stats**\n\n```\n{format_dispatcher_stats(stats)}\n```"
+            )
+        except Exception as e:
+            await event.respond(f"❌ Error getting queue stats: {e}")
+
+    # ---------- /cache_stats ----------
+    @telClient.on(events.NewMessage(pattern=r"^/cache_stats$"))
+    async def cache_stats_handler(event):
+        try:
+            await event.respond(
+                f"🗂 **Symbol Cache Stats**\n\n```\n{format_symbol_cache_stats()}\n```"
+            )
+        except Exception as e:
+            await event.respond(f"❌ Error getting cache stats: {e}")
+
+    # ---------- /ticker ----------
+    @telClient.on(events.NewMessage(pattern=r"^/ticker\s+(\w+)$"))
+    async def ticker_handler(event):
+        symbol = event.pattern_match.group(1).upper()
+        if not symbol.endswith("USDT"):
+            symbol += "USDT"
+        ticker = ticker_cache.get_ticker(symbol)
+        if not ticker:
+            await event.respond(f"❌ No fresh ticker for {symbol}")
+            return
+        await event.respond(
+            f"💹 **{symbol}**\n\n"
+            f"```\n"
+            f"Last:      {ticker['lastPrice']}\n"
+            f"Mark:      {ticker['markPrice']}\n"
+            f"24h High:  {ticker['highPrice24h']}\n"
+            f"24h Low:   {ticker['lowPrice24h']}\n"
+            f"Volume:    {ticker['volume24h']:,.0f}\n"
+            f"Turnover:  {ticker['turnover24h']:,.0f} USDT\n"
+            f"```\n"
+            f"Age: {ticker['age_seconds']}s"
+        )
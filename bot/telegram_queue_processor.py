@@ -3,66 +3,159 @@ from datetime import datetime
 from zoneinfo import ZoneInfo
 from telethon import events
 
-from config import (
-    TARGET_CHANNEL,
-    open_positions,
-    position_entry_times,
-    position_tp_prices,
-)
+from config import open_positions
 from bybit_client import (
     calculate_fixed_trade,
     is_position_open,
-    normalize_qty,
     get_symbol_info,
 )
-from regex_utils import parse_signal, is_signal_message
+from regex_utils import parse_signal
+from signal_parser import scan_signal
 from errors import send_error_to_telegram
-from api import set_leverage_safe, place_market_order, set_trading_stop
-from clients import telClient
+from api import place_market_order
+import clients
 from ws_message_formatter import handle_ws_message
 from capital_tracker import track_position_opened
 from liquidity_analyzer import (
     analyze_symbol_liquidity,
     track_order_execution,
-    calculate_liquidity_metrics,
+    attach_liquidity_metrics,
 )
-from config import FIXED_MARGIN_USDT
+from config import FIXED_MARGIN_USDT, QUEUE_WORKERS
+from dispatcher import ShardedDispatcher, PRIORITY_SIGNAL, PRIORITY_EVENT
+from timing import StageTimer, signal_timings
+from notifier import notify, PRIORITY_HIGH, PRIORITY_NORMAL
+import ladder_state
+import leverage_cache
+import market_data
+import position_context
+import readiness
+import ticker_cache
+from timer_wheel import deferred
+from tp_ladder import build_tp_ladder, submit_tp_ladder, format_ladder_report
 
 # ---------------- TELEGRAM QUEUE ---------------- #
 telegram_queue = asyncio.Queue()
 
 
+# ---------------- LIQUIDITY DIAGNOSTICS (OFF CRITICAL PATH) ---------------- #
+async def run_liquidity_diagnostics(symbol: str, qty: float, side: str, timer):
+    """
+    Analyze both sides of the book once and return (analysis, metrics) where
+    metrics are the ones for the order side (no extra fetch for that side).
+    """
+    liquidity_analysis = await timer.run(
+        "liquidity(bg)", analyze_symbol_liquidity(symbol, qty)
+    )
+    side_key = "buy_metrics" if side == "Buy" else "sell_metrics"
+    liquidity_metrics = liquidity_analysis.get(side_key) or {
+        "available": False,
+        "reason": liquidity_analysis.get("message", "Failed to fetch market data"),
+    }
+    return liquidity_analysis, liquidity_metrics
+
+
+async def report_liquidity_diagnostics(
+    symbol: str, order_id: str | None, diagnostics_task: asyncio.Task
+):
+    """
+    Wait for the background liquidity diagnostics, attach the metrics to the
+    tracked order and warn if liquidity is low.
+    """
+    try:
+        liquidity_analysis, liquidity_metrics = await diagnostics_task
+
+        if order_id:
+            attach_liquidity_metrics(order_id, liquidity_metrics)
+
+        # Warn if liquidity is low
+        if liquidity_analysis.get("risk_level") in ["HIGH", "MEDIUM"]:
+            recommendations = liquidity_analysis.get("recommendations", [])
+            warning_msg = (
+                f"⚠️ **Liquidity Warning for {symbol}**\n\n"
+                f"Risk Level: {liquidity_analysis.get('risk_level')}\n"
+                f"Fill Percentage: {liquidity_metrics.get('fill_percentage', 0):.1f}%\n"
+                f"Max Slippage: {liquidity_metrics.get('max_slippage_percent', 0):.2f}%\n\n"
+            )
+            if recommendations:
+                warning_msg += "\n".join(
+                    recommendations[:3]
+                )  # Show first 3 recommendations
+            notify(warning_msg, symbol=symbol, priority=PRIORITY_NORMAL)
+    except Exception as e:
+        await send_error_to_telegram(e, context=f"liquidity diagnostics {symbol}")
+
+
 async def handle_telegram_signal(item):
     """
-    Handle incoming Telegram signal messages: validate, calculate trade, place order,
-    set leverage, and configure SL/TP using partial TP logic.
+    Handle incoming Telegram signal messages as a staged pipeline:
+    1. prechecks   - open-position check and trade sizing, concurrently
+    2. leverage    - set leverage (required before the order)
+    3. order       - market entry with SL attached
+    4. tp_ladder   - partial TP legs, submitted concurrently in the background
+    Liquidity diagnostics start right after sizing and run in the background,
+    they never delay the entry. Per-stage timings are logged and kept in
+    timing.signal_timings.
     """
+    timer = StageTimer("signal")
     text = item["text"]
-    signal = parse_signal(text)
+    with timer.stage("parse"):
+        # Already parsed by the message handler (same single scan)
+        signal = item.get("signal") or parse_signal(text)
     if not signal:
         print("[WARN] Invalid signal")
         return
 
     symbol = signal["symbol"]
+    # Start streaming its book now; diagnostics fall back to REST if still cold
+    market_data.note_signal(symbol)
+    leverage_cache.note_signal(symbol)
+
+    # Fast path: already known open, no REST needed
+    if symbol in open_positions:
+        print(f"[INFO] Already in position: {symbol}")
+        notify(
+            f"ℹ️ Ignore Signal. Already have an open position for {symbol}",
+            symbol=symbol,
+            priority=PRIORITY_NORMAL,
+        )
+        return
+
+    # Position check and trade calculation are independent -> run together
+    position_open, trade = await timer.run(
+        "prechecks",
+        asyncio.gather(
+            is_position_open(symbol),
+            calculate_fixed_trade(symbol, signal["entry"], signal["sl"]),
+        ),
+    )
 
     # Check if position is already open
-    if symbol in open_positions or await is_position_open(symbol):
+    if position_open:
         open_positions.add(symbol)
         print(f"[INFO] Already in position: {symbol}")
-        await telClient.send_message(
-            TARGET_CHANNEL,
+        notify(
             f"ℹ️ Ignore Signal. Already have an open position for {symbol}",
+            symbol=symbol,
+            priority=PRIORITY_NORMAL,
         )
         return
 
-    # Calculate trade size and leverage
-    trade = await calculate_fixed_trade(symbol, signal["entry"], signal["sl"])
     if not trade:
         print("[WARN] Trade calculation failed")
         return
 
     qty, leverage = trade["qty"], trade["leverage"]
 
+    # Signal entry vs current mark price, from memory (no REST on the hot path)
+    ticker = ticker_cache.get_ticker(symbol)
+    if ticker and ticker["markPrice"]:
+        drift = (ticker["markPrice"] - signal["entry"]) / signal["entry"] * 100
+        print(
+            f"[INFO] {symbol} mark:{ticker['markPrice']} vs entry:{signal['entry']} "
+            f"({drift:+.2f}%, ticker age {ticker['age_seconds']}s)"
+        )
+
     tp_info = f"tp1:{signal['targets'][0]} / tp2:{signal['targets'][1]}"
     if len(signal["targets"]) >= 3:
         tp_info += f" / tp3:{signal['targets'][2]}"
@@ -71,55 +164,49 @@ async def handle_telegram_signal(item):
         f"/ {tp_info} / sl:{signal['sl']} / leverage:{leverage}"
     )
 
-    # Set leverage safely
+    # Liquidity diagnostics are informational only -> start in parallel with
+    # leverage + order instead of blocking the entry
+    diagnostics_task = asyncio.create_task(
+        run_liquidity_diagnostics(symbol, qty, signal["side"], timer)
+    )
+
+    # Set leverage (skipped when the cache shows it's already in place)
     try:
-        set_leverage_safe(symbol=symbol, leverage=str(leverage))
+        await timer.run("leverage", leverage_cache.ensure_leverage(symbol, leverage))
     except Exception as e:
         if "leverage not modified" in str(e):
             print(f"[INFO] Leverage already set for {symbol}, skipping...")
         else:
-            await telClient.send_message(
-                TARGET_CHANNEL,
+            diagnostics_task.cancel()
+            notify(
                 f"⚠️ Error on setLeverage for {symbol}: {e}",
+                symbol=symbol,
+                priority=PRIORITY_HIGH,
             )
             raise e
 
-    # Analyze liquidity before placing order
-    liquidity_analysis = analyze_symbol_liquidity(symbol, qty)
-    liquidity_metrics = calculate_liquidity_metrics(symbol, qty, signal["side"])
-
-    # Warn if liquidity is low
-    if liquidity_analysis.get("risk_level") in ["HIGH", "MEDIUM"]:
-        recommendations = liquidity_analysis.get("recommendations", [])
-        warning_msg = (
-            f"⚠️ **Liquidity Warning for {symbol}**\n\n"
-            f"Risk Level: {liquidity_analysis.get('risk_level')}\n"
-            f"Fill Percentage: {liquidity_metrics.get('fill_percentage', 0):.1f}%\n"
-            f"Max Slippage: {liquidity_metrics.get('max_slippage_percent', 0):.2f}%\n\n"
-        )
-        if recommendations:
-            warning_msg += "\n".join(
-                recommendations[:3]
-            )  # Show first 3 recommendations
-        await telClient.send_message(TARGET_CHANNEL, warning_msg)
-
     # Place market order
+    order_id = None
     try:
-        order_result = place_market_order(
-            symbol=symbol,
-            side=signal["side"],
-            qty=str(qty),
-            sl=signal["sl"],
+        placed_at = datetime.now(ZoneInfo("Asia/Tehran"))
+        order_result = await timer.run(
+            "order",
+            place_market_order(
+                symbol=symbol,
+                side=signal["side"],
+                qty=str(qty),
+                sl=signal["sl"],
+            ),
         )
 
         # Extract order ID from result
-        order_id = None
         if isinstance(order_result, dict):
             order_id = order_result.get("result", {}).get(
                 "orderId"
             ) or order_result.get("result", {}).get("orderLinkId")
 
-        # Track order execution for liquidity analysis
+        # Track order execution now (so fill updates find it); liquidity
+        # metrics are attached once the background diagnostics finish
         if order_id:
             track_order_execution(
                 symbol=symbol,
@@ -127,7 +214,8 @@ async def handle_telegram_signal(item):
                 qty=qty,
                 order_id=str(order_id),
                 order_type="Market",
-                liquidity_metrics=liquidity_metrics,
+                liquidity_metrics=None,
+                placed_at=placed_at,
             )
 
         # If order succeeded, track position opened
@@ -135,6 +223,7 @@ async def handle_telegram_signal(item):
         # Track position opened for capital tracking
         track_position_opened(symbol, FIXED_MARGIN_USDT, margin=trade.get("margin"))
     except Exception as e:
+        diagnostics_task.cancel()
         # Track rejected order if it's due to insufficient balance
         error_str = str(e).lower()
         if any(
@@ -146,112 +235,135 @@ async def handle_telegram_signal(item):
             track_rejected_order(symbol, str(e), FIXED_MARGIN_USDT)
         raise e
 
-    # Store entry time to check 30-minute rule
-    position_entry_times[symbol] = datetime.now()
-    # Store TP prices and entry to identify which TP/SL was triggered
-    position_tp_prices[symbol] = {
-        "entry": signal["entry"],
-        "tp1": signal["targets"][0],
-        "tp2": signal["targets"][1],
-        "sl": signal["sl"],
-        "side": signal["side"],
-    }
-    if len(signal["targets"]) >= 3:
-        position_tp_prices[symbol]["tp3"] = signal["targets"][2]
-
-    # Calculate TP1, TP2, TP3 with distribution 30%, 45%, 30%
-    # Get qty_step for normalization
-    symbol_info = await get_symbol_info(symbol)
-    qty_step = symbol_info.get("qty_step", 1)
-
-    # Calculate quantities: 30% TP1, 45% TP2, 30% TP3
-    tp1_qty = int(qty * 0.30)
-    tp2_qty = int(qty * 0.45)
-    tp3_qty = qty - tp1_qty - tp2_qty  # Remaining for TP3
-
-    # Normalize qty values with step size
-    tp1_qty = normalize_qty(tp1_qty, qty_step)
-    tp2_qty = normalize_qty(tp2_qty, qty_step)
-    tp3_qty = normalize_qty(tp3_qty, qty_step)
-
-    # Ensure that tp1_qty + tp2_qty + tp3_qty = qty
-    if tp1_qty + tp2_qty + tp3_qty != qty:
-        # If normalization caused changes, adjust tp3_qty
-        tp3_qty = normalize_qty(qty - tp1_qty - tp2_qty, qty_step)
-
-    # Set TP1
-    set_trading_stop(
-        symbol=symbol,
-        tpslMode="Partial",
-        positionIdx=0,
-        tp=signal["targets"][0],
-        slSize=str(tp1_qty),
-        tpSize=str(tp1_qty),
+    asyncio.create_task(
+        report_liquidity_diagnostics(
+            symbol, str(order_id) if order_id else None, diagnostics_task
+        )
     )
 
-    # Set TP2
-    set_trading_stop(
-        symbol=symbol,
-        tpslMode="Partial",
-        positionIdx=0,
-        tp=signal["targets"][1],
-        tpSize=str(tp2_qty),
+    # Entry time (30-minute rule) and signal TP/SL prices (to identify which
+    # level triggered), persisted so they survive a restart
+    entry_order_id = str(order_id) if order_id else None
+    position_context.record_entry(symbol, signal, order_id=entry_order_id)
+    # TP/SL ladder state machine, advanced by the order WS events
+    ladder_state.open_ladder(
+        symbol, position_context.get_tp_prices(symbol), order_id=entry_order_id
     )
 
-    # Set TP3 (if exists)
-    if len(signal["targets"]) >= 3:
-        set_trading_stop(
-            symbol=symbol,
-            tpslMode="Partial",
-            positionIdx=0,
-            tp=signal["targets"][2],
-            tpSize=str(tp3_qty),
-        )
+    # Protect the position in the background so the queue processor can move on
+    asyncio.create_task(protect_position(symbol, signal, qty, leverage, timer))
 
-    # Notify Telegram channel
-    tp_message = f"TP1: {signal['targets'][0]}\nTP2: {signal['targets'][1]}"
-    if len(signal["targets"]) >= 3:
-        tp_message += f"\nTP3: {signal['targets'][2]}"
-
-    await telClient.send_message(
-        TARGET_CHANNEL,
-        f"🚀 New Order Placed:\n"
-        f"Symbol: {symbol}\nSide: {signal['side']}\nEntry: {signal['entry']}\n"
-        f"Qty: {qty}\nSL: {signal['sl']}\n{tp_message}\n"
-        f"Leverage: {leverage}\n"
-        f"TP1 Qty: {tp1_qty} (~30%)\nTP2 Qty: {tp2_qty} (~45%)\nTP3 Qty: {tp3_qty} (~25%)",
-    )
 
-    print(f"[SUCCESS] Order placed and SL/TP configured for {symbol}")
+# ---------------- TP LADDER (BACKGROUND) ---------------- #
+async def protect_position(symbol: str, signal: dict, qty: float, leverage, timer):
+    """
+    Submit the TP ladder for a freshly opened position (all legs concurrently,
+    failed legs retried) and report which legs are live.
+    """
+    try:
+        # Get qty_step for normalization
+        symbol_info = await get_symbol_info(symbol)
+        qty_step = symbol_info.get("qty_step", 1)
+
+        legs = build_tp_ladder(qty, signal["targets"], qty_step)
+        report = await timer.run("tp_ladder", submit_tp_ladder(symbol, legs))
+
+        signal_timings.append(timer)
+        print(f"[TIMING] {symbol} signal-to-protected: {timer.format()}")
+
+        # Notify Telegram channel
+        status = "🚀 New Order Placed" if not report["failed"] else "⚠️ Order Placed"
+        msg = (
+            f"{status}:\n"
+            f"Symbol: {symbol}\nSide: {signal['side']}\nEntry: {signal['entry']}\n"
+            f"Qty: {qty}\nSL: {signal['sl']}\n"
+            f"Leverage: {leverage}\n\n"
+            f"{format_ladder_report(report, legs)}\n"
+        )
+        if report["failed"]:
+            msg += "\n❌ Failed legs:\n" + "\n".join(
+                f"{name}: {error}" for name, error in report["failed"].items()
+            )
+            msg += "\n"
+        msg += f"⏱ {timer.format()}"
+        notify(msg, symbol=symbol, priority=PRIORITY_HIGH)
+
+        if report["failed"]:
+            print(f"[WARN] TP ladder incomplete for {symbol}: {report['failed']}")
+        else:
+            print(f"[SUCCESS] Order placed and SL/TP configured for {symbol}")
+    except Exception as e:
+        await send_error_to_telegram(e, context=f"protect_position {symbol}")
 
 
 # handle_ws_message moved to ws_message_formatter.py
 
 
 # ---------------- QUEUE PROCESSOR ---------------- #
+# Created by process_telegram_queue; None until the bot is running
+dispatcher: ShardedDispatcher | None = None
+
+
+async def handle_queue_item(item):
+    """Handle one queue item (Telegram signal or WebSocket message)."""
+    if item.get("type") == "tg":
+        await handle_telegram_signal(item)
+    elif item.get("type") == "ws":
+        await handle_ws_message(item)
+    elif item.get("type") == "deferred":
+        # Due timer-wheel action (e.g. a deferred stop move)
+        await item["action"]()
+
+
+async def report_queue_error(error: Exception, item: dict):
+    await send_error_to_telegram(error, context="process_telegram_queue")
+
+
 async def process_telegram_queue():
     """
-    Continuously process messages in the Telegram queue.
-    Supports both Telegram signals and WebSocket messages.
+    Continuously route messages from the Telegram queue to the sharded worker pool.
+    Supports both Telegram signals and WebSocket messages: items for the same
+    symbol are handled in order, different symbols in parallel, and new signals
+    jump ahead of WS notifications within a shard.
     """
+    global dispatcher
+    dispatcher = ShardedDispatcher(
+        handler=handle_queue_item,
+        key_func=lambda item: item.get("symbol") or "",
+        priority_func=lambda item: (
+            PRIORITY_SIGNAL if item.get("type") == "tg" else PRIORITY_EVENT
+        ),
+        shard_count=QUEUE_WORKERS,
+        on_error=report_queue_error,
+        # Items received during startup wait in their shard for warm caches
+        gate=readiness.wait_ready,
+    )
+    dispatcher.start()
+    # Deferred position actions run on their symbol's shard, in order with
+    # that symbol's WS events
+    deferred.dispatch = lambda symbol, action: dispatcher.submit(
+        {"type": "deferred", "symbol": symbol, "action": action}
+    )
+
     while True:
         item = await telegram_queue.get()
         try:
-            if item.get("type") == "tg":
-                await handle_telegram_signal(item)
-            elif item.get("type") == "ws":
-                await handle_ws_message(item)
-        except Exception as e:
-            await send_error_to_telegram(e, context="process_telegram_queue")
+            dispatcher.submit(item)
         finally:
             telegram_queue.task_done()
 
 
+def get_queue_stats() -> list:
+    """Per-shard queue depth and wait-time stats (empty before startup)."""
+    return dispatcher.stats() if dispatcher else []
+
+
 # ---------------- TELEGRAM HANDLER REGISTRATION ---------------- #
 def register_telegram_handlers(source_channel):
     """
     Register Telegram command and message handlers for signals and commands.
     """
+    telClient = clients.telClient
 
     @telClient.on(events.NewMessage(chats=source_channel))
     async def new_message_handler(event):
@@ -259,14 +371,20 @@ def register_telegram_handlers(source_channel):
         msg_time = event.message.date.astimezone(ZoneInfo("Asia/Tehran"))
         formatted_time = msg_time.strftime("%Y-%m-%d | %H:%M:%S")
 
-        if is_signal_message(message_text):
+        # Detection and parsing in one pass over the text
+        scan = scan_signal(message_text)
+        if scan.is_signal:
             print(f"[INFO] Signal detected / {formatted_time}")
+            signal = scan.signal
             await telegram_queue.put(
                 {
                     "type": "tg",
                     "event": event.message,
                     "text": message_text,
                     "time": formatted_time,
+                    "signal": signal,
+                    # Shard key for the dispatcher
+                    "symbol": signal["symbol"] if signal else "",
                 }
             )
         else:
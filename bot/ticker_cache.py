@@ -0,0 +1,98 @@
+"""
+Ticker Cache Module
+In-memory snapshot of every linear ticker.
+- A background task refreshes all symbols with one bulk
+  get_tickers(category="linear") call.
+- The public tickers stream (market_data) pushes fresher values for the
+  symbols it follows.
+Readers get the ticker from memory, or None when it is missing or older than
+TICKER_MAX_AGE (then they may fall back to a single-symbol REST call).
+"""
+
+import asyncio
+import time
+from threading import Lock
+from typing import Dict, Optional
+
+TICKER_REFRESH_INTERVAL = 10  # seconds between bulk REST refreshes
+TICKER_MAX_AGE = 30  # seconds before an entry counts as stale
+TICKER_FIELDS = (
+    "lastPrice",
+    "markPrice",
+    "volume24h",
+    "turnover24h",
+    "highPrice24h",
+    "lowPrice24h",
+)
+
+_lock = Lock()
+_tickers: Dict[str, dict] = {}  # symbol -> parsed fields + "updated_at"
+ticker_cache_stats = {"hits": 0, "stale": 0, "misses": 0, "bulk_refreshes": 0}
+
+
+# ---------------- UPDATES ---------------- #
+def apply_ticker(symbol: str, fields: dict, snapshot: bool = True):
+    """
+    Store ticker fields for symbol. With snapshot=False only the fields
+    present are updated (stream deltas carry changed fields only).
+    """
+    parsed = {}
+    for field in TICKER_FIELDS:
+        value = fields.get(field)
+        if value not in (None, ""):
+            parsed[field] = float(value)
+
+    with _lock:
+        entry = _tickers.get(symbol)
+        if snapshot or entry is None:
+            entry = _tickers[symbol] = {field: 0.0 for field in TICKER_FIELDS}
+        entry.update(parsed)
+        entry["updated_at"] = time.monotonic()
+
+
+async def refresh_tickers() -> int:
+    """Bulk refresh of all linear tickers. Returns the number of symbols."""
+    from clients import bybitClientLive
+
+    response = await bybitClientLive.get_tickers(category="linear")
+    items = response.get("result", {}).get("list", [])
+    for item in items:
+        symbol = item.get("symbol")
+        if symbol:
+            apply_ticker(symbol, item)
+    ticker_cache_stats["bulk_refreshes"] += 1
+    return len(items)
+
+
+async def periodic_ticker_refresh(
+    interval_seconds: int = TICKER_REFRESH_INTERVAL, warmup: bool = True
+):
+    if not warmup:
+        await asyncio.sleep(interval_seconds)
+    while True:
+        try:
+            await refresh_tickers()
+        except Exception as e:
+            print(f"[TICKER_CACHE][ERROR] Bulk refresh failed: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+# ---------------- READ API ---------------- #
+def get_ticker(symbol: str, max_age: float = TICKER_MAX_AGE) -> Optional[dict]:
+    """
+    {"lastPrice", "markPrice", "volume24h", "turnover24h", "highPrice24h",
+    "lowPrice24h", "age_seconds"} as floats, or None if missing/stale.
+    """
+    with _lock:
+        entry = _tickers.get(symbol)
+        if entry is None:
+            ticker_cache_stats["misses"] += 1
+            return None
+        age = time.monotonic() - entry["updated_at"]
+        if age > max_age:
+            ticker_cache_stats["stale"] += 1
+            return None
+        ticker_cache_stats["hits"] += 1
+        ticker = {field: entry[field] for field in TICKER_FIELDS}
+    ticker["age_seconds"] = round(age, 1)
+    return ticker
@@ -0,0 +1,172 @@
+"""
+Timer Wheel Module
+Hashed timer wheel for deferred, position-level actions (e.g. the SL2/SL3
+stop moves gated by the 30-minute rule).
+- One driver task for the whole wheel, no coroutine or sleep per timer.
+- Timers hash into WHEEL_SLOTS buckets by their target tick; later rounds
+  are told apart by the absolute tick. Schedule and cancel are O(1).
+- Timers are keyed (owner, name): re-arming replaces the pending action and
+  cancel_owner() drops everything pending for a position when it closes.
+- When nothing is pending the driver waits on an event instead of ticking.
+- Due actions are handed to `dispatch(owner, action)`. The default runs them as
+  tasks; the queue processor routes them through the per-symbol shards so they
+  stay ordered with that symbol's WS events.
+"""
+
+import asyncio
+import itertools
+import math
+import time
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+TICK_SECONDS = 1.0
+WHEEL_SLOTS = 512  # one round ~ 8.5 minutes at 1s ticks
+
+Action = Callable[[], Awaitable]
+
+
+class _Timer:
+    __slots__ = ("id", "owner", "name", "tick", "deadline", "action")
+
+    def __init__(self, timer_id, owner, name, tick, deadline, action):
+        self.id = timer_id
+        self.owner = owner
+        self.name = name
+        self.tick = tick
+        self.deadline = deadline  # monotonic seconds
+        self.action = action
+
+
+class TimerWheel:
+    """
+    :param tick_seconds: resolution (timers fire on the first tick at or after
+        their deadline)
+    :param slots: number of buckets
+    :param dispatch: called as dispatch(owner, action) for due timers
+    """
+
+    def __init__(
+        self,
+        tick_seconds: float = TICK_SECONDS,
+        slots: int = WHEEL_SLOTS,
+        dispatch: Optional[Callable[[Hashable, Action], None]] = None,
+    ):
+        self.tick_seconds = tick_seconds
+        self.slots: list[Dict[int, _Timer]] = [{} for _ in range(slots)]
+        self.dispatch = dispatch
+        self._by_key: Dict[tuple, _Timer] = {}
+        self._by_owner: Dict[Hashable, set] = {}
+        self._ids = itertools.count()
+        self._last_tick = self._elapsed_tick(time.monotonic())
+        self._wakeup = asyncio.Event()
+        self._driver: Optional[asyncio.Task] = None
+        self.stats = {"scheduled": 0, "fired": 0, "cancelled": 0, "errors": 0}
+
+    def _tick_of(self, monotonic: float) -> int:
+        """First tick at or after `monotonic` (where a deadline fires)."""
+        return math.ceil(monotonic / self.tick_seconds)
+
+    def _elapsed_tick(self, monotonic: float) -> int:
+        """Last tick at or before `monotonic` (how far the driver may advance)."""
+        return math.floor(monotonic / self.tick_seconds)
+
+    def __len__(self) -> int:
+        return len(self._by_key)
+
+    # ---------------- SCHEDULING ---------------- #
+    def schedule(
+        self, owner: Hashable, name: str, delay_seconds: float, action: Action
+    ) -> float:
+        """
+        Run `action` after delay_seconds (replaces a pending (owner, name)
+        timer). Returns the monotonic deadline. Call from the event loop.
+        """
+        self.cancel(owner, name)
+        deadline = time.monotonic() + max(delay_seconds, 0.0)
+        # Never into a tick the driver has already processed
+        tick = max(self._tick_of(deadline), self._last_tick + 1)
+        timer = _Timer(next(self._ids), owner, name, tick, deadline, action)
+        self.slots[tick % len(self.slots)][timer.id] = timer
+        self._by_key[(owner, name)] = timer
+        self._by_owner.setdefault(owner, set()).add(name)
+        self.stats["scheduled"] += 1
+        self._ensure_driver()
+        self._wakeup.set()
+        return deadline
+
+    def _remove(self, timer: _Timer):
+        self.slots[timer.tick % len(self.slots)].pop(timer.id, None)
+        self._by_key.pop((timer.owner, timer.name), None)
+        names = self._by_owner.get(timer.owner)
+        if names is not None:
+            names.discard(timer.name)
+            if not names:
+                del self._by_owner[timer.owner]
+
+    def cancel(self, owner: Hashable, name: str) -> bool:
+        timer = self._by_key.get((owner, name))
+        if timer is None:
+            return False
+        self._remove(timer)
+        self.stats["cancelled"] += 1
+        return True
+
+    def cancel_owner(self, owner: Hashable) -> int:
+        """Cancel every pending timer of owner. Returns how many were cancelled."""
+        names = list(self._by_owner.get(owner, ()))
+        for name in names:
+            self.cancel(owner, name)
+        return len(names)
+
+    def pending(self, owner: Hashable) -> Dict[str, float]:
+        """name -> seconds left, for the pending timers of owner."""
+        now = time.monotonic()
+        return {
+            name: max(self._by_key[(owner, name)].deadline - now, 0.0)
+            for name in self._by_owner.get(owner, ())
+        }
+
+    # ---------------- DRIVER ---------------- #
+    def _ensure_driver(self):
+        if self._driver is None or self._driver.done():
+            self._driver = asyncio.create_task(self._run(), name="timer-wheel")
+
+    def _fire(self, timer: _Timer):
+        self._remove(timer)
+        self.stats["fired"] += 1
+        try:
+            if self.dispatch is not None:
+                self.dispatch(timer.owner, timer.action)
+            else:
+                asyncio.create_task(timer.action())
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"[TIMER_WHEEL][ERROR] {timer.owner} {timer.name}: {e}")
+
+    def _advance(self, now_tick: int):
+        """Fire everything due up to now_tick (catches up after a late wake-up)."""
+        slot_count = len(self.slots)
+        # A full round visits every slot; more than that adds nothing
+        first = max(self._last_tick + 1, now_tick - slot_count + 1)
+        for tick in range(first, now_tick + 1):
+            slot = self.slots[tick % slot_count]
+            if not slot:
+                continue
+            for timer in [t for t in slot.values() if t.tick <= now_tick]:
+                self._fire(timer)
+        self._last_tick = now_tick
+
+    async def _run(self):
+        while True:
+            if not self._by_key:
+                # Idle: sleep until something is scheduled
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            next_time = (self._last_tick + 1) * self.tick_seconds
+            await asyncio.sleep(max(next_time - time.monotonic(), 0.0))
+            self._advance(self._elapsed_tick(time.monotonic()))
+
+
+# Deferred position actions (stop moves), keyed by symbol
+deferred = TimerWheel()
@@ -0,0 +1,55 @@
+"""
+Timing Module
+Lightweight per-stage wall-clock timing used to see where latency goes
+(signal-to-fill pipeline, startup, ...).
+"""
+
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """Record the duration of named stages of a single run."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {}  # stage -> milliseconds
+
+    @contextmanager
+    def stage(self, stage_name: str):
+        """Time a block: `with timer.stage("order"): ...`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage_name, (time.perf_counter() - start) * 1000)
+
+    async def run(self, stage_name: str, coro):
+        """Await a coroutine and record its duration under stage_name."""
+        with self.stage(stage_name):
+            return await coro
+
+    def record(self, stage_name: str, elapsed_ms: float):
+        self.stages[stage_name] = round(elapsed_ms, 1)
+
+    def total_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 1)
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "stages": dict(self.stages),
+            "total_ms": self.total_ms(),
+        }
+
+    def format(self) -> str:
+        """One-line breakdown, e.g. 'prechecks=41ms | order=88ms | total=135ms'."""
+        parts = [f"{stage}={ms:.0f}ms" for stage, ms in self.stages.items()]
+        parts.append(f"total={self.total_ms():.0f}ms")
+        return " | ".join(parts)
+
+
+# Recent signal pipeline timings (newest last), for inspection and reports
+signal_timings: deque = deque(maxlen=100)
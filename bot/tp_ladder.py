@@ -0,0 +1,218 @@
+"""
+TP Ladder Module
+Builds the partial take-profit ladder (30% / 45% / 25%) for a new position and
+submits every leg concurrently, retrying only the legs that failed.
+Partial set_trading_stop calls are not idempotent: a leg is only resent when
+Bybit's answer proves it was rejected, and only after the open conditional
+orders show it is not live. A leg whose outcome is unknown (timeout, HTTP
+error, server busy) is never resent; it is looked up among the open orders.
+"""
+
+import asyncio
+import math
+from typing import Dict, List, Optional
+
+from aiohttp import ClientError
+from api import get_open_stop_orders, set_trading_stop
+from bybit_client import normalize_qty
+from bybit_http import BybitHTTPError
+
+# Share of the position closed at each target
+TP_DISTRIBUTION = (0.30, 0.45, 0.25)
+
+# retCodes proving the request was refused before it was processed
+# (request outside recv_window / rate limits): safe to resend
+REJECTED_RET_CODES = {10002, 10006, 10429}
+# retCodes (besides timeouts / HTTP failures) where the leg may have landed
+UNKNOWN_RET_CODES = {10000, 10016}
+# Relative distance for a live order's triggerPrice to match a leg (tick rounding)
+LIVE_PRICE_TOLERANCE = 0.0005
+
+
+# ---------------- LADDER CONSTRUCTION ---------------- #
+def build_tp_ladder(qty: float, targets: List[float], qty_step: float) -> List[Dict]:
+    """
+    Split qty over the signal targets.
+
+    Returns a list of legs: {"name": "TP1", "tp": price, "size": qty}
+    Sizes are floored to qty_step; the last leg (TP3) takes the remainder so
+    the sizes add up to qty. A leg that floors to 0 is skipped and its share
+    is carried to the next one. Without TP3 the remainder stays under the SL.
+    """
+    targets = targets[: len(TP_DISTRIBUTION)]
+    last = len(TP_DISTRIBUTION) - 1
+
+    legs = []
+    assigned = 0.0
+    share = 0.0  # shares of skipped legs carried forward
+    for i, price in enumerate(targets):
+        if i == last:
+            size = normalize_qty(qty - assigned, qty_step)
+        else:
+            share += TP_DISTRIBUTION[i]
+            size = normalize_qty(qty * share, qty_step)
+        if size <= 0:
+            continue
+        legs.append({"name": f"TP{i + 1}", "tp": price, "size": size})
+        assigned += size
+        share = 0.0
+    return legs
+
+
+def _failure_kind(error: Exception) -> Optional[str]:
+    """
+    "rejected" (safe to resend), "unknown" (may have landed: verify, never
+    resend) or None (final error).
+    """
+    if isinstance(error, (asyncio.TimeoutError, ClientError)):
+        return "unknown"
+    if isinstance(error, BybitHTTPError):
+        if error.ret_code in REJECTED_RET_CODES:
+            return "rejected"
+        # No retCode -> HTTP level failure
+        if error.ret_code is None or error.ret_code in UNKNOWN_RET_CODES:
+            return "unknown"
+    return None
+
+
+def _matches_leg(order: Dict, leg: Dict) -> bool:
+    if "TakeProfit" not in order.get("stopOrderType", ""):
+        return False
+    try:
+        price = float(order.get("triggerPrice") or 0)
+        size = float(order.get("qty") or 0)
+    except ValueError:
+        return False
+    return (
+        price > 0
+        and abs(price - leg["tp"]) / leg["tp"] <= LIVE_PRICE_TOLERANCE
+        and math.isclose(size, float(leg["size"]), rel_tol=1e-9)
+    )
+
+
+async def _find_live(symbol: str, legs: List[Dict]) -> Optional[List[Dict]]:
+    """
+    Legs already live as open conditional TP orders (each order matches one
+    leg), or None when the orders could not be listed.
+    """
+    try:
+        orders = await get_open_stop_orders(symbol)
+    except Exception as e:
+        print(f"[TP_LADDER][WARN] {symbol}: could not list open TP orders: {e}")
+        return None
+    live, claimed = [], set()
+    for leg in legs:
+        for order in orders:
+            order_id = order.get("orderId")
+            if order_id not in claimed and _matches_leg(order, leg):
+                claimed.add(order_id)
+                live.append(leg)
+                break
+    return live
+
+
+async def _submit_leg(symbol: str, leg: Dict):
+    params = {
+        "symbol": symbol,
+        "tpslMode": "Partial",
+        "positionIdx": 0,
+        "tp": leg["tp"],
+        "tpSize": str(leg["size"]),
+    }
+    if leg["name"] == "TP1":
+        # TP1 also carries the slSize of the first partial leg (legacy behaviour)
+        params["slSize"] = str(leg["size"])
+    return await set_trading_stop(**params)
+
+
+# ---------------- SUBMISSION ---------------- #
+async def submit_tp_ladder(
+    symbol: str, legs: List[Dict], max_retries: int = 2, retry_delay: float = 0.5
+) -> Dict:
+    """
+    Submit all legs at once and reconcile partial failures with targeted retries.
+
+    Returns:
+        {
+            "symbol": symbol,
+            "live": ["TP1", ...],          # legs accepted by Bybit
+            "failed": {"TP3": "error"},    # legs still failing after retries
+            "attempts": {"TP1": 1, ...},
+        }
+    """
+    report = {"symbol": symbol, "live": [], "failed": {}, "attempts": {}}
+    pending = list(legs)
+    unconfirmed = []  # outcome unknown: only ever looked up, never resent
+    attempt = 0
+    checks = 0
+    verified = True  # every unconfirmed leg has been looked up at least once
+
+    def confirm(leg):
+        report["live"].append(leg["name"])
+        report["failed"].pop(leg["name"], None)
+
+    while pending or unconfirmed:
+        if pending:
+            attempt += 1
+            results = await asyncio.gather(
+                *(_submit_leg(symbol, leg) for leg in pending),
+                return_exceptions=True,
+            )
+            retry = []
+            for leg, result in zip(pending, results):
+                report["attempts"][leg["name"]] = attempt
+                if not isinstance(result, Exception):
+                    confirm(leg)
+                    continue
+
+                report["failed"][leg["name"]] = str(result) or type(result).__name__
+                kind = _failure_kind(result)
+                if kind == "unknown":
+                    unconfirmed.append(leg)
+                    verified = False
+                elif kind == "rejected" and attempt <= max_retries:
+                    retry.append(leg)
+                else:
+                    print(f"[TP_LADDER][ERROR] {symbol} {leg['name']} failed: {result}")
+            pending = retry
+
+        # Look unconfirmed legs up at least once after they failed (bounded
+        # when the open orders cannot be listed)
+        done_checking = checks >= max_retries and (verified or checks > 2 * max_retries)
+        if not pending and (not unconfirmed or done_checking):
+            break
+        checks += 1
+        await asyncio.sleep(retry_delay * checks)
+
+        # A slow success must not be sent twice: drop legs that are live
+        live = await _find_live(symbol, pending + unconfirmed)
+        if live is not None:
+            verified = True
+            for leg in live:
+                confirm(leg)
+            pending = [leg for leg in pending if leg not in live]
+            unconfirmed = [leg for leg in unconfirmed if leg not in live]
+        if pending:
+            print(
+                f"[TP_LADDER][WARN] {symbol}: retrying {[l['name'] for l in pending]} "
+                f"(attempt {attempt + 1})"
+            )
+
+    for leg in unconfirmed:
+        error = report["failed"][leg["name"]]
+        report["failed"][leg["name"]] = f"not confirmed live ({error})"
+        print(f"[TP_LADDER][ERROR] {symbol} {leg['name']} not confirmed live")
+
+    # Keep ladder order in the report
+    order = [leg["name"] for leg in legs]
+    report["live"].sort(key=order.index)
+    return report
+
+
+def format_ladder_report(report: Dict, legs: List[Dict]) -> str:
+    """One line per leg, e.g. 'TP1: 0.105 x 1799 ✅'."""
+    lines = []
+    for leg in legs:
+        status = "✅" if leg["name"] in report["live"] else "❌"
+        lines.append(f"{leg['name']}: {leg['tp']} x {leg['size']} {status}")
+    return "\n".join(lines)
@@ -0,0 +1,508 @@
+"""
+Transaction History Module
+Linear transaction log: local sync, queries, and the /transactions export
+(one CSV document plus a short summary instead of one message per row).
+- Bybit serves at most 7 days per query and 50 rows per page, so a range is
+  split into 7-day windows, a few fetched at a time. Each window follows
+  nextPageCursor to its end.
+- A sync loop pulls rows newer than the stored watermark into the indexed
+  transaction_log table (keyed by id, indexed by time, symbol+time and
+  orderId). Reports and commands query it locally. Ranges older than the
+  synced history fall back to the API.
+- Optional filters: symbol (baseCoin narrows API queries server-side) and a
+  time range.
+"""
+
+import asyncio
+import csv
+import io
+import json
+import re
+import time
+from datetime import datetime
+from typing import Callable, Optional
+from zoneinfo import ZoneInfo
+
+import db
+from api import get_transaction_log
+from config import SETTLE_COIN
+
+TIMEZONE = ZoneInfo("Asia/Tehran")
+WINDOW_MS = 7 * 86400 * 1000  # Bybit's maximum startTime..endTime span
+PAGE_LIMIT = 50  # Bybit's maximum page size
+WINDOW_CONCURRENCY = 4
+DEFAULT_DAYS = 7
+MAX_DAYS = 730  # Bybit keeps two years of transaction log
+
+SYNC_INTERVAL = 60  # seconds between incremental syncs
+SYNC_BACKFILL_DAYS = 90  # history pulled by the first sync
+SYNC_OVERLAP_MS = 5 * 60 * 1000  # re-read behind the watermark (late rows)
+SYNC_CHUNK_MS = WINDOW_MS * WINDOW_CONCURRENCY  # committed per backfill step
+SYNC_FLUSH_TIMEOUT = 30  # seconds to wait for a chunk to commit
+SYNCED_FROM_KEY = "transaction_log_synced_from"
+SYNCED_TO_KEY = "transaction_log_synced_to"
+
+# Local table covers [from, to) (ms); loaded from meta on first use
+_watermarks = {"from": None, "to": None, "loaded": False}
+_sync_lock = asyncio.Lock()
+transaction_sync_stats = {
+    "syncs": 0,
+    "pages": 0,
+    "rows": 0,
+    "errors": 0,
+    "last_sync": None,
+}
+
+CSV_FIELDS = (
+    "time",
+    "symbol",
+    "type",
+    "side",
+    "qty",
+    "tradePrice",
+    "cashFlow",
+    "funding",
+    "fee",
+    "change",
+    "cashBalance",
+    "orderId",
+    "tradeId",
+    "id",
+)
+
+USAGE = (
+    "Usage: /transactions [SYMBOL] [PERIOD]\n"
+    "PERIOD: 12h, 30d, 2025-01-01 or 2025-01-01..2025-01-31 "
+    f"(default {DEFAULT_DAYS}d)"
+)
+
+_PERIOD_RE = re.compile(r"^(\d+)([hd])$", re.I)
+_DATES_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})(?:\.\.(\d{4}-\d{2}-\d{2}))?$")
+
+
+# ---------------- FILTER ---------------- #
+def _day_start_ms(day: str) -> int:
+    moment = datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=TIMEZONE)
+    return int(moment.timestamp() * 1000)
+
+
+def parse_filter(args: str) -> tuple:
+    """
+    Parse "/transactions" arguments into (symbol, start_ms, end_ms).
+    Raises ValueError (with usage) on anything it doesn't understand.
+    """
+    now_ms = int(time.time() * 1000)
+    symbol = None
+    start_ms, end_ms = now_ms - DEFAULT_DAYS * 86400 * 1000, now_ms
+
+    for token in args.split():
+        period = _PERIOD_RE.match(token)
+        dates = _DATES_RE.match(token)
+        if period:
+            unit_ms = 3600 * 1000 if period.group(2).lower() == "h" else 86400 * 1000
+            start_ms, end_ms = now_ms - int(period.group(1)) * unit_ms, now_ms
+        elif dates:
+            try:
+                start_ms = _day_start_ms(dates.group(1))
+                # Range end is inclusive: up to the end of that day
+                end_ms = (
+                    _day_start_ms(dates.group(2)) + 86400 * 1000
+                    if dates.group(2)
+                    else now_ms
+                )
+            except ValueError:
+                raise ValueError(f"Invalid date in {token}\n{USAGE}")
+        elif token.isalnum() and symbol is None:
+            symbol = token.upper()
+            if not symbol.endswith(SETTLE_COIN):
+                symbol += SETTLE_COIN
+        else:
+            raise ValueError(f"Unknown argument: {token}\n{USAGE}")
+
+    end_ms = min(end_ms, now_ms)
+    start_ms = max(start_ms, now_ms - MAX_DAYS * 86400 * 1000)
+    if start_ms >= end_ms:
+        raise ValueError(
+            f"Empty time range (history goes back {MAX_DAYS} days)\n{USAGE}"
+        )
+    return symbol, start_ms, end_ms
+
+
+# ---------------- FETCH ---------------- #
+async def _fetch_window(
+    start_ms: int,
+    end_ms: int,
+    base_coin: Optional[str],
+    should_stop: Callable[[], bool],
+    stats: dict,
+) -> list:
+    rows = []
+    cursor = None
+    while not should_stop():
+        res = await get_transaction_log(
+            limit=PAGE_LIMIT,
+            cursor=cursor,
+            startTime=start_ms,
+            endTime=end_ms,
+            baseCoin=base_coin,
+        )
+        result = res.get("result", {}) if isinstance(res, dict) else {}
+        rows.extend(result.get("list", []))
+        stats["pages"] += 1
+        cursor = result.get("nextPageCursor")
+        if not cursor:
+            break
+    return rows
+
+
+def _row_key(tx: dict) -> str:
+    return tx.get("id") or f"{tx.get('tradeId')}:{tx.get('transactionTime')}"
+
+
+def _row_time(tx: dict) -> int:
+    return int(tx.get("transactionTime") or 0)
+
+
+async def _fetch_range(
+    start_ms: int,
+    end_ms: int,
+    base_coin: Optional[str],
+    should_stop: Callable[[], bool],
+    stats: dict,
+) -> list:
+    """Raw rows of [start_ms, end_ms], 7-day windows fetched concurrently."""
+    windows = []
+    window_end = end_ms
+    while window_end > start_ms:
+        window_start = max(window_end - WINDOW_MS, start_ms)
+        windows.append((window_start, window_end))
+        window_end = window_start
+    stats["windows"] = stats.get("windows", 0) + len(windows)
+
+    semaphore = asyncio.Semaphore(WINDOW_CONCURRENCY)
+
+    async def run(window):
+        async with semaphore:
+            return await _fetch_window(*window, base_coin, should_stop, stats)
+
+    results = await asyncio.gather(*(run(window) for window in windows))
+    return [tx for window_rows in results for tx in window_rows]
+
+
+async def fetch_transactions(
+    symbol: Optional[str] = None,
+    start_ms: Optional[int] = None,
+    end_ms: Optional[int] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> dict:
+    """
+    Every transaction in [start_ms, end_ms) (optionally for one symbol),
+    newest first, straight from the API. Returns
+    {"rows", "pages", "windows", "cancelled", "elapsed_ms", "source"}.
+    """
+    started = time.perf_counter()
+    now_ms = int(time.time() * 1000)
+    end_ms = end_ms or now_ms
+    start_ms = start_ms or end_ms - DEFAULT_DAYS * 86400 * 1000
+    should_stop = should_stop or (lambda: False)
+    base_coin = None
+    if symbol and symbol.endswith(SETTLE_COIN):
+        base_coin = symbol[: -len(SETTLE_COIN)]
+
+    stats = {"pages": 0}
+    fetched = await _fetch_range(start_ms, end_ms, base_coin, should_stop, stats)
+
+    # Windows share their boundary millisecond: keep each transaction once
+    rows = {}
+    for tx in fetched:
+        if symbol and tx.get("symbol") != symbol:
+            continue
+        if start_ms <= _row_time(tx) < end_ms:
+            rows[_row_key(tx)] = tx
+
+    return {
+        "rows": sorted(rows.values(), key=_row_time, reverse=True),
+        "pages": stats["pages"],
+        "windows": stats["windows"],
+        "cancelled": should_stop(),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000),
+        "source": "api",
+    }
+
+
+# ---------------- LOCAL STORE ---------------- #
+def _init_schema(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS transaction_log (
+            id TEXT PRIMARY KEY,
+            transaction_time INTEGER NOT NULL,
+            symbol TEXT,
+            order_id TEXT,
+            type TEXT,
+            data TEXT NOT NULL
+        )
+        """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transaction_log_time "
+        "ON transaction_log (transaction_time)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transaction_log_symbol_time "
+        "ON transaction_log (symbol, transaction_time)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transaction_log_order "
+        "ON transaction_log (order_id)"
+    )
+
+
+db.register_schema(_init_schema)
+
+
+def _store_job(rows: list, synced_from: int, synced_to: int):
+    """Writer job: upsert rows and advance the watermarks in one transaction."""
+    records = [
+        (
+            _row_key(tx),
+            _row_time(tx),
+            tx.get("symbol") or None,
+            tx.get("orderId") or None,
+            tx.get("type"),
+            json.dumps(tx, separators=(",", ":")),
+        )
+        for tx in rows
+    ]
+
+    def job(conn):
+        conn.executemany(
+            "INSERT OR REPLACE INTO transaction_log "
+            "(id, transaction_time, symbol, order_id, type, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            records,
+        )
+        db.set_meta(conn, SYNCED_FROM_KEY, str(synced_from))
+        db.set_meta(conn, SYNCED_TO_KEY, str(synced_to))
+
+    return job
+
+
+def _load_watermarks():
+    rows = db.query(
+        "SELECT key, value FROM meta WHERE key IN (?, ?)",
+        (SYNCED_FROM_KEY, SYNCED_TO_KEY),
+    )
+    values = {row["key"]: int(row["value"]) for row in rows}
+    _watermarks["from"] = values.get(SYNCED_FROM_KEY)
+    _watermarks["to"] = values.get(SYNCED_TO_KEY)
+    _watermarks["loaded"] = True
+
+
+def query_transactions(
+    symbol: Optional[str] = None,
+    start_ms: int = 0,
+    end_ms: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> list:
+    """
+    Synced transactions in [start_ms, end_ms) (optionally for one symbol),
+    newest first, as Bybit returned them (blocking: use asyncio.to_thread).
+    """
+    sql = "SELECT data FROM transaction_log WHERE transaction_time >= ?"
+    params = [start_ms]
+    if end_ms is not None:
+        sql += " AND transaction_time < ?"
+        params.append(end_ms)
+    if symbol:
+        sql += " AND symbol = ?"
+        params.append(symbol)
+    sql += " ORDER BY transaction_time DESC"
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return [json.loads(row["data"]) for row in db.query(sql, tuple(params))]
+
+
+def get_last_transactions(symbol: str, limit: int = 5) -> list:
+    """Newest synced transactions of symbol (blocking)."""
+    return query_transactions(symbol, limit=limit)
+
+
+def get_order_transactions(order_id: str) -> list:
+    """Synced transactions (fills, fees) of one order, newest first (blocking)."""
+    rows = db.query(
+        "SELECT data FROM transaction_log WHERE order_id = ? "
+        "ORDER BY transaction_time DESC",
+        (order_id,),
+    )
+    return [json.loads(row["data"]) for row in rows]
+
+
+# ---------------- SYNC ---------------- #
+async def sync_transaction_log(backfill_days: int = SYNC_BACKFILL_DAYS) -> dict:
+    """
+    Pull transaction-log rows newer than the watermark into the local table
+    (the first run backfills backfill_days). Chunks are committed oldest
+    first, so an interrupted backfill resumes where it stopped.
+    Returns {"rows", "pages"}.
+    """
+    async with _sync_lock:
+        if not _watermarks["loaded"]:
+            await asyncio.to_thread(_load_watermarks)
+        now_ms = int(time.time() * 1000)
+        oldest_ms = now_ms - MAX_DAYS * 86400 * 1000
+        if _watermarks["to"] is None:
+            synced_from = max(now_ms - backfill_days * 86400 * 1000, oldest_ms)
+            start_ms = synced_from
+        else:
+            synced_from = max(_watermarks["from"], oldest_ms)
+            # Rows can be posted a little after their transactionTime
+            start_ms = max(_watermarks["to"] - SYNC_OVERLAP_MS, synced_from)
+
+        stats = {"pages": 0}
+        stored = 0
+        try:
+            while start_ms < now_ms:
+                end_ms = min(start_ms + SYNC_CHUNK_MS, now_ms)
+                rows = await _fetch_range(start_ms, end_ms, None, lambda: False, stats)
+                ticket = db.submit_write(
+                    _store_job(rows, synced_from, end_ms), track=True
+                )
+                # Advance only on a confirmed commit of this chunk (rows and
+                # meta watermark are one job, so they commit together)
+                if not await asyncio.to_thread(ticket.wait, SYNC_FLUSH_TIMEOUT):
+                    raise RuntimeError(
+                        "transaction log chunk did not commit (failed or timed out)"
+                    )
+                _watermarks["from"], _watermarks["to"] = synced_from, end_ms
+                stored += len(rows)
+                start_ms = end_ms
+        except Exception:
+            transaction_sync_stats["errors"] += 1
+            raise
+        finally:
+            transaction_sync_stats["pages"] += stats["pages"]
+            transaction_sync_stats["rows"] += stored
+
+        transaction_sync_stats["syncs"] += 1
+        transaction_sync_stats["last_sync"] = time.time()
+        return {"rows": stored, "pages": stats["pages"]}
+
+
+def is_covered(start_ms: int) -> bool:
+    """True when the local table holds everything from start_ms on."""
+    return _watermarks["from"] is not None and start_ms >= _watermarks["from"]
+
+
+async def load_transactions(
+    symbol: Optional[str] = None,
+    start_ms: Optional[int] = None,
+    end_ms: Optional[int] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> dict:
+    """
+    Same result as fetch_transactions(), served from the local table after
+    a catch-up sync when it covers the range, else from the API.
+    """
+    started = time.perf_counter()
+    now_ms = int(time.time() * 1000)
+    end_ms = end_ms or now_ms
+    start_ms = start_ms or end_ms - DEFAULT_DAYS * 86400 * 1000
+    if not _watermarks["loaded"]:
+        await asyncio.to_thread(_load_watermarks)
+    if not is_covered(start_ms):
+        return await fetch_transactions(symbol, start_ms, end_ms, should_stop)
+
+    try:
+        synced = await sync_transaction_log()
+    except Exception as e:
+        print(f"[TRANSACTIONS][WARN] Catch-up sync failed, using the API: {e}")
+        return await fetch_transactions(symbol, start_ms, end_ms, should_stop)
+
+    rows = await asyncio.to_thread(query_transactions, symbol, start_ms, end_ms)
+    return {
+        "rows": rows,
+        "pages": synced["pages"],
+        "windows": 0,
+        "cancelled": False,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000),
+        "source": "local",
+    }
+
+
+async def periodic_transaction_sync(interval_seconds: int = SYNC_INTERVAL):
+    """Keep the local transaction log current (first pass backfills)."""
+    while True:
+        try:
+            synced = await sync_transaction_log()
+            if synced["rows"]:
+                print(
+                    f"[TRANSACTIONS] Synced {synced['rows']} row(s) "
+                    f"in {synced['pages']} page(s)"
+                )
+        except Exception as e:
+            print(f"[TRANSACTIONS][ERROR] Sync failed: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+# ---------------- RENDERING ---------------- #
+def _format_time(ms) -> str:
+    return datetime.fromtimestamp(int(ms or 0) / 1000, TIMEZONE).strftime(
+        "%Y-%m-%d %H:%M:%S"
+    )
+
+
+def render_csv(rows: list) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_FIELDS)
+    for tx in rows:
+        writer.writerow(
+            [_format_time(tx.get("transactionTime"))]
+            + [tx.get(field, "") for field in CSV_FIELDS[1:]]
+        )
+    return buffer.getvalue().encode("utf-8")
+
+
+def _total(rows: list, field: str) -> float:
+    total = 0.0
+    for tx in rows:
+        try:
+            total += float(tx.get(field) or 0)
+        except ValueError:
+            pass
+    return total
+
+
+def format_summary(
+    history: dict, symbol: Optional[str], start_ms: int, end_ms: int
+) -> str:
+    """Short caption for the CSV document (Telegram captions max out at 1024 chars)."""
+    rows = history["rows"]
+    by_type = {}
+    for tx in rows:
+        by_type[tx.get("type") or "?"] = by_type.get(tx.get("type") or "?", 0) + 1
+    change = _total(rows, "change")
+    change_emoji = "🟢" if change > 0 else "🔴" if change < 0 else "⚪"
+    types = ", ".join(f"{name} {count}" for name, count in sorted(by_type.items()))
+    text = (
+        f"📄 **Transactions** {symbol or 'all symbols'}\n"
+        f"```\n"
+        f"From: {_format_time(start_ms)}\n"
+        f"To:   {_format_time(end_ms)}\n"
+        f"Rows: {len(rows)} ({types})\n"
+        f"Cash Flow (PNL): {_total(rows, 'cashFlow'):,.4f}\n"
+        f"Funding: {_total(rows, 'funding'):,.4f}\n"
+        f"Fee: {_total(rows, 'fee'):,.4f}\n"
+        f"{change_emoji} Change: {change:,.4f}\n"
+        f"```\n"
+        f"⏱ {history['source']}, {history['pages']} API page(s) "
+        f"in {history['elapsed_ms']}ms"
+    )
+    if history["cancelled"]:
+        text += "\n🛑 Cancelled: partial history"
+    return text
+
+
+def document_name(symbol: Optional[str], start_ms: int, end_ms: int) -> str:
+    day = lambda ms: datetime.fromtimestamp(ms / 1000, TIMEZONE).strftime("%Y%m%d")
+    return f"transactions_{symbol or 'all'}_{day(start_ms)}-{day(end_ms)}.csv"
@@ -1,65 +1,6 @@
 import asyncio
-import json
-import os
-import traceback
-from datetime import datetime
-from threading import Lock
 from errors import send_error_to_telegram
-
-# Lock for thread-safe file operations
-_ws_file_lock = Lock()
-# File path in project root directory
-WS_DATA_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "ws_data.json")
-
-
-def save_ws_message_to_json(msg_data: dict):
-    """
-    Save WebSocket message to JSON file.
-    Each new message is added to the messages array.
-    """
-    try:
-        print(f"[WS][DEBUG] Attempting to save WS message to {WS_DATA_FILE}")
-
-        with _ws_file_lock:
-            # Read existing data
-            if os.path.exists(WS_DATA_FILE):
-                try:
-                    with open(WS_DATA_FILE, "r", encoding="utf-8") as f:
-                        data = json.load(f)
-                    print(
-                        f"[WS][DEBUG] Loaded existing file with {len(data.get('messages', []))} messages"
-                    )
-                except (json.JSONDecodeError, IOError) as e:
-                    # If file is corrupted or has errors, start fresh
-                    print(
-                        f"[WS][WARN] Error reading existing file, starting fresh: {e}"
-                    )
-                    data = {"messages": []}
-            else:
-                print(f"[WS][DEBUG] File does not exist, creating new file")
-                data = {"messages": []}
-
-            # Add timestamp to message
-            message_with_timestamp = {
-                "timestamp": datetime.now().isoformat(),
-                "data": msg_data,
-            }
-
-            # Add new message to array
-            data["messages"].append(message_with_timestamp)
-            print(f"[WS][DEBUG] Added message, total messages: {len(data['messages'])}")
-
-            # Save file
-            with open(WS_DATA_FILE, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-
-            print(f"[WS][SUCCESS] Saved WS message to {WS_DATA_FILE}")
-
-    except Exception as e:
-        # On error, print full traceback
-        error_trace = traceback.format_exc()
-        print(f"[WS][ERROR] Failed to save WS message to JSON: {e}")
-        print(f"[WS][ERROR] Traceback: {error_trace}")
+from ws_journal import journal_message
 
 
 def order_callback_ws(loop, telegram_queue):
@@ -72,8 +13,8 @@ def order_callback_ws(loop, telegram_queue):
         try:
             print(f"[WS][DEBUG] Callback received message: {type(msg)}")
 
-            # Save entire WebSocket message to JSON file
-            save_ws_message_to_json(msg)
+            # Journal the raw WebSocket message (handed off to the writer thread)
+            journal_message(msg)
 
             # Process all orders in message (not just first order)
             orders = msg.get("data", [])
@@ -0,0 +1,240 @@
+"""
+WS Journal Module
+Append-only JSON-lines journal of raw WebSocket messages.
+The WS callback thread only hands the message to a bounded queue; a background
+writer thread batches the writes, fsyncs at most once per FSYNC_INTERVAL and
+rotates segments by size/age (closed segments are optionally gzipped).
+iter_messages() reads the journal back by time range for debugging and replay.
+"""
+
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Iterator, Optional
+
+# Journal directory in project root directory
+JOURNAL_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "ws_journal")
+SEGMENT_PREFIX = "ws-"
+SEGMENT_MAX_BYTES = 16 * 1024 * 1024
+SEGMENT_MAX_AGE = 6 * 3600  # seconds
+COMPRESS_SEGMENTS = True  # gzip segments once they are rotated out
+FSYNC_INTERVAL = 1.0  # seconds
+QUEUE_MAX_SIZE = 10000
+BATCH_MAX_SIZE = 500
+
+_queue: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=QUEUE_MAX_SIZE)
+_writer_thread: Optional[threading.Thread] = None
+_start_lock = threading.Lock()
+journal_stats = {"written": 0, "dropped": 0, "segments": 0, "fsyncs": 0}
+
+
+# ---------------- PRODUCER API ---------------- #
+def journal_message(msg: dict):
+    """
+    Queue a raw WS message for the journal (never blocks the WS thread).
+    If the writer falls behind and the queue is full, the message is dropped
+    and counted in journal_stats["dropped"].
+    """
+    _ensure_writer()
+    entry = {"ts": time.time(), "data": msg}
+    try:
+        _queue.put_nowait(entry)
+    except queue.Full:
+        journal_stats["dropped"] += 1
+        if journal_stats["dropped"] % 100 == 1:
+            print(
+                f"[WS_JOURNAL][WARN] Queue full, dropped {journal_stats['dropped']} message(s)"
+            )
+
+
+def stop_journal(timeout: float = 5.0):
+    """Flush pending messages and stop the writer (e.g. on shutdown)."""
+    global _writer_thread
+    with _start_lock:
+        thread = _writer_thread
+        _writer_thread = None
+    if thread and thread.is_alive():
+        _queue.put(None)
+        thread.join(timeout)
+
+
+def _ensure_writer():
+    global _writer_thread
+    if _writer_thread is not None:
+        return
+    with _start_lock:
+        if _writer_thread is None:
+            os.makedirs(JOURNAL_DIR, exist_ok=True)
+            _writer_thread = threading.Thread(
+                target=_writer_loop, name="ws-journal", daemon=True
+            )
+            _writer_thread.start()
+
+
+# ---------------- WRITER ---------------- #
+def _segment_name(ts: float) -> str:
+    # Name encodes the segment start time so segments sort chronologically
+    return f"{SEGMENT_PREFIX}{datetime.fromtimestamp(ts).strftime('%Y%m%d-%H%M%S-%f')}.jsonl"
+
+
+def _compress_segment(path: str):
+    try:
+        with open(path, "rb") as src, gzip.open(path + ".gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(path)
+    except Exception as e:
+        print(f"[WS_JOURNAL][ERROR] Failed to compress {path}: {e}")
+
+
+class _SegmentWriter:
+    def __init__(self):
+        self.file = None
+        self.path = None
+        self.opened_at = 0.0
+        self.last_fsync = 0.0
+        self.dirty = False
+
+    def _open(self, ts: float):
+        self.path = os.path.join(JOURNAL_DIR, _segment_name(ts))
+        self.file = open(self.path, "a", encoding="utf-8")
+        self.opened_at = time.time()
+        journal_stats["segments"] += 1
+
+    def _needs_rotation(self) -> bool:
+        return (
+            self.file.tell() >= SEGMENT_MAX_BYTES
+            or time.time() - self.opened_at >= SEGMENT_MAX_AGE
+        )
+
+    def write_batch(self, entries: list):
+        if self.file is not None and self._needs_rotation():
+            self.rotate()
+        if self.file is None:
+            self._open(entries[0]["ts"])
+        lines = [json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries]
+        self.file.write("".join(lines))
+        self.file.flush()
+        self.dirty = True
+        journal_stats["written"] += len(entries)
+
+    def maybe_fsync(self, force: bool = False):
+        if not self.dirty:
+            return
+        now = time.monotonic()
+        if force or now - self.last_fsync >= FSYNC_INTERVAL:
+            os.fsync(self.file.fileno())
+            self.last_fsync = now
+            self.dirty = False
+            journal_stats["fsyncs"] += 1
+
+    def rotate(self):
+        if self.file is None:
+            return
+        self.maybe_fsync(force=True)
+        self.file.close()
+        closed_path = self.path
+        self.file = None
+        self.path = None
+        if COMPRESS_SEGMENTS:
+            _compress_segment(closed_path)
+
+    def close(self):
+        if self.file is not None:
+            self.maybe_fsync(force=True)
+            self.file.close()
+            self.file = None
+
+
+def _writer_loop():
+    writer = _SegmentWriter()
+    running = True
+    while running:
+        try:
+            first = _queue.get(timeout=FSYNC_INTERVAL)
+        except queue.Empty:
+            first = ...
+        batch = []
+        if first is None:
+            running = False
+        elif first is not ...:
+            batch.append(first)
+            # Drain whatever else is already waiting into the same write
+            while len(batch) < BATCH_MAX_SIZE:
+                try:
+                    entry = _queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    running = False
+                    break
+                batch.append(entry)
+
+        try:
+            if batch:
+                writer.write_batch(batch)
+            writer.maybe_fsync(force=not running)
+        except Exception as e:
+            print(f"[WS_JOURNAL][ERROR] Failed to write batch: {e}")
+    writer.close()
+
+
+# ---------------- READER ---------------- #
+def _segment_start(filename: str) -> float:
+    stamp = filename[len(SEGMENT_PREFIX) :].split(".", 1)[0]
+    return datetime.strptime(stamp, "%Y%m%d-%H%M%S-%f").timestamp()
+
+
+def list_segments() -> list:
+    """Journal segment paths, oldest first."""
+    if not os.path.isdir(JOURNAL_DIR):
+        return []
+    names = sorted(
+        name
+        for name in os.listdir(JOURNAL_DIR)
+        if name.startswith(SEGMENT_PREFIX)
+        and (name.endswith(".jsonl") or name.endswith(".jsonl.gz"))
+    )
+    return [os.path.join(JOURNAL_DIR, name) for name in names]
+
+
+def iter_messages(
+    start: Optional[float] = None, end: Optional[float] = None
+) -> Iterator[dict]:
+    """
+    Yield journal entries {"ts": epoch_seconds, "data": raw_ws_message}
+    with start <= ts < end (either bound may be None), oldest first.
+    Segments entirely outside the range are skipped without being read.
+    """
+    segments = list_segments()
+    starts = [_segment_start(os.path.basename(path)) for path in segments]
+
+    for i, path in enumerate(segments):
+        if end is not None and starts[i] >= end:
+            break
+        # A segment ends where the next one starts
+        if start is not None and i + 1 < len(segments) and starts[i + 1] < start:
+            continue
+
+        opener = gzip.open if path.endswith(".gz") else open
+        try:
+            with opener(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn last line after a crash
+                        continue
+                    ts = entry.get("ts", 0)
+                    if start is not None and ts < start:
+                        continue
+                    if end is not None and ts >= end:
+                        continue
+                    yield entry
+        except FileNotFoundError:
+            # Rotated and compressed while we were listing
+            continue
@@ -4,17 +4,15 @@ Handles formatting and processing of Bybit WebSocket order messages.
 """
 
 from datetime import datetime, timedelta
-from config import (
-    open_positions,
-    position_entry_times,
-    position_tp_prices,
-    TARGET_CHANNEL,
-    FIXED_MARGIN_USDT,
-)
-from clients import telClient
-from api import get_positions, set_trading_stop
+from config import open_positions, FIXED_MARGIN_USDT
+from notifier import notify, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+from api import set_trading_stop
 from capital_tracker import track_position_closed, track_rejected_order
 from liquidity_analyzer import update_order_fill
+import ladder_state
+import position_book
+import position_context
+from timer_wheel import deferred
 
 
 # ---------------- ENUMS ---------------- #
@@ -164,82 +162,27 @@ def format_reject_reason(reason: str) -> str:
 
 
 def identify_tp_sl_level(
-    symbol: str, stop_order_type: str, trigger_price: float
+    symbol: str, stop_order_type: str, trigger_price: float, order_id: str | None = None
 ) -> str:
     """
     Identify which TP or SL level this is (TP1, TP2, TP3, SL, SL2, SL3).
+    Looked up in the position's ladder state: by orderId, then by triggerPrice.
 
     :param symbol: Trading symbol
     :param stop_order_type: Order type (TakeProfit, PartialTakeProfit, StopLoss, PartialStopLoss)
     :param trigger_price: Trigger price
+    :param order_id: Conditional order ID
     :return: TP/SL identifier (e.g., "TP1", "SL2", "SL", etc.)
     """
-    if not trigger_price or trigger_price == 0:
-        # If trigger price is not available, return general type
-        if "TakeProfit" in stop_order_type:
-            return "TP" if "Partial" not in stop_order_type else "Partial TP"
-        else:
-            return "SL" if "Partial" not in stop_order_type else "Partial SL"
-
-    tp_info = position_tp_prices.get(symbol)
-    if not tp_info:
-        # If TP info is not available, return general type
-        if "TakeProfit" in stop_order_type:
-            return "TP" if "Partial" not in stop_order_type else "Partial TP"
-        else:
-            return "SL" if "Partial" not in stop_order_type else "Partial SL"
+    level = ladder_state.level_for(symbol, order_id, stop_order_type, trigger_price)
+    if level:
+        return level
 
-    tolerance = 0.0001  # 0.01% tolerance
-
-    # For TakeProfit
+    # Unknown position or level: return general type
     if "TakeProfit" in stop_order_type:
-        tp1_price = tp_info.get("tp1", 0)
-        tp2_price = tp_info.get("tp2", 0)
-        tp3_price = tp_info.get("tp3")
-
-        if tp1_price and abs(trigger_price - tp1_price) / tp1_price < tolerance:
-            return "TP1"
-        elif tp2_price and abs(trigger_price - tp2_price) / tp2_price < tolerance:
-            return "TP2"
-        elif tp3_price and abs(trigger_price - tp3_price) / tp3_price < tolerance:
-            return "TP3"
-        else:
-            return "TP" if "Partial" not in stop_order_type else "Partial TP"
-
-    # For StopLoss
-    if "StopLoss" in stop_order_type:
-        entry_price = tp_info.get("entry", 0)
-        sl_price = tp_info.get("sl", 0)
-        side = tp_info.get("side", "")
-        tp2_price = tp_info.get("tp2", 0)
-
-        # Check initial SL
-        if sl_price and abs(trigger_price - sl_price) / sl_price < tolerance:
-            return "SL"
-
-        # Check SL2 (entry * (1±0.0011))
-        if entry_price > 0:
-            if side == "Buy":
-                expected_sl2 = entry_price * (1 + 0.0011)
-            else:
-                expected_sl2 = entry_price * (1 - 0.0011)
-
-            if abs(trigger_price - expected_sl2) / expected_sl2 < tolerance:
-                return "SL2"
-
-        # Check SL3 (TP2 * (1±0.0011))
-        if tp2_price > 0:
-            if side == "Buy":
-                expected_sl3 = tp2_price * (1 + 0.0011)
-            else:
-                expected_sl3 = tp2_price * (1 - 0.0011)
-
-            if abs(trigger_price - expected_sl3) / expected_sl3 < tolerance:
-                return "SL3"
-
-        # If none matched, return general type
+        return "TP" if "Partial" not in stop_order_type else "Partial TP"
+    if "StopLoss" in stop_order_type or not trigger_price:
         return "SL" if "Partial" not in stop_order_type else "Partial SL"
-
     return stop_order_type
 
 
@@ -291,9 +234,9 @@ async def format_new_order_filled(data: dict) -> str:
         fill_percentage = (cum_exec_qty / qty * 100) if qty > 0 else 0
         execution_price = avg_price if avg_price > 0 else price
 
-        # Calculate slippage if we have expected price (from liquidity metrics)
+        # Realized slippage is computed from the private execution stream
+        # (VWAP of the executions vs the pre-trade price), not from here
         slippage = None
-        # Note: Slippage calculation would need expected price from order placement
 
         update_order_fill(
             order_id=str(order_id),
@@ -343,7 +286,9 @@ async def format_sl_tp_created(data: dict) -> str:
         tp_sl_emoji = "🎯" if "TakeProfit" in stop_order_type else "🛑"
 
         # Identify which TP or SL this is
-        tp_sl_level = identify_tp_sl_level(symbol, stop_order_type, trigger_price)
+        tp_sl_level = identify_tp_sl_level(
+            symbol, stop_order_type, trigger_price, data.get("orderId")
+        )
 
         text = (
             f"{tp_sl_emoji} **{tp_sl_level} Created**\n\n"
@@ -384,7 +329,9 @@ async def format_sl_tp_triggered(data: dict) -> str:
     emoji = "🎯" if "TakeProfit" in stop_order_type else "🛑"
 
     # Identify which TP or SL this is
-    tp_sl_level = identify_tp_sl_level(symbol, stop_order_type, trigger_price)
+    tp_sl_level = identify_tp_sl_level(
+        symbol, stop_order_type, trigger_price, data.get("orderId")
+    )
 
     text = (
         f"{emoji} **{tp_sl_level} Triggered**\n\n"
@@ -433,7 +380,9 @@ async def format_order_cancelled(data: dict) -> str:
         emoji = "🎯" if "TakeProfit" in stop_order_type else "🛑"
 
         # Identify which TP or SL this is
-        tp_sl_level = identify_tp_sl_level(symbol, stop_order_type, trigger_price)
+        tp_sl_level = identify_tp_sl_level(
+            symbol, stop_order_type, trigger_price, data.get("orderId")
+        )
 
         title = f"{emoji} **{tp_sl_level} Cancelled**"
     else:
@@ -508,16 +457,30 @@ async def format_position_closed(data: dict, closed_pnl: float) -> str:
 
 
 # ---------------- SL2 SETTER AFTER TP1 ---------------- #
+# Stops move to SL2 / SL3 only once the position is this old
+STOP_MOVE_MIN_AGE = timedelta(minutes=30)
+
+
+def _remaining_size(symbol: str, ladder: dict) -> float:
+    """Remaining size from the ladder, else from the WS-fed position book."""
+    if ladder["remaining"]:
+        return ladder["remaining"]
+    position = position_book.get_position(symbol)
+    return position["size"] if position else 0.0
+
+
 async def set_sl2_after_tp1(symbol: str, tp_data: dict):
     """
     Set SL2 for remaining position after TP1 is triggered.
-    SL2 is only set if 30 minutes have passed since entry time.
+    SL2 is only set once 30 minutes have passed since entry time; earlier
+    calls arm a deferred move that fires when the window opens.
     SL2 = entry_price * (1 + 0.0011) for Buy
     SL2 = entry_price * (1 - 0.0011) for Sell
+    Called on the ladder's TP1 transition; needs no REST read.
     """
     try:
         # Check if 30 minutes have passed since entry time
-        entry_time = position_entry_times.get(symbol)
+        entry_time = position_context.get_entry_time(symbol)
         if not entry_time:
             print(
                 f"[WARN] Entry time not found for {symbol}, cannot verify 30-minute rule"
@@ -526,56 +489,66 @@ async def set_sl2_after_tp1(symbol: str, tp_data: dict):
             return
 
         time_elapsed = datetime.now() - entry_time
-        if time_elapsed < timedelta(minutes=30):
+        if time_elapsed < STOP_MOVE_MIN_AGE:
+            # Too early: arm the move for the moment the window opens
+            fire_at = entry_time + STOP_MOVE_MIN_AGE
+            deferred.schedule(
+                symbol,
+                "SL2",
+                (fire_at - datetime.now()).total_seconds(),
+                lambda: set_sl2_after_tp1(symbol, tp_data),
+            )
             print(
-                f"[INFO] SL2 skipped for {symbol}: Only {time_elapsed.total_seconds()/60:.1f} minutes elapsed (need 30 minutes)"
+                f"[INFO] SL2 deferred for {symbol}: Only {time_elapsed.total_seconds()/60:.1f} minutes elapsed, moving at {fire_at:%H:%M:%S}"
             )
-            await telClient.send_message(
-                TARGET_CHANNEL,
-                f"⏰ **SL2 Skipped**\n\n"
+            notify(
+                f"⏰ **SL2 Deferred**\n\n"
                 f"```\n"
                 f"Symbol: {symbol}\n"
                 f"Reason: Price reached TP1 too quickly\n"
                 f"Time elapsed: {time_elapsed.total_seconds()/60:.1f} minutes\n"
-                f"Required: 30 minutes\n"
+                f"SL2 moves at: {fire_at:%H:%M:%S}\n"
                 f"```",
+                symbol=symbol,
+                priority=PRIORITY_NORMAL,
             )
             return
 
-        positions = get_positions(symbol=symbol)
-        if not positions:
-            print(f"[WARN] Position not found for {symbol}, cannot set SL2")
+        # Fill price, side and remaining size from the ladder state (no REST)
+        ladder = ladder_state.get_ladder(symbol)
+        if not ladder:
+            print(f"[WARN] No ladder state for {symbol}, cannot set SL2")
+            return
+        if ladder["state"] != ladder_state.TP1_HIT:
+            # Moved on while the SL2 move was deferred (TP2 hit or closed)
+            print(f"[INFO] SL2 dropped for {symbol}: ladder is {ladder['state']}")
             return
 
-        position = positions[0]
-        entry_price = float(position.get("avgPrice", 0))
-        side = position.get("side", "")
-        size = float(position.get("size", 0))
+        entry_price = ladder["entry_price"]
+        side = ladder["side"]
+        size = _remaining_size(symbol, ladder)
 
         if entry_price == 0 or size == 0:
             print(f"[WARN] Invalid position data for {symbol}, cannot set SL2")
             return
 
-        if side == "Buy":
-            sl2_price = entry_price * (1 + 0.0011)
-        else:  # Sell
-            sl2_price = entry_price * (1 - 0.0011)
+        sl2_price = ladder_state.stop_price(symbol, "SL2")
 
-        set_trading_stop(
+        await set_trading_stop(
             symbol=symbol,
             positionIdx=0,
             tpslMode="Partial",
             sl=str(sl2_price),
             slSize=str(size),
         )
+        ladder_state.note_stop(symbol, "SL2", sl2_price)
 
         print(
             f"[INFO] SL2 set for {symbol}: {sl2_price:.4f} (entry: {entry_price:.4f}, side: {side}, size: {size})"
         )
 
         # Notify Telegram
-        await telClient.send_message(
-            TARGET_CHANNEL,
+        notify(
             f"🛡️ **SL2 Set After TP1**\n\n"
             f"```\n"
             f"Symbol: {symbol}\n"
@@ -585,13 +558,16 @@ async def set_sl2_after_tp1(symbol: str, tp_data: dict):
             f"Remaining Size: {size:,.4f}\n"
             f"Time elapsed: {time_elapsed.total_seconds()/60:.1f} minutes\n"
             f"```",
+            symbol=symbol,
+            priority=PRIORITY_HIGH,
         )
 
     except Exception as e:
         print(f"[ERROR] Failed to set SL2 for {symbol}: {e}")
-        await telClient.send_message(
-            TARGET_CHANNEL,
+        notify(
             f"⚠️ **Error Setting SL2**\n\n" f"Symbol: {symbol}\n" f"Error: {str(e)}",
+            symbol=symbol,
+            priority=PRIORITY_HIGH,
         )
 
 
@@ -599,13 +575,17 @@ async def set_sl2_after_tp1(symbol: str, tp_data: dict):
 async def set_sl3_after_tp2(symbol: str, tp_data: dict):
     """
     Set SL3 for remaining position after TP2 is triggered.
-    SL3 is only set if 30 minutes have passed since entry time.
+    SL3 is only set once 30 minutes have passed since entry time; earlier
+    calls arm a deferred move that fires when the window opens.
     SL3 = TP2 * (1 + 0.0011) for Buy
     SL3 = TP2 * (1 - 0.0011) for Sell
+    Called on the ladder's TP2 transition; needs no REST read.
     """
+    # SL3 supersedes an SL2 move that is still waiting for its window
+    deferred.cancel(symbol, "SL2")
     try:
         # Check if 30 minutes have passed since entry time
-        entry_time = position_entry_times.get(symbol)
+        entry_time = position_context.get_entry_time(symbol)
         if not entry_time:
             print(
                 f"[WARN] Entry time not found for {symbol}, cannot verify 30-minute rule"
@@ -613,67 +593,70 @@ async def set_sl3_after_tp2(symbol: str, tp_data: dict):
             return
 
         time_elapsed = datetime.now() - entry_time
-        if time_elapsed < timedelta(minutes=30):
+        if time_elapsed < STOP_MOVE_MIN_AGE:
+            # Too early: arm the move for the moment the window opens
+            fire_at = entry_time + STOP_MOVE_MIN_AGE
+            deferred.schedule(
+                symbol,
+                "SL3",
+                (fire_at - datetime.now()).total_seconds(),
+                lambda: set_sl3_after_tp2(symbol, tp_data),
+            )
             print(
-                f"[INFO] SL3 skipped for {symbol}: Only {time_elapsed.total_seconds()/60:.1f} minutes elapsed (need 30 minutes)"
+                f"[INFO] SL3 deferred for {symbol}: Only {time_elapsed.total_seconds()/60:.1f} minutes elapsed, moving at {fire_at:%H:%M:%S}"
             )
-            await telClient.send_message(
-                TARGET_CHANNEL,
-                f"⏰ **SL3 Skipped**\n\n"
+            notify(
+                f"⏰ **SL3 Deferred**\n\n"
                 f"```\n"
                 f"Symbol: {symbol}\n"
                 f"Reason: Price reached TP2 too quickly\n"
                 f"Time elapsed: {time_elapsed.total_seconds()/60:.1f} minutes\n"
-                f"Required: 30 minutes\n"
+                f"SL3 moves at: {fire_at:%H:%M:%S}\n"
                 f"```",
+                symbol=symbol,
+                priority=PRIORITY_NORMAL,
             )
             return
 
-        positions = get_positions(symbol=symbol)
-        if not positions:
-            print(f"[WARN] Position not found for {symbol}, cannot set SL3")
+        # Side and remaining size from the ladder state (no REST)
+        ladder = ladder_state.get_ladder(symbol)
+        if not ladder:
+            print(f"[WARN] No ladder state for {symbol}, cannot set SL3")
+            return
+        if ladder["state"] != ladder_state.TP2_HIT:
+            print(f"[INFO] SL3 dropped for {symbol}: ladder is {ladder['state']}")
             return
 
-        position = positions[0]
-        side = position.get("side", "")
-        size = float(position.get("size", 0))
+        side = ladder["side"]
+        size = _remaining_size(symbol, ladder)
 
-        # Get TP2 from triggered price or stored data
-        tp2_price = float(tp_data.get("triggerPrice", 0))
+        # Get TP2 from triggered price or the ladder's TP2 level
+        tp2_price = float(tp_data.get("triggerPrice") or 0)
         if tp2_price == 0:
-            # If triggerPrice is not available, use position_tp_prices
-            tp_info = position_tp_prices.get(symbol)
-            if tp_info:
-                tp2_price = tp_info.get("tp2", 0)
-            if tp2_price == 0:
-                # If still not found, use avgPrice
-                tp2_price = float(position.get("avgPrice", 0))
+            tp2_price = ladder["levels"].get("TP2", 0)
 
         if tp2_price == 0 or size == 0:
             print(f"[WARN] Invalid position data for {symbol}, cannot set SL3")
             return
 
         # Calculate SL3 based on TP2
-        if side == "Buy":
-            sl3_price = tp2_price * (1 + 0.0011)
-        else:  # Sell
-            sl3_price = tp2_price * (1 - 0.0011)
+        sl3_price = ladder_state.stop_price(symbol, "SL3", tp2_price)
 
-        set_trading_stop(
+        await set_trading_stop(
             symbol=symbol,
             positionIdx=0,
             tpslMode="Partial",
             sl=str(sl3_price),
             slSize=str(size),
         )
+        ladder_state.note_stop(symbol, "SL3", sl3_price)
 
         print(
             f"[INFO] SL3 set for {symbol}: {sl3_price:.4f} (TP2: {tp2_price:.4f}, side: {side}, size: {size})"
         )
 
         # Notify Telegram
-        await telClient.send_message(
-            TARGET_CHANNEL,
+        notify(
             f"🛡️ **SL3 Set After TP2**\n\n"
             f"```\n"
             f"Symbol: {symbol}\n"
@@ -683,16 +666,53 @@ async def set_sl3_after_tp2(symbol: str, tp_data: dict):
             f"Remaining Size: {size:,.4f}\n"
             f"Time elapsed: {time_elapsed.total_seconds()/60:.1f} minutes\n"
             f"```",
+            symbol=symbol,
+            priority=PRIORITY_HIGH,
         )
 
     except Exception as e:
         print(f"[ERROR] Failed to set SL3 for {symbol}: {e}")
-        await telClient.send_message(
-            TARGET_CHANNEL,
+        notify(
             f"⚠️ **Error Setting SL3**\n\n" f"Symbol: {symbol}\n" f"Error: {str(e)}",
+            symbol=symbol,
+            priority=PRIORITY_HIGH,
         )
 
 
+async def resume_stop_moves() -> int:
+    """
+    After a restart: run the stop moves the rebuilt ladders are due but have
+    no order for (moves still inside their window re-arm themselves).
+    """
+    due = ladder_state.missing_stops()
+    for symbol, stop in due.items():
+        if stop == "SL2":
+            await set_sl2_after_tp1(symbol, {})
+        else:
+            await set_sl3_after_tp2(symbol, {})
+    return len(due)
+
+
+# ---------------- POSITION CLOSE ---------------- #
+def _is_position_closed(symbol: str, data: dict) -> bool:
+    """Whether a stop fill closed the whole position (the ladder knows partial legs)."""
+    ladder = ladder_state.get_ladder(symbol)
+    if ladder is not None:
+        return ladder["state"] == ladder_state.CLOSED
+    return bool(data.get("closeOnTrigger") and data.get("reduceOnly"))
+
+
+def _forget_position(symbol: str):
+    """Drop the per-position state of a closed position."""
+    open_positions.discard(symbol)
+    position_context.clear(symbol)
+    ladder_state.close_ladder(symbol)
+    # Pending stop moves are moot once the position is gone
+    deferred.cancel_owner(symbol)
+    # Track position closed for capital tracking
+    track_position_closed(symbol)
+
+
 # ---------------- MAIN HANDLER ---------------- #
 async def handle_ws_message(item: dict):
     """
@@ -708,6 +728,11 @@ async def handle_ws_message(item: dict):
     stop_order_type = data.get("stopOrderType", "")
     create_type = data.get("createType", "")
 
+    # Advance the position's TP/SL ladder (binds new conditional orders too)
+    transition = ladder_state.apply_order_event(data)
+    if transition and transition["to"] == ladder_state.CLOSED:
+        deferred.cancel_owner(symbol)
+
     # Show message for SL/TP orders that have been created (Untriggered)
     # Only for createType related to SL/TP created by the system
     if order_status == "Untriggered" and stop_order_type:
@@ -722,7 +747,7 @@ async def handle_ws_message(item: dict):
         if ws_type == "sl_tp_created" or create_type in sl_tp_create_types:
             text = await format_sl_tp_created(data)
             if text:
-                await telClient.send_message(TARGET_CHANNEL, text)
+                notify(text, symbol=symbol, priority=PRIORITY_LOW)
                 return  # Message sent, no need to continue
 
         # If createType is not appropriate, return (don't show message)
@@ -731,69 +756,38 @@ async def handle_ws_message(item: dict):
     # Handle different message types based on ws_type
     if ws_type == "new_order":
         text = await format_new_order_filled(data)
-        await telClient.send_message(TARGET_CHANNEL, text)
+        notify(text, symbol=symbol, priority=PRIORITY_NORMAL)
 
     elif ws_type == "close_position":
         # Remove symbol from open_positions and related data
-        open_positions.discard(symbol)
-        position_entry_times.pop(symbol, None)
-        position_tp_prices.pop(symbol, None)
-        # Track position closed for capital tracking
-        track_position_closed(symbol)
+        _forget_position(symbol)
         text = await format_position_closed(data, closed_pnl)
-        await telClient.send_message(TARGET_CHANNEL, text)
+        notify(text, symbol=symbol, priority=PRIORITY_HIGH)
 
     elif ws_type == "cancel_order":
         text = await format_order_cancelled(data)
-        await telClient.send_message(TARGET_CHANNEL, text)
+        notify(text, symbol=symbol, priority=PRIORITY_LOW)
 
     elif ws_type == "sl_tp_triggered":
         # SL/TP triggered
         text = await format_sl_tp_triggered(data)
         if text:
-            await telClient.send_message(TARGET_CHANNEL, text)
+            notify(text, symbol=symbol, priority=PRIORITY_HIGH)
             # If position closed, remove from open_positions and related data
-            if data.get("closeOnTrigger") and data.get("reduceOnly"):
-                open_positions.discard(symbol)
-                position_entry_times.pop(symbol, None)
-                position_tp_prices.pop(symbol, None)
-                # Track position closed for capital tracking
-                track_position_closed(symbol)
-
-        # If TP1 or TP2 (PartialTakeProfit) triggered, set SL2 or SL3
-        stop_order_type = data.get("stopOrderType", "")
-        if stop_order_type == "PartialTakeProfit":
-            # Identify which TP was triggered
-            # To do this, we need to check the number of triggered TPs
-            # or use triggerPrice
-            # Currently assume first PartialTakeProfit = TP1 and second = TP2
-            # We can identify this by checking position size or number of previous TPs
-
-            # A simple way: check if SL2 has been set before
-            # If SL2 not set, this is TP1
-            # If SL2 set, this is TP2
-            positions = get_positions(symbol=symbol)
-            if positions:
-                position = positions[0]
-                current_sl = position.get("stopLoss", "")
-
-                # If SL2 not set (or only initial SL), this is TP1
-                # Otherwise this is TP2
-                if not current_sl or float(current_sl) == 0:
-                    # This is probably TP1
-                    await set_sl2_after_tp1(symbol, data)
-                else:
-                    # This is probably TP2
-                    await set_sl3_after_tp2(symbol, data)
-            else:
-                # If position not found, assume TP1
-                await set_sl2_after_tp1(symbol, data)
+            if _is_position_closed(symbol, data):
+                _forget_position(symbol)
+
+        # TP1 / TP2 fills move the stop to SL2 / SL3 (ladder state machine)
+        if transition and transition["stop"] == "SL2":
+            await set_sl2_after_tp1(symbol, data)
+        elif transition and transition["stop"] == "SL3":
+            await set_sl3_after_tp2(symbol, data)
 
     elif ws_type == "sl_tp_created":
         # SL/TP created (Untriggered) - for information only
         text = await format_sl_tp_created(data)
         if text:
-            await telClient.send_message(TARGET_CHANNEL, text)
+            notify(text, symbol=symbol, priority=PRIORITY_LOW)
 
     elif ws_type == "rejected" or order_status == "Rejected":
         symbol = data.get("symbol", "—")
@@ -812,29 +806,23 @@ async def handle_ws_message(item: dict):
             f"Order ID: {order_id}\n"
             f"```"
         )
-        await telClient.send_message(TARGET_CHANNEL, text)
+        notify(text, symbol=symbol, priority=PRIORITY_HIGH)
 
     # Fallback: handle by order_status if ws_type is "other"
     elif ws_type == "other":
         if order_status == "Filled":
             if data.get("reduceOnly"):
                 # Position closed by market order
-                open_positions.discard(symbol)
-                position_entry_times.pop(symbol, None)
-                position_tp_prices.pop(symbol, None)
-                # Track position closed for capital tracking
-                track_position_closed(symbol)
+                _forget_position(symbol)
                 text = await format_position_closed(data, closed_pnl)
-                await telClient.send_message(TARGET_CHANNEL, text)
+                notify(text, symbol=symbol, priority=PRIORITY_HIGH)
             else:
                 # New order filled
                 text = await format_new_order_filled(data)
-                await telClient.send_message(TARGET_CHANNEL, text)
+                notify(text, symbol=symbol, priority=PRIORITY_NORMAL)
         elif stop_order_type and order_status in ["Filled", "Triggered"]:
             text = await format_sl_tp_triggered(data)
             if text:
-                await telClient.send_message(TARGET_CHANNEL, text)
-                if data.get("closeOnTrigger") and data.get("reduceOnly"):
-                    open_positions.discard(symbol)
-                    position_entry_times.pop(symbol, None)
-                    position_tp_prices.pop(symbol, None)
+                notify(text, symbol=symbol, priority=PRIORITY_HIGH)
+                if _is_position_closed(symbol, data):
+                    _forget_position(symbol)